@@ -4,76 +4,275 @@ Description
 ===============================
 
 This Python module contains the Album class which is used to identify the albums obtained from the data found in
-rym_clean1.csv.
+rym_clean1.csv, and the functions used to read albums from a CSV file with the same columns. The file is read one row at
+a time, so the raw rows of large exports are never all held in memory. This does not bound the memory used by
+load_albums, which returns every album: only stream_albums holds one album at a time, for callers such as
+snapshot.build_snapshot that do not keep the Album objects.
 
 This file is Copyright (c) 2023 David Wu and Kevin Hu.
 """
 import csv
+import os
+import sys
+from array import array
+from datetime import date
+from typing import Iterable, Iterator, Optional, Protocol, TextIO, Union
+
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets')
+ALBUMS_FILE = os.path.join(DATASETS_DIR, 'rym_clean1.csv')
+
+AlbumSource = Union[str, os.PathLike, TextIO]
+
+
+class Vocabulary:
+    """A table of distinct strings, each identified by its index in the table.
+
+    Albums store their genres and descriptors as arrays of indices into a shared vocabulary instead of lists of strings,
+    since the same few hundred genres and descriptors are repeated across every album.
+
+    Instance Attributes:
+        - words: The strings in the vocabulary, in the order they were added
+        - ids: A mapping from each string in the vocabulary to its index
+
+    Representation Invariants:
+        - all(self.ids[self.words[i]] == i for i in range(len(self.words)))
+    """
+    words: list[str]
+    ids: dict[str, int]
+
+    def __init__(self) -> None:
+        """Initialize a new empty vocabulary.
+        """
+        self.words = []
+        self.ids = {}
+
+    def add(self, word: str) -> int:
+        """Add word to this vocabulary if it is not already in it, and return its index.
+        """
+        if word not in self.ids:
+            self.ids[word] = len(self.words)
+            self.words.append(sys.intern(word))
+        return self.ids[word]
+
+    def encode(self, words: Iterable[str]) -> array:
+        """Add the given words to this vocabulary, and return an array of their indices. The array uses 2 bytes per
+        index while the vocabulary has at most 2 ** 16 words.
+        """
+        ids = [self.add(word) for word in words]
+        return array('H' if len(self.words) <= 1 << 16 else 'I', ids)
+
+    def decode(self, ids: Iterable[int]) -> list[str]:
+        """Return the words with the given indices.
+        """
+        return [self.words[i] for i in ids]
+
+
+GENRE_VOCABULARY = Vocabulary()
+DESCRIPTOR_VOCABULARY = Vocabulary()
 
 
 # @check_contracts
 class Album:
     """A class to represent a musical album.
 
+    To keep large catalogs small in memory, albums have no instance dictionary: the genres and descriptors of an album
+    are stored as arrays of indices into GENRE_VOCABULARY and DESCRIPTOR_VOCABULARY, and its release date as a date
+    ordinal. The genres, descriptors and release attributes are computed from them when accessed.
+
     Instance Attributes:
         - name: The name of the album
         - artist: The artist/creator of the album
-        - genres: A list of the genres associated with the album
+        - genres: A list of the genres associated with the album, which may be empty
         - rank: A number ranking based on the popularity of the album, measured through the number of review the album.
             The lower the value of rank, the higher the popularity
         - release: The date of release of the album in the form 'year-month-day'
-        - descriptors: A list of descriptors/adjectives associated with the album
+        - descriptors: A list of descriptors/adjectives associated with the album, which may be empty
+        - album_id: The position of the album in the list returned by create_albums, or -1 if the album was not created
+            by create_albums. Album ids are used to refer to albums in the app without comparing names and artists
+        - genre_ids: The indices of the album's genres in GENRE_VOCABULARY
+        - descriptor_ids: The indices of the album's descriptors in DESCRIPTOR_VOCABULARY
+        - release_ordinal: The proleptic Gregorian ordinal of the album's release date
+        - spotify_id: The Spotify id of the album if it was found ahead of time by spotify_prefetch, '' if
+            spotify_prefetch found that the album is not on Spotify, or None if the album has not been looked up
+        - avg_rating: The average rating of the album, out of 5
+        - rating_count: The number of ratings of the album
+        - review_count: The number of reviews of the album
 
     Representation Invariants:
         - self.name != ''
         - self.artist != ''
-        - self.genres != []
         - self.rank > 0
         - self.release is a valid date an in the form 'year-month-day'
-        - self.descriptors != []
+        - self.album_id >= -1
+        - 0 <= self.avg_rating <= 5
+        - self.rating_count >= 0
+        - self.review_count >= 0
     """
+    __slots__ = ('name', 'artist', 'rank', 'album_id', 'genre_ids', 'descriptor_ids', 'release_ordinal', 'spotify_id',
+                 'avg_rating', 'rating_count', 'review_count')
     name: str
     artist: str
-    genres: list[str]
     rank: int
-    release: str
-    descriptors: list[str]
+    album_id: int
+    genre_ids: array
+    descriptor_ids: array
+    release_ordinal: int
+    spotify_id: Optional[str]
+    avg_rating: float
+    rating_count: int
+    review_count: int
 
     def __init__(self, name: str, artist: str, genres: list[str], rank: int, release: str,
-                 descriptors: list[str]) -> None:
-        """Initialize a new album with the given name, artist, genres, rank, release date, and decriptors.
+                 descriptors: list[str], album_id: int = -1, spotify_id: Optional[str] = None,
+                 avg_rating: float = 0.0, rating_count: int = 0, review_count: int = 0) -> None:
+        """Initialize a new album with the given name, artist, genres, rank, release date, decriptors, id, Spotify id,
+        average rating, and rating and review counts.
         """
         self.name = name
-        self.artist = artist
+        self.artist = sys.intern(artist)
         self.genres = genres
         self.rank = rank
         self.release = release
         self.descriptors = descriptors
+        self.album_id = album_id
+        self.spotify_id = spotify_id
+        self.avg_rating = avg_rating
+        self.rating_count = rating_count
+        self.review_count = review_count
 
+    @property
+    def genres(self) -> list[str]:
+        """A list of the genres associated with the album."""
+        return GENRE_VOCABULARY.decode(self.genre_ids)
 
-def create_albums() -> list[Album]:
-    """This function creates a full list of albums using the data from rym_clean1.csv. Each element in the output list
-    is an Album instance.
+    @genres.setter
+    def genres(self, genres: list[str]) -> None:
+        """Set the genres of the album."""
+        self.genre_ids = GENRE_VOCABULARY.encode(genres)
+
+    @property
+    def descriptors(self) -> list[str]:
+        """A list of descriptors/adjectives associated with the album."""
+        return DESCRIPTOR_VOCABULARY.decode(self.descriptor_ids)
+
+    @descriptors.setter
+    def descriptors(self, descriptors: list[str]) -> None:
+        """Set the descriptors of the album."""
+        self.descriptor_ids = DESCRIPTOR_VOCABULARY.encode(descriptors)
+
+    @property
+    def release(self) -> str:
+        """The date of release of the album in the form 'year-month-day'."""
+        return date.fromordinal(self.release_ordinal).isoformat()
+
+    @release.setter
+    def release(self, release: str) -> None:
+        """Set the release date of the album."""
+        self.release_ordinal = date.fromisoformat(release).toordinal()
+
+
+class AlbumBuilder(Protocol):
+    """An index or summary of albums that is built one album at a time, as the albums are read by load_albums.
+    """
+
+    def add_album(self, album: Album) -> None:
+        """Add album to this builder.
+        """
+        ...
+
+
+def read_album_rows(source: AlbumSource) -> Iterator[list[str]]:
+    """Yield the rows of the albums CSV file at the path source, or in the open text file source, one at a time and
+    without the header row. A file opened from a path is closed once every row has been read; a file object passed in is
+    left open.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='utf8', newline='') as f:
+            yield from read_album_rows(f)
+        return
+
+    reader = csv.reader(source)
+    next(reader, None)
+    yield from reader
+
+
+def parse_album_row(row: list[str], album_id: int = -1) -> Album:
+    """Return the album described by row, a row of the albums CSV file, with the given id. Fields are stripped of
+    surrounding whitespace, and 'NA' or empty fields are treated as missing: a missing rank is replaced by the row's
+    position in the file (its first column), missing primary or secondary genres, descriptors, ratings and counts are
+    left empty or 0, and a release date with only a year, or a year and a month, is completed to the first day of that
+    year or month. Raise ValueError if the row has too few columns, if its name, artist or release date are missing or
+    invalid, or if its rank (or its position, when the rank is missing) is not a positive integer.
+
+    >>> album = parse_album_row(['5', 'NA', 'Kid A ', 'Radiohead', '2000', 'album', 'Art Rock', 'NA', 'cold', '4.23',
+    ...                          'NA', '751'], 4)
+    >>> (album.name, album.rank, album.release, album.genres, album.rating_count, album.review_count)
+    ('Kid A', 5, '2000-01-01', ['Art Rock'], 0, 751)
+    """
+    if len(row) < 12:
+        raise ValueError(f'Expected 12 columns, found {len(row)}')
+    fields = [None if field.strip() in ('', 'NA') else field.strip() for field in row]
+    name, artist, release = fields[2], fields[3], fields[4]
+    if name is None or artist is None or release is None:
+        raise ValueError('Missing name, artist or release date')
+
+    genres = [genre for field in (fields[6], fields[7]) if field is not None for genre in field.split(', ')]
+    descriptors = [] if fields[8] is None else fields[8].split(', ')
+    if len(release) == 4:
+        release += '-01-01'
+    elif len(release) == 7:
+        release += '-01'
+    rank = fields[1] or fields[0]
+    if rank is None or not rank.isdigit() or int(rank) == 0:
+        raise ValueError('Missing or invalid rank')
+
+    return Album(name, artist, genres, int(rank), release, descriptors, album_id,
+                 avg_rating=0.0 if fields[9] is None else float(fields[9]),
+                 rating_count=0 if fields[10] is None else int(float(fields[10])),
+                 review_count=0 if fields[11] is None else int(float(fields[11])))
+
+
+def stream_albums(source: AlbumSource = ALBUMS_FILE, skip_invalid: bool = False) -> Iterator[Album]:
+    """Yield the albums in the albums CSV file at the path source, or in the open text file source, one at a time, with
+    album ids counting up from 0. Only one row of the file is held in memory at a time.
+
+    If skip_invalid is True, rows that parse_album_row rejects are skipped without using up an id; otherwise a
+    ValueError naming the line of the first invalid row is raised.
     """
+    album_id = 0
+    for line, row in enumerate(read_album_rows(source), start=2):
+        try:
+            album = parse_album_row(row, album_id)
+        except ValueError as error:
+            if skip_invalid:
+                continue
+            raise ValueError(f'Invalid album on line {line}: {error}') from error
+        album_id += 1
+        yield album
+
+
+def load_albums(source: AlbumSource = ALBUMS_FILE, builders: Iterable[AlbumBuilder] = (),
+                skip_invalid: bool = False) -> list[Album]:
+    """Return the list of albums streamed from source by stream_albums, passing each album to the add_album method of
+    every builder in builders as soon as it is read, so that indexes over the albums are built in the same pass over the
+    file. Every album is kept in the returned list, so the memory used grows with the size of the file.
+    """
+    builders = list(builders)
     albums = []
-    with open('datasets/rym_clean1.csv', 'r', encoding="utf8") as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            name = row[2]
-            artist = row[3]
-            if row[7] != 'NA':
-                genres = row[6].split(', ') + row[7].split(', ')
-            else:
-                genres = row[6].split(', ')
-            rank = int(row[1])
-            release = row[4]
-            descriptors = row[7].split(', ')
-            album = Album(name, artist, genres, rank, release, descriptors)
-            albums.append(album)
+    for album in stream_albums(source, skip_invalid):
+        albums.append(album)
+        for builder in builders:
+            builder.add_album(album)
     return albums
 
 
+def create_albums() -> list[Album]:
+    """This function creates a full list of albums using the data from rym_clean1.csv. Each element in the output list
+    is an Album instance, whose album_id is its position in the output list.
+    """
+    return load_albums(ALBUMS_FILE)
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod(verbose=True)
@@ -81,8 +280,8 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['csv'],  # the names (strs) of imported modules
-        'allowed-io': ['create_albums'],  # the names (strs) of functions that call print/open/input
+        'extra-imports': ['csv', 'os', 'sys', 'array', 'datetime'],  # the names (strs) of imported modules
+        'allowed-io': ['read_album_rows'],  # the names (strs) of functions that call print/open/input
         'disable': ['too-many-arguments'],
         'max-line-length': 120
     })
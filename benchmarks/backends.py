@@ -0,0 +1,76 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Backend Comparison)
+
+Description
+===============================
+
+This Python module checks that the exact scoring backends, DescriptorIndex and DescriptorMatrix, return exactly the
+same recommendations in the same order, on synthetic catalogs generated with every seed in SEEDS. Run it from the root
+of the project with:
+
+    python -m benchmarks.backends
+
+Every catalog is scored with the default weights, and with the descriptor weight only, where albums with the same
+descriptors have the same score, so that the backends are also compared on many ties. The same random albums are
+recommended for by both backends, one at a time with recommend and all at once with recommend_many, with and without
+visited albums. The report gives the number of queries compared and the number whose recommendations differ, and an
+AssertionError is raised if any of them differ.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import random
+
+from albums_data import parse_album_row
+from benchmarks.synthetic import generate_album_rows
+from descriptor_index import DescriptorIndex
+from descriptor_matrix import DescriptorMatrix
+from scoring import AlbumScorer, ScoringWeights
+
+SEEDS = [111, 112, 113]
+NUM_ALBUMS = 2000
+NUM_QUERIES = 200
+NUM_VISITED = 20
+K = 10
+# The name of every set of scoring weights, and the weights.
+WEIGHTS = [('default', ScoringWeights()), ('descriptors only', ScoringWeights(1.0, 0.0, 0.0, 0.0))]
+
+
+def run_benchmark() -> None:
+    """Print the number of queries whose recommendations differ between the two backends, for every seed in SEEDS and
+    every set of weights in WEIGHTS, and check that there are none.
+    """
+    print(f'{"seed":>6} {"weights":>17} {"queries":>8} {"different":>10}')
+    total_different = 0
+    for seed in SEEDS:
+        albums = [parse_album_row(row, i) for i, row in enumerate(generate_album_rows(NUM_ALBUMS, seed))]
+        rng = random.Random(seed)
+        queries = rng.sample(albums, NUM_QUERIES)
+        visited = {album.name for album in rng.sample(albums, NUM_VISITED)}
+        for name, weights in WEIGHTS:
+            scorer = AlbumScorer(albums, weights)
+            index, matrix = DescriptorIndex(albums, scorer), DescriptorMatrix(albums, scorer)
+            different = 0
+            for visited_names in (set(), visited):
+                different += sum(index.recommend(album, K, visited_names) != matrix.recommend(album, K, visited_names)
+                                 for album in queries)
+                different += sum(expected != actual for expected, actual in
+                                 zip(index.recommend_many(queries, K, visited_names),
+                                     matrix.recommend_many(queries, K, visited_names)))
+            print(f'{seed:>6} {name:>17} {4 * NUM_QUERIES:>8} {different:>10}')
+            total_different += different
+    assert total_different == 0, 'the backends returned different recommendations'
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'albums_data', 'benchmarks.synthetic', 'descriptor_index', 'descriptor_matrix',
+                          'scoring'],
+        'allowed-io': ['run_benchmark'],
+        'max-line-length': 120
+    })
+
+    run_benchmark()
@@ -0,0 +1,245 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Click Path Benchmark)
+
+Description
+===============================
+
+This Python module times every step of the app's click path on synthetic catalogs of 5,000 to 500,000 albums with a
+deep genre taxonomy, and reports the results in JSON, so that the results of two commits can be compared. Run it from
+the root of the project with:
+
+    python -m benchmarks.click_path --output results.json
+    python -m benchmarks.click_path --sizes 5000 50000 --baseline results.json
+
+The catalogs are generated by benchmarks/synthetic.py into a temporary directory, and the loaders are pointed at them
+for the duration of the benchmark. The snapshot and the neighbour table are ignored, since they are built from the real
+datasets, so every step runs the same code a server without them would.
+
+The loading steps (create_albums, create_genres, and create_data with no shared catalog loaded yet) are run
+COLD_REPEATS times. Every other step is run on HOT_REPEATS random albums or genres of the loaded catalog, with the same
+seed for every run. For every step, the report gives the 50th, 90th and 99th percentile, mean and maximum latency in
+milliseconds, measured without tracemalloc, and the peak memory allocated by a single call in megabytes, measured
+separately with tracemalloc on at most MEMORY_REPEATS of the calls.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+from unittest import mock
+
+import albums_data
+import catalog
+import genres_data
+from main import create_data
+from plot_genre_tree import plot_default_genre_tree, plot_genre_tree
+from plot_recommendation_tree import ALBUM_TREE_DEPTH, ALBUM_TREE_FAN_OUT, ALBUM_TREE_NODE_BUDGET, \
+    ALBUM_TREE_TIME_BUDGET, expand_album_recommendation_tree, generate_album_recommendation_tree, \
+    get_albums_by_matches, plot_album_recommendation_tree, plot_genre_recommendation_tree
+from benchmarks.search import percentile
+from benchmarks.synthetic import write_albums_csv, write_genres_csv
+
+SIZES = [5000, 50000, 500000]
+# The number of main genres, subgenres per genre and depth of the synthetic taxonomy: 27,325 genres over 7 levels.
+TAXONOMY = (25, 3, 6)
+COLD_REPEATS = 3
+HOT_REPEATS = 100
+MEMORY_REPEATS = 10
+SEED = 111
+
+
+def time_calls(calls: list[Callable[[], Any]]) -> list[float]:
+    """Return the time taken by each of calls, in milliseconds. Garbage is collected once before the first call, so
+    the times include the collections triggered by the calls themselves but not those left over from earlier steps.
+    """
+    latencies = []
+    gc.collect()
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def peak_memory(calls: list[Callable[[], Any]]) -> float:
+    """Return the largest number of megabytes allocated at once during a single one of calls, on top of what was
+    allocated before it started.
+    """
+    peak = 0
+    for call in calls:
+        gc.collect()
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        call()
+        _, call_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = max(peak, call_peak - start)
+    return peak / 2 ** 20
+
+
+def summarize(num_albums: int, step: str, latencies: list[float], memory: float) -> dict[str, Any]:
+    """Return the JSON record of the given step, run on a catalog of num_albums albums.
+    """
+    return {'albums': num_albums, 'step': step, 'repeats': len(latencies),
+            'p50_ms': round(percentile(latencies, 0.5), 4), 'p90_ms': round(percentile(latencies, 0.9), 4),
+            'p99_ms': round(percentile(latencies, 0.99), 4), 'mean_ms': round(statistics.mean(latencies), 4),
+            'max_ms': round(max(latencies), 4), 'peak_memory_mb': round(memory, 3)}
+
+
+def cold_load() -> None:
+    """Drop the shared catalog and load it again through create_data.
+    """
+    catalog._catalog = None
+    create_data()
+
+
+def click_path_steps(rng: random.Random) -> list[tuple[str, list[Callable[[], Any]]]]:
+    """Return the name and calls of every step of the click path that runs on the loaded shared catalog, with inputs
+    drawn from rng.
+    """
+    shared = catalog.get_catalog()
+    albums = rng.choices(shared.albums, k=HOT_REPEATS)
+    genres = rng.choices(shared.genres, k=HOT_REPEATS)
+    genres_with_albums = rng.choices(shared.genres_with_albums, k=HOT_REPEATS)
+    queries = [album.name.split()[0] + ' ' + album.artist[:4] for album in albums]
+    return [
+        ('search_albums', [lambda q=query: shared.search_albums(q) for query in queries]),
+        ('get_albums_by_matches', [lambda a=album: get_albums_by_matches(a, shared.albums, ALBUM_TREE_FAN_OUT, set(),
+                                                                         shared.recommender) for album in albums]),
+        ('generate_album_recommendation_tree',
+         [lambda a=album: generate_album_recommendation_tree(a, shared.albums, ALBUM_TREE_FAN_OUT, ALBUM_TREE_DEPTH,
+                                                             set(), shared.recommender, ALBUM_TREE_NODE_BUDGET,
+                                                             ALBUM_TREE_TIME_BUDGET) for album in albums]),
+        ('plot_default_genre_tree', [plot_default_genre_tree] * HOT_REPEATS),
+        ('plot_genre_tree', [lambda g=genre: plot_genre_tree(g) for genre in genres]),
+        ('plot_genre_recommendation_tree', [lambda g=genre: plot_genre_recommendation_tree(g)
+                                            for genre in genres_with_albums]),
+        ('plot_album_recommendation_tree', [lambda a=album: plot_album_recommendation_tree(a, set())
+                                            for album in albums]),
+        ('expand_album_recommendation_tree',
+         [lambda a=album: expand_album_recommendation_tree(0, {a.name}, {'parents': [-1], 'album_ids': [a.album_id],
+                                                                         'x': [0.0], 'y': [0.0]})
+          for album in albums])
+    ]
+
+
+def benchmark_size(num_albums: int, directory: str) -> list[dict[str, Any]]:
+    """Return the JSON records of every step of the click path, run on a synthetic catalog of num_albums albums whose
+    files are written to directory.
+    """
+    albums_path = os.path.join(directory, f'albums_{num_albums}.csv')
+    genres_path = os.path.join(directory, 'genres.csv')
+    write_albums_csv(albums_path, num_albums, SEED)
+    if not os.path.exists(genres_path):
+        write_genres_csv(genres_path, *TAXONOMY)
+
+    with mock.patch.object(albums_data, 'ALBUMS_FILE', albums_path), \
+            mock.patch.object(genres_data, 'GENRES_FILE', genres_path), \
+            mock.patch.object(catalog, 'ALBUMS_FILE', albums_path), \
+            mock.patch.object(catalog, 'load_snapshot', lambda: None), \
+            mock.patch.object(catalog, 'load_neighbour_table', lambda fallback: None), \
+            mock.patch.object(catalog, '_catalog', None):
+        steps = [('create_albums', [albums_data.create_albums] * COLD_REPEATS),
+                 ('create_genres', [genres_data.create_genres] * COLD_REPEATS),
+                 ('create_data', [cold_load] * COLD_REPEATS)]
+        records = [summarize(num_albums, step, time_calls(calls), peak_memory(calls[:MEMORY_REPEATS]))
+                   for step, calls in steps]
+        # create_data was last run by peak_memory, so the shared catalog is loaded.
+        for step, calls in click_path_steps(random.Random(SEED)):
+            records.append(summarize(num_albums, step, time_calls(calls), peak_memory(calls[:MEMORY_REPEATS])))
+    return records
+
+
+def current_commit() -> Optional[str]:
+    """Return the hash of the commit checked out in the project's repository, or None if it cannot be found.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(albums_data.DATASETS_DIR)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(sizes: list[int], output_path: Optional[str] = None) -> dict[str, Any]:
+    """Run the click path benchmark on a synthetic catalog of every size in sizes, and return the report. The report is
+    written to output_path as JSON, or printed if output_path is None.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        results = []
+        for size in sizes:
+            results.extend(benchmark_size(size, directory))
+
+    num_roots, branching, depth = TAXONOMY
+    report = {'meta': {'commit': current_commit(), 'python': platform.python_version(),
+                       'platform': platform.platform(), 'timestamp': datetime.now(timezone.utc).isoformat(),
+                       'recommender_backend': os.environ.get('RECOMMENDER_BACKEND', 'index'),
+                       'taxonomy': {'num_roots': num_roots, 'branching': branching, 'depth': depth},
+                       'cold_repeats': COLD_REPEATS, 'hot_repeats': HOT_REPEATS, 'seed': SEED},
+              'results': results}
+    if output_path is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(output_path, 'w', encoding='utf8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def compare_reports(baseline: dict[str, Any], report: dict[str, Any]) -> None:
+    """Print the ratio of the p50 and p99 latencies and peak memory of every step in report to those of the same step
+    and catalog size in baseline. Ratios above 1 are regressions.
+    """
+    old_results = {(result['albums'], result['step']): result for result in baseline['results']}
+    print(f'baseline {baseline["meta"]["commit"]}, current {report["meta"]["commit"]}')
+    print(f'{"albums":>8} {"step":>34} {"p50 ms":>9} {"x p50":>6} {"p99 ms":>9} {"x p99":>6} {"x memory":>8}')
+    for result in report['results']:
+        old = old_results.get((result['albums'], result['step']))
+        if old is None:
+            continue
+        ratios = [result[key] / old[key] if old[key] else float('nan')
+                  for key in ('p50_ms', 'p99_ms', 'peak_memory_mb')]
+        print(f'{result["albums"]:>8} {result["step"]:>34} {result["p50_ms"]:>9.3f} {ratios[0]:>6.2f} '
+              f'{result["p99_ms"]:>9.3f} {ratios[1]:>6.2f} {ratios[2]:>8.2f}')
+
+
+def main() -> None:
+    """Run the benchmark with the sizes and output given on the command line, comparing it with a baseline report if
+    one is given.
+    """
+    parser = argparse.ArgumentParser(description='Time every step of the click path on synthetic catalogs.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='the numbers of albums to benchmark')
+    parser.add_argument('--output', help='the file to write the JSON report to, instead of printing it')
+    parser.add_argument('--baseline', help='a JSON report of an earlier run to compare the results with')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.output)
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf8') as f:
+            compare_reports(json.load(f), report)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['argparse', 'gc', 'json', 'os', 'platform', 'random', 'statistics', 'subprocess', 'tempfile',
+                          'time', 'tracemalloc', 'datetime', 'unittest', 'albums_data', 'catalog', 'genres_data',
+                          'main', 'plot_genre_tree', 'plot_recommendation_tree', 'benchmarks.search',
+                          'benchmarks.synthetic'],
+        'allowed-io': ['run_benchmark', 'compare_reports', 'main'],
+        'disable': ['protected-access'],
+        'max-line-length': 120
+    })
+
+    main()
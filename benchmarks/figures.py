@@ -0,0 +1,172 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Figure Benchmark)
+
+Description
+===============================
+
+This Python module compares the cost of building the app's figures from validated templates, as tree_renderer.py and
+main.blank_fig do, with building them the way the app built them before, with an igraph layout and a go.Figure updated
+by a chain of update_* calls on every call. Run it from the root of the project with:
+
+    python -m benchmarks.figures
+
+For every tree shape in TREES and for the blank figure, the report gives the server CPU time taken to build the figure
+and serialize it the way Dash does, in milliseconds, and the size of the serialized figure sent to the browser, in
+bytes, before and after gzip compression.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import gzip
+import time
+from typing import Any, Callable, Sequence
+
+import plotly.graph_objects as go
+from igraph import EdgeSeq, Graph
+from plotly.io.json import to_json_plotly
+
+from main import blank_fig
+from tree_renderer import improve_text_position, tree_figure
+
+# The name of every tree shape, and its number of children per node and depth.
+TREES = [('genre tree', 30, 1), ('album tree', 3, 2), ('wide album tree', 6, 3)]
+REPEATS = 200
+# The compression level flask-compress uses for the app's responses by default.
+GZIP_LEVEL = 6
+
+
+def legacy_tree_figure(parents: Sequence[int], labels: list[str], name: str = '') -> go.Figure:
+    """The tree plotting code used before figures were built from templates, kept for comparison. The body is that of
+    plot_album_recommendation_tree before the change, with the tree given by parents and labels instead of being
+    generated, so it lays the tree out with igraph and builds the figure with the same update_* calls. Like it, the
+    figure has no customdata.
+
+    Preconditions:
+        - len(set(labels)) == len(labels)
+    """
+    G = Graph(directed=True)
+    for vertex in labels:
+        G.add_vertex(vertex)
+    for child, parent in enumerate(parents):
+        if parent != -1:
+            G.add_edge(labels[parent], labels[child])
+    lay = G.layout('rt')
+    v_label = G.vs['name']
+    position = {k: lay[k] for k in range(len(lay))}
+    Y = [lay[k][1] for k in range(len(lay))]
+    M = max(Y)
+    es = EdgeSeq(G)
+    E = [e.tuple for e in G.es]
+    L = len(position)
+    Xn = [position[k][0] for k in range(L)]
+    Yn = [2 * M - position[k][1] for k in range(L)]
+    Xe = []
+    Ye = []
+    for edge in E:
+        Xe += [position[edge[0]][0], position[edge[1]][0], None]
+        Ye += [2 * M - position[edge[0]][1], 2 * M - position[edge[1]][1], None]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=Xe,
+                             y=Ye,
+                             mode='lines',
+                             line=dict(color='rgb(210,210,210)', width=1),
+                             hoverinfo='none'
+                             ))
+    fig.add_trace(go.Scatter(x=Xn,
+                             y=Yn,
+                             text=v_label,
+                             mode='markers+text',
+                             name=name,
+                             marker=dict(symbol='circle-dot',
+                                         size=30,
+                                         color='hotpink',
+                                         line=dict(color='rgb(50,50,50)', width=1)
+                                         ),
+                             hoverinfo='text',
+                             opacity=0.8
+                             ))
+    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+    fig.for_each_trace(lambda t: t.update(textfont_color='white', opacity=1))
+    fig.update_traces(textposition=improve_text_position(Xn))
+    fig.update_layout(showlegend=False)
+    fig.update_xaxes(visible=False)
+    fig.update_yaxes(visible=False)
+
+    return fig
+
+
+def legacy_blank_fig() -> go.Figure:
+    """The blank figure function used before the blank figure was built once, kept for comparison. The body is that of
+    main.blank_fig before the change.
+    """
+    fig = go.Figure(go.Scatter(x=[], y=[]))
+    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+    fig.update_layout(template=None)
+    fig.update_xaxes(showgrid=False, showticklabels=False, zeroline=False)
+    fig.update_yaxes(showgrid=False, showticklabels=False, zeroline=False)
+    return fig
+
+
+def uniform_tree(fan_out: int, depth: int) -> list[int]:
+    """Return the parent indices of the tree where every node above depth has fan_out children, in level order.
+
+    >>> uniform_tree(2, 2)
+    [-1, 0, 0, 1, 1, 2, 2]
+    """
+    parents = [-1]
+    level = [0]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(fan_out):
+                next_level.append(len(parents))
+                parents.append(parent)
+        level = next_level
+    return parents
+
+
+def measure(create: Callable[[], Any]) -> tuple[float, int, int]:
+    """Return the average CPU time taken to call create and serialize the figure it returns, in milliseconds, and the
+    size of the serialized figure in bytes, before and after gzip compression.
+    """
+    start = time.process_time()
+    for _ in range(REPEATS):
+        payload = to_json_plotly(create())
+    cpu_ms = (time.process_time() - start) / REPEATS * 1000
+    data = payload.encode('utf8')
+    return cpu_ms, len(data), len(gzip.compress(data, GZIP_LEVEL))
+
+
+def run_benchmark() -> None:
+    """Print the CPU time and serialized size of every figure in TREES and of the blank figure, built both ways.
+    """
+    print(f'{"figure":>16} {"nodes":>6} {"builder":>9} {"cpu ms":>8} {"bytes":>8} {"gzipped":>8}')
+    cases = []
+    for name, fan_out, depth in TREES:
+        parents = uniform_tree(fan_out, depth)
+        labels = [f'Album {i} - Artist {i}' for i in range(len(parents))]
+        customdata = list(range(len(parents)))
+        cases.append((name, len(parents), lambda p=parents, l=labels: legacy_tree_figure(p, l, 'bla'),
+                      lambda p=parents, l=labels, c=customdata: tree_figure(p, l, c, 'bla')))
+    cases.append(('blank', 0, legacy_blank_fig, blank_fig))
+
+    for name, num_nodes, legacy, current in cases:
+        for builder, create in (('go.Figure', legacy), ('template', current)):
+            cpu_ms, size, gzipped = measure(create)
+            print(f'{name:>16} {num_nodes:>6} {builder:>9} {cpu_ms:>8.3f} {size:>8} {gzipped:>8}')
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['gzip', 'time', 'plotly.graph_objects', 'igraph', 'plotly.io.json', 'main',
+                          'tree_renderer'],
+        'allowed-io': ['run_benchmark'],
+        'disable': ['invalid-name', 'too-many-locals', 'unnecessary-indexing', 'unused-variable'],
+        'max-line-length': 120
+    })
+
+    run_benchmark()
@@ -0,0 +1,106 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Memory Benchmark)
+
+Description
+===============================
+
+This Python module compares the memory used by the compact Album and Genre classes with the memory used by the
+dict-backed classes they replaced, on synthetic catalogs of 5,000 and 500,000 albums. Run it from the root of the
+project with:
+
+    python -m benchmarks.memory
+
+Both representations are built row by row from the same generated rows, parsing each row the way create_albums does,
+and the memory still allocated once every row has been parsed is reported in megabytes.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import gc
+import tracemalloc
+from typing import Any, Callable, Iterator
+
+from albums_data import Album
+from genres_data import Genre
+from benchmarks.synthetic import generate_album_rows, generate_genre_rows
+
+SIZES = [5000, 500000]
+
+
+class LegacyAlbum:
+    """The dict-backed album class used before albums were made compact, kept for comparison.
+    """
+
+    def __init__(self, name: str, artist: str, genres: list[str], rank: int, release: str,
+                 descriptors: list[str], album_id: int = -1) -> None:
+        self.name = name
+        self.artist = artist
+        self.genres = genres
+        self.rank = rank
+        self.release = release
+        self.descriptors = descriptors
+        self.album_id = album_id
+
+
+class LegacyGenre:
+    """The dict-backed genre class used before genres were made compact, kept for comparison.
+    """
+
+    def __init__(self, name: str, parent_genre: Any, genre_id: int = -1) -> None:
+        self.name = name
+        self.parent_genre = parent_genre
+        self.genre_id = genre_id
+
+
+def parse_albums(rows: Iterator[list[str]], album_class: Callable) -> list:
+    """Return the albums in rows, created with album_class, parsing each row the same way create_albums does.
+    """
+    albums = []
+    for row in rows:
+        if row[7] != 'NA':
+            genres = row[6].split(', ') + row[7].split(', ')
+        else:
+            genres = row[6].split(', ')
+        albums.append(album_class(row[2], row[3], genres, int(row[1]), row[4], row[8].split(', '), len(albums)))
+    return albums
+
+
+def parse_genres(rows: Iterator[list[str]], genre_class: Callable) -> list:
+    """Return the genres in rows, created with genre_class, parsing each row the same way create_genres does.
+    """
+    return [genre_class(row[0], None if row[1] == 'NA' else row[1], i) for i, row in enumerate(rows)]
+
+
+def measure(build: Callable[[], Any]) -> float:
+    """Return the number of megabytes still allocated after calling build, while its return value is alive.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current / 2 ** 20
+
+
+def run_benchmark() -> None:
+    """Print the memory used by both representations for every catalog size in SIZES.
+    """
+    print(f'{"albums":>8} {"legacy MB":>10} {"compact MB":>11} {"ratio":>6}')
+    for size in SIZES:
+        legacy = measure(lambda: (parse_albums(generate_album_rows(size), LegacyAlbum),
+                                  parse_genres(generate_genre_rows(), LegacyGenre)))
+        compact = measure(lambda: (parse_albums(generate_album_rows(size), Album),
+                                   parse_genres(generate_genre_rows(), Genre)))
+        print(f'{size:>8} {legacy:>10.1f} {compact:>11.1f} {legacy / compact:>6.2f}')
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['gc', 'tracemalloc', 'albums_data', 'genres_data', 'benchmarks.synthetic'],
+        'allowed-io': ['run_benchmark'],
+        'disable': ['too-many-arguments', 'cell-var-from-loop'],
+        'max-line-length': 120
+    })
+
+    run_benchmark()
@@ -0,0 +1,97 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Prefetch Benchmark)
+
+Description
+===============================
+
+This Python module runs spotify_prefetch against a rate-limited SpotifyStubServer, and checks that the 429 responses
+of the stub reach the shared rate limiter with their Retry-After header, so that every worker waits for the time the
+stub asked for. Run it from the root of the project with:
+
+    python -m benchmarks.prefetch
+
+The prefetch client is built the same way as by spotify_prefetch.create_prefetch_client, but its rate limiter sends
+requests faster than the stub answers them, so the stub answers some of them with 429 responses. The report gives the
+number of searches the stub answered and rate limited, every pause of the rate limiter in seconds, the number of albums
+resolved and failed, and the time taken in seconds. An AssertionError is raised if the rate limiter never paused, or if
+it paused for a different time than the stub's Retry-After header.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import time
+
+from albums_data import parse_album_row
+from benchmarks.synthetic import generate_album_rows
+from spotify_prefetch import RateLimitedClient, RateLimiter, create_spotify_client, prefetch_spotify_ids
+from spotify_resolver import SpotifyResolver
+from spotify_stub import SpotifyStubServer
+
+NUM_ALBUMS = 100
+STUB_REQUESTS_PER_SECOND = 20
+STUB_RETRY_AFTER = 1
+CLIENT_REQUESTS_PER_SECOND = 50.0
+NUM_WORKERS = 8
+
+
+class RecordingRateLimiter(RateLimiter):
+    """A rate limiter that records every pause.
+
+    Instance Attributes:
+        - pauses: The number of seconds of every pause, in the order they were asked for
+    """
+    pauses: list[float]
+
+    def __init__(self, rate: float, burst: float = 1.0) -> None:
+        """Initialize a new recording rate limiter allowing rate requests per second, in bursts of at most burst
+        requests.
+        """
+        super().__init__(rate, burst)
+        self.pauses = []
+
+    def pause(self, seconds: float) -> None:
+        """Record the pause and stop any request from being sent for the next seconds seconds.
+        """
+        self.pauses.append(seconds)
+        super().pause(seconds)
+
+
+def run_benchmark() -> None:
+    """Prefetch NUM_ALBUMS synthetic albums from a rate-limited stub server, print the report, and check that the rate
+    limiter paused for the stub's Retry-After time.
+    """
+    albums = [parse_album_row(row, i) for i, row in enumerate(generate_album_rows(NUM_ALBUMS))]
+    server = SpotifyStubServer(((album.name, album.artist) for album in albums),
+                               max_requests_per_second=STUB_REQUESTS_PER_SECOND, retry_after=STUB_RETRY_AFTER)
+    server.start()
+    limiter = RecordingRateLimiter(CLIENT_REQUESTS_PER_SECOND)
+    resolver = SpotifyResolver(RateLimitedClient(create_spotify_client(server.prefix), limiter), store_path=None)
+    try:
+        start = time.perf_counter()
+        spotify_ids = prefetch_spotify_ids(albums, resolver, NUM_WORKERS, NUM_ALBUMS)
+        seconds = time.perf_counter() - start
+    finally:
+        resolver.close()
+        server.stop()
+
+    print(f'stub answered {server.requests_served} searches and rate limited {server.requests_limited}')
+    print(f'rate limiter paused {len(limiter.pauses)} times: {limiter.pauses}')
+    print(f'{len(spotify_ids)} of {NUM_ALBUMS} albums resolved, {NUM_ALBUMS - len(spotify_ids)} failed, '
+          f'in {seconds:.2f} seconds')
+    assert server.requests_limited > 0, 'the stub never rate limited the client'
+    assert limiter.pauses, 'the 429 responses of the stub never reached the rate limiter'
+    assert all(pause == STUB_RETRY_AFTER for pause in limiter.pauses), 'the Retry-After header was not used'
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['time', 'albums_data', 'benchmarks.synthetic', 'spotify_prefetch', 'spotify_resolver',
+                          'spotify_stub'],
+        'allowed-io': ['run_benchmark'],
+        'max-line-length': 120
+    })
+
+    run_benchmark()
@@ -0,0 +1,76 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Recall Benchmark)
+
+Description
+===============================
+
+This Python module measures the trade-off between recall and latency of the approximate MinHashIndex backend, against
+the exact DescriptorIndex backend, on synthetic catalogs of 5,000 and 50,000 albums. Run it from the root of the
+project with:
+
+    python -m benchmarks.recall
+
+For every catalog size and every MinHash setting in SETTINGS, the same random albums are recommended for by both
+backends. The report gives the recall@k of the approximate recommendations (the share of the exact top k
+recommendations they contain), the average number of candidates scored per query, and the average latency per query of
+both backends in milliseconds.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import random
+import time
+
+from albums_data import Album, parse_album_row
+from benchmarks.synthetic import generate_album_rows
+from descriptor_index import DescriptorIndex
+from minhash_index import MinHashIndex
+from scoring import AlbumScorer
+
+SIZES = [5000, 50000]
+SETTINGS = [(16, 4), (32, 3), (32, 2), (64, 2)]
+NUM_QUERIES = 200
+K = 10
+
+
+def time_queries(recommender: DescriptorIndex, queries: list[Album]) -> tuple[list[list[Album]], float]:
+    """Return the top K recommendations of recommender for every album in queries, and the average time taken per query
+    in milliseconds.
+    """
+    start = time.perf_counter()
+    results = [recommender.recommend(album, K, set()) for album in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run_benchmark() -> None:
+    """Print the recall@K and latency of every MinHash setting in SETTINGS, for every catalog size in SIZES.
+    """
+    print(f'{"albums":>8} {"bands":>6} {"rows":>5} {f"recall@{K}":>10} {"candidates":>11} {"exact ms":>9} '
+          f'{"approx ms":>10} {"build s":>8}')
+    for size in SIZES:
+        albums = [parse_album_row(row, i) for i, row in enumerate(generate_album_rows(size))]
+        scorer = AlbumScorer(albums)
+        queries = random.Random(111).sample(albums, NUM_QUERIES)
+        exact_results, exact_ms = time_queries(DescriptorIndex(albums, scorer), queries)
+
+        for bands, rows in SETTINGS:
+            start = time.perf_counter()
+            index = MinHashIndex(albums, scorer, bands, rows)
+            build_seconds = time.perf_counter() - start
+            approx_results, approx_ms = time_queries(index, queries)
+            recall = sum(len(set(map(id, exact)) & set(map(id, approx))) / len(exact)
+                         for exact, approx in zip(exact_results, approx_results)) / NUM_QUERIES
+            candidates = sum(len(index.candidates(album)) for album in queries) / NUM_QUERIES
+            print(f'{size:>8} {bands:>6} {rows:>5} {recall:>10.3f} {candidates:>11.0f} {exact_ms:>9.2f} '
+                  f'{approx_ms:>10.2f} {build_seconds:>8.2f}')
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'time', 'albums_data', 'benchmarks.synthetic', 'descriptor_index', 'minhash_index',
+                          'scoring'],
+        'allowed-io': ['run_benchmark'],
+        'max-line-length': 120
+    })
+
+    run_benchmark()
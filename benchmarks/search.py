@@ -0,0 +1,101 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Search Benchmark)
+
+Description
+===============================
+
+This Python module measures the latency of the SearchIndex used by the album dropdown, on synthetic catalogs of up to
+500,000 albums. Run it from the root of the project with:
+
+    python -m benchmarks.search
+
+The synthetic albums are named with random words taken from the names and artists of the albums in rym_clean1.csv, so
+that common and rare words, and accented letters, are about as frequent as in real names. The queries are the first
+words of random album names, typed in full, partly typed, with a typo, or without accents. The report gives the time
+taken to build each index in seconds, and the median, 95th percentile and 99th percentile latency of a search in
+milliseconds, along with the share of queries whose results include the album they were made from. Queries of one
+common word match more albums than are returned, so this share is below 1 even for an exact search.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import random
+import statistics
+import time
+
+from albums_data import ALBUMS_FILE, stream_albums
+from search_index import SearchIndex, normalize
+
+SIZES = [5000, 50000, 500000]
+NUM_QUERIES = 2000
+
+
+def generate_names(num_names: int, words: list[str], rng: random.Random) -> list[str]:
+    """Return num_names album names followed by an artist name, made of random words from words.
+    """
+    artists = [' '.join(rng.choices(words, k=rng.randint(1, 3))) for _ in range(max(1, num_names // 3))]
+    return [' '.join(rng.choices(words, k=rng.randint(1, 4))) + ' ' + rng.choice(artists) for _ in range(num_names)]
+
+
+def make_query(name: str, rng: random.Random) -> str:
+    """Return a query a user looking for the album with the given name might type.
+    """
+    query = ' '.join(name.split()[:rng.randint(1, 2)])
+    kind = rng.randrange(4)
+    if kind == 1:
+        query = query[:max(3, len(query) * 2 // 3)]
+    elif kind == 2 and len(query) > 4:
+        i = rng.randrange(1, len(query) - 1)
+        query = query[:i] + query[i + 1] + query[i] + query[i + 2:]
+    elif kind == 3:
+        query = ' '.join(normalize(query))
+    return query
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Return the value below which the given share of values fall.
+
+    >>> percentile([1.0, 2.0, 3.0, 4.0], 0.5)
+    2.0
+    """
+    return sorted(values)[max(0, round(share * len(values)) - 1)]
+
+
+def run_benchmark() -> None:
+    """Print the build time, search latency and hit rate of a SearchIndex for every catalog size in SIZES.
+    """
+    words = sorted({word for album in stream_albums(ALBUMS_FILE)
+                    for word in (album.name + ' ' + album.artist).split()})
+    print(f'{"albums":>8} {"build s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"mean ms":>8} {"found":>6}')
+    for size in SIZES:
+        rng = random.Random(111)
+        names = generate_names(size, words, rng)
+        start = time.perf_counter()
+        index = SearchIndex(names)
+        build_seconds = time.perf_counter() - start
+
+        targets = [rng.randrange(size) for _ in range(NUM_QUERIES)]
+        queries = [make_query(names[target], rng) for target in targets]
+        latencies = []
+        found = 0
+        for target, query in zip(targets, queries):
+            start = time.perf_counter()
+            results = index.search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found += target in results
+        print(f'{size:>8} {build_seconds:>8.2f} {percentile(latencies, 0.5):>8.3f} '
+              f'{percentile(latencies, 0.95):>8.3f} {percentile(latencies, 0.99):>8.3f} '
+              f'{statistics.mean(latencies):>8.3f} {found / NUM_QUERIES:>6.2f}')
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'statistics', 'time', 'albums_data', 'search_index'],
+        'allowed-io': ['run_benchmark'],
+        'max-line-length': 120
+    })
+
+    run_benchmark()
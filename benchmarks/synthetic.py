@@ -0,0 +1,113 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Synthetic Catalogs)
+
+Description
+===============================
+
+This Python module contains the functions used to generate synthetic catalogs for the benchmarks. The generated files
+have the same columns as rym_clean1.csv and genres_dataset.csv, and a similar shape: genres and descriptors are drawn
+from fixed vocabularies with a few very common ones and a long tail of rare ones, and genres form a taxonomy with a
+configurable number of main genres, subgenres per genre, and depth.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import csv
+import random
+from datetime import date
+from itertools import accumulate
+from typing import Iterator
+
+NUM_GENRES = 1800
+NUM_DESCRIPTORS = 200
+
+
+def _zipf_cum_weights(n: int) -> list[float]:
+    """Return the cumulative weights of n weights where the i-th weight is proportional to 1 / (i + 1).
+    """
+    return list(accumulate(1 / (i + 1) for i in range(n)))
+
+
+def generate_album_rows(num_albums: int, seed: int = 111) -> Iterator[list[str]]:
+    """Yield num_albums rows in the same format as the rows of rym_clean1.csv (without the header row), sorted from
+    most to least popular. The same seed always generates the same rows.
+
+    Preconditions:
+        - num_albums >= 0
+    """
+    rng = random.Random(seed)
+    genres = [f'Genre {i}' for i in range(NUM_GENRES)]
+    genre_weights = _zipf_cum_weights(NUM_GENRES)
+    descriptors = [f'descriptor{i}' for i in range(NUM_DESCRIPTORS)]
+    descriptor_weights = _zipf_cum_weights(NUM_DESCRIPTORS)
+    num_artists = max(1, num_albums // 3)
+    first_day = date(1950, 1, 1).toordinal()
+    last_day = date(2023, 1, 1).toordinal()
+
+    rating_count = 80000
+    for i in range(num_albums):
+        primary = set(rng.choices(genres, cum_weights=genre_weights, k=rng.randint(1, 3)))
+        secondary = set(rng.choices(genres, cum_weights=genre_weights, k=rng.randint(0, 3))) - primary
+        album_descriptors = set(rng.choices(descriptors, cum_weights=descriptor_weights, k=rng.randint(5, 12)))
+        rating_count = max(50, rating_count - rng.randint(0, 2 * 80000 // max(num_albums, 1)))
+        yield [str(i + 1), str(i + 1), f'Album {i}', f'Artist {rng.randrange(num_artists)}',
+               date.fromordinal(rng.randint(first_day, last_day)).isoformat(), 'album', ', '.join(sorted(primary)),
+               ', '.join(sorted(secondary)) or 'NA', ', '.join(sorted(album_descriptors)),
+               f'{rng.uniform(3.0, 4.4):.2f}', str(rating_count), str(max(1, rating_count // 50))]
+
+
+def generate_genre_rows(num_roots: int = 25, branching: int = 4, depth: int = 4) -> Iterator[list[str]]:
+    """Yield the rows of a genre taxonomy in the same format as the rows of genres_dataset.csv (without the header
+    row). The taxonomy has num_roots main genres, and every genre above the given depth has branching subgenres. Genres
+    are named so that the first NUM_GENRES genres match the genres used by generate_album_rows.
+
+    Preconditions:
+        - num_roots >= 0
+        - branching >= 0
+        - depth >= 0
+    """
+    count = 0
+    level = []
+    for _ in range(num_roots):
+        level.append(f'Genre {count}')
+        yield [f'Genre {count}', 'NA']
+        count += 1
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(branching):
+                next_level.append(f'Genre {count}')
+                yield [f'Genre {count}', parent]
+                count += 1
+        level = next_level
+
+
+def write_albums_csv(path: str, num_albums: int, seed: int = 111) -> None:
+    """Write a synthetic albums CSV file with num_albums albums to path.
+    """
+    with open(path, 'w', encoding='utf8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['', 'position', 'release_name', 'artist_name', 'release_date', 'release_type',
+                         'primary_genres', 'secondary_genres', 'descriptors', 'avg_rating', 'rating_count',
+                         'review_count'])
+        writer.writerows(generate_album_rows(num_albums, seed))
+
+
+def write_genres_csv(path: str, num_roots: int = 25, branching: int = 4, depth: int = 4) -> None:
+    """Write a synthetic genres CSV file to path, with the taxonomy described in generate_genre_rows.
+    """
+    with open(path, 'w', encoding='utf8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Genre', 'Parent Genre'])
+        writer.writerows(generate_genre_rows(num_roots, branching, depth))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['csv', 'random', 'datetime', 'itertools'],  # the names (strs) of imported modules
+        'allowed-io': ['write_albums_csv', 'write_genres_csv'],
+        'max-line-length': 120
+    })
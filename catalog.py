@@ -0,0 +1,246 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Catalog)
+
+Description
+===============================
+
+This Python module contains the Catalog class, which holds the albums and genres loaded from rym_clean1.csv and
+genres_dataset.csv. The catalog is loaded once per process and shared by every plot function and Dash callback, so the
+datasets are not re-parsed on every click. The catalog can be reloaded explicitly with reload_catalog. If an
+up-to-date snapshot of the datasets has been built by running snapshot.py, the catalog is loaded from the snapshot
+instead of the CSV files.
+
+The scoring backend used by the album recommendation algorithm is chosen with the RECOMMENDER_BACKEND environment
+variable: 'index' (the default) for a DescriptorIndex, 'matrix' for a DescriptorMatrix, or 'minhash' for the approximate
+MinHashIndex, whose number of bands and rows per band are set with the MINHASH_BANDS and MINHASH_ROWS environment
+variables. The last two require numpy and scipy. All backends score albums with the weights read from the
+RECOMMENDER_WEIGHTS environment variable (see scoring.py). If an up-to-date neighbour table has been built by running
+neighbour_table.py with the same weights, recommendations are read from it instead, using the backend only for the
+queries the table cannot answer.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import os
+import threading
+from typing import Optional
+
+from albums_data import ALBUMS_FILE, Album, load_albums
+from descriptor_index import DescriptorIndex
+from genres_data import Genre, GenreHierarchy, create_genres
+from neighbour_table import load_neighbour_table
+from recommender import Recommender
+from scoring import AlbumScorer, ScoreStatistics, weights_from_env
+from search_index import SEARCH_LIMIT, SearchIndex
+from snapshot import load_snapshot
+
+
+class Catalog:
+    """A class to represent the loaded album and genre datasets.
+
+    Albums and genres are identified by their ids, which are their positions in self.albums and self.genres.
+
+    Instance Attributes:
+        - albums: The list of all albums, sorted from most to least popular
+        - genres: The list of all genres
+        - genre_hierarchy: The hierarchy of self.genres
+        - genres_with_albums: The genres that have at least one album in self.albums, in the same order as self.genres
+        - album_ids_by_genre: A mapping from each genre name to the ids of the albums with that genre, sorted from most
+            to least popular. Genres without any albums are not in this mapping
+        - version: A number identifying this load of the catalog. Every reload produces a catalog with a higher version
+        - scorer: The descriptor weights and priors used to score album recommendations
+        - descriptor_index: An inverted index from descriptors to albums
+        - live_recommender: The scoring backend that scores albums against the whole catalog
+        - recommender: The scoring backend used by the album recommendation algorithm. This is a neighbour table backed
+            by self.live_recommender if one is available, and self.live_recommender otherwise
+        - album_search: A search index over the name and artist of every album in self.albums, in the same order
+        - genre_search: A search index over the name of every genre in self.genres_with_albums, in the same order
+
+    Representation Invariants:
+        - all(self.albums[i].album_id == i for i in range(len(self.albums)))
+        - all(self.genres[i].genre_id == i for i in range(len(self.genres)))
+        - all(genre in self.genres for genre in self.genres_with_albums)
+        - self.version > 0
+    """
+    albums: list[Album]
+    genres: list[Genre]
+    genre_hierarchy: GenreHierarchy
+    genres_with_albums: list[Genre]
+    album_ids_by_genre: dict[str, list[int]]
+    version: int
+    scorer: AlbumScorer
+    descriptor_index: DescriptorIndex
+    live_recommender: Recommender
+    recommender: Recommender
+    album_search: SearchIndex
+    genre_search: SearchIndex
+
+    # Private Instance Attributes:
+    #   - _album_ids: A mapping from the name and artist of each album to the id of the first album with that name and
+    #       artist
+    #   - _genre_ids: A mapping from the name of each genre to its id
+    _album_ids: dict[tuple[str, str], int]
+    _genre_ids: dict[str, int]
+
+    def __init__(self, albums: list[Album], genres: list[Genre], version: int,
+                 statistics: Optional[ScoreStatistics] = None) -> None:
+        """Initialize a new catalog from the given albums and genres. statistics holds the score statistics of the
+        albums if they were collected while the albums were loaded, or is None if they have not been collected yet.
+        """
+        self.albums = albums
+        self.genres = genres
+        self.genre_hierarchy = GenreHierarchy(genres)
+        self.version = version
+        self._album_ids = {}
+        for album in albums:
+            self._album_ids.setdefault((album.name, album.artist), album.album_id)
+        self._genre_ids = {genre.name: genre.genre_id for genre in genres}
+
+        self.album_ids_by_genre = {}
+        for album in albums:
+            for genre_name in set(album.genres):
+                self.album_ids_by_genre.setdefault(genre_name, []).append(album.album_id)
+        self.genres_with_albums = [genre for genre in genres if genre.name in self.album_ids_by_genre]
+        self.scorer = AlbumScorer(albums, weights_from_env(), statistics)
+        self.descriptor_index = DescriptorIndex(albums, self.scorer)
+        self.live_recommender = create_recommender(albums, self.descriptor_index)
+        self.recommender = load_neighbour_table(self.live_recommender) or self.live_recommender
+        self.album_search = SearchIndex(album.name + ' ' + album.artist for album in albums)
+        self.genre_search = SearchIndex(genre.name for genre in self.genres_with_albums)
+
+    def get_album(self, album_id: int) -> Optional[Album]:
+        """Return the album with the given id, or None if there is no such album.
+        """
+        if 0 <= album_id < len(self.albums):
+            return self.albums[album_id]
+        else:
+            return None
+
+    def get_genre(self, genre_id: int) -> Optional[Genre]:
+        """Return the genre with the given id, or None if there is no such genre.
+        """
+        if 0 <= genre_id < len(self.genres):
+            return self.genres[genre_id]
+        else:
+            return None
+
+    def get_albums_by_genre(self, genre_name: str, limit: Optional[int] = None) -> list[Album]:
+        """Return the albums with the given genre, sorted from most to least popular. If limit is not None, only the
+        limit most popular albums are returned.
+
+        Preconditions:
+            - limit is None or limit >= 0
+        """
+        album_ids = self.album_ids_by_genre.get(genre_name, [])[:limit]
+        return [self.albums[album_id] for album_id in album_ids]
+
+    def search_albums(self, query: str, limit: int = SEARCH_LIMIT) -> list[Album]:
+        """Return at most limit albums whose name and artist match query, from best to worst match (see
+        search_index.py). If query has no words, the limit most popular albums are returned.
+
+        Preconditions:
+            - limit >= 0
+        """
+        return [self.albums[album_id] for album_id in self.album_search.search(query, limit)]
+
+    def search_genres(self, query: str, limit: int = SEARCH_LIMIT) -> list[Genre]:
+        """Return at most limit genres with at least one album whose name matches query, from best to worst match
+        (see search_index.py). If query has no words, the first limit genres with albums are returned.
+
+        Preconditions:
+            - limit >= 0
+        """
+        return [self.genres_with_albums[position] for position in self.genre_search.search(query, limit)]
+
+    def find_album(self, name: str, artist: str) -> Optional[Album]:
+        """Return the most popular album with the given name and artist, or None if there is no such album.
+        """
+        album_id = self._album_ids.get((name, artist))
+        return None if album_id is None else self.albums[album_id]
+
+    def find_genre(self, name: str) -> Optional[Genre]:
+        """Return the genre with the given name, or None if there is no such genre.
+        """
+        genre_id = self._genre_ids.get(name)
+        return None if genre_id is None else self.genres[genre_id]
+
+
+def create_recommender(albums: list[Album], descriptor_index: DescriptorIndex) -> Recommender:
+    """Return the scoring backend selected by the RECOMMENDER_BACKEND environment variable for the given albums,
+    scored by descriptor_index.scorer.
+
+    Preconditions:
+        - descriptor_index.albums is albums
+    """
+    backend = os.getenv('RECOMMENDER_BACKEND', 'index')
+    if backend == 'index':
+        return descriptor_index
+    elif backend == 'matrix':
+        from descriptor_matrix import DescriptorMatrix
+        return DescriptorMatrix(albums, descriptor_index.scorer)
+    elif backend == 'minhash':
+        from minhash_index import MINHASH_BANDS, MINHASH_ROWS, MinHashIndex
+        return MinHashIndex(albums, descriptor_index.scorer, int(os.getenv('MINHASH_BANDS', str(MINHASH_BANDS))),
+                            int(os.getenv('MINHASH_ROWS', str(MINHASH_ROWS))))
+    else:
+        raise ValueError(f'Unknown RECOMMENDER_BACKEND: {backend}')
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.RLock()
+_last_version = 0
+
+
+def load_catalog() -> Catalog:
+    """Load the datasets and return a new Catalog. This does not replace the shared catalog; see reload_catalog.
+
+    The catalog keeps every album in memory. When there is no snapshot, the albums CSV file is only read once, with
+    the score statistics collected in the same pass.
+    """
+    global _last_version
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        albums, genres = snapshot
+        statistics = None
+    else:
+        statistics = ScoreStatistics()
+        albums = load_albums(ALBUMS_FILE, [statistics])
+        genres = create_genres()
+    with _catalog_lock:
+        _last_version += 1
+        return Catalog(albums, genres, _last_version, statistics)
+
+
+def get_catalog() -> Catalog:
+    """Return the shared catalog, loading it the first time this function is called.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+
+def reload_catalog() -> Catalog:
+    """Re-parse the datasets and replace the shared catalog. Callers already holding the old catalog keep using it
+    until they call get_catalog again.
+    """
+    global _catalog
+    catalog = load_catalog()
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['os', 'threading', 'albums_data', 'descriptor_index', 'descriptor_matrix', 'genres_data',
+                          'minhash_index', 'neighbour_table', 'recommender', 'scoring', 'search_index', 'snapshot'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'disable': ['global-statement', 'import-outside-toplevel'],
+        'max-line-length': 120
+    })
@@ -0,0 +1,132 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Descriptor Index)
+
+Description
+===============================
+
+This Python module contains the DescriptorIndex class, an inverted index from each descriptor to the albums that have
+that descriptor. The index is used by the recommendation algorithm so that a recommendation only adds up the descriptor
+weights of the albums that share at least one descriptor with the selected album, instead of every album in the
+catalog. The albums that share no descriptors are only scored by their prior, so they are read in order of prior from
+a list sorted once when the index is built.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import heapq
+from bisect import insort
+from typing import Optional
+
+from albums_data import Album
+from recommender import Recommender
+from scoring import AlbumScorer
+
+
+class DescriptorIndex(Recommender):
+    """An inverted index from descriptors to the albums with those descriptors.
+
+    Albums are identified by their position in the indexed list. Only the first (most popular) album with a given name
+    is indexed, since recommendations are never allowed to contain two albums with the same name.
+
+    Instance Attributes:
+        - albums: The indexed albums, sorted from most to least popular. The id of an album is its index in this list
+        - scorer: The descriptor weights and priors used to score the albums
+        - postings: A mapping from each descriptor to the ids of the albums with that descriptor, in increasing order
+
+    Representation Invariants:
+        - self.scorer.albums is self.albums
+        - all(ids == sorted(ids) for ids in self.postings.values())
+        - all(d in self.albums[i].descriptors for d in self.postings for i in self.postings[d])
+    """
+    albums: list[Album]
+    scorer: AlbumScorer
+    postings: dict[str, list[int]]
+
+    # Private Instance Attributes:
+    #   - _ids_by_prior: The ids of the indexed albums (the first album with each name), sorted from highest to lowest
+    #       prior, with ties broken by popularity
+    _ids_by_prior: list[int]
+
+    def __init__(self, albums: list[Album], scorer: Optional[AlbumScorer] = None) -> None:
+        """Initialize a new index over the given albums, scored by scorer. If scorer is None, a scorer with the default
+        weights is built over the albums.
+
+        Preconditions:
+            - scorer is None or scorer.albums is albums
+        """
+        self.albums = albums
+        self.scorer = scorer or AlbumScorer(albums)
+        self.postings = {}
+        indexed_ids = []
+
+        seen_names = set()
+        for album_id, album in enumerate(albums):
+            if album.name in seen_names:
+                continue
+            seen_names.add(album.name)
+            indexed_ids.append(album_id)
+            for descriptor in set(album.descriptors):
+                self.postings.setdefault(descriptor, []).append(album_id)
+
+        priors = self.scorer.priors
+        self._ids_by_prior = sorted(indexed_ids, key=lambda i: (-priors[i], i))
+
+    def score_matches(self, album: Album) -> dict[int, int]:
+        """Return a mapping from the id of every indexed album sharing at least one descriptor with album to the sum of
+        the weights of the descriptors they share.
+        """
+        scores = {}
+        descriptor_weights = self.scorer.descriptor_weights
+        for descriptor in set(album.descriptors):
+            weight = descriptor_weights.get(descriptor, 0)
+            for album_id in self.postings.get(descriptor, []):
+                scores[album_id] = scores.get(album_id, 0) + weight
+        return scores
+
+    def recommend(self, album: Album, num_recommendations: int, visited: set[str]) -> list[Album]:
+        """Return at most num_recommendations albums sorted from highest to lowest score as recommendations for album.
+        Ties are broken by popularity. The returned albums never have the same name as album or a name in visited.
+
+        Albums with no matching descriptors are scored by their prior alone. They are taken in order of prior, and the
+        search for them stops as soon as the rest of them cannot make it into the result.
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        if num_recommendations == 0:
+            return []
+
+        scores = self.score_matches(album)
+        albums = self.albums
+        priors = self.scorer.priors
+        candidates = ((-score - priors[album_id], album_id) for album_id, score in scores.items()
+                      if albums[album_id].name != album.name and albums[album_id].name not in visited)
+        top_matches = heapq.nsmallest(num_recommendations, candidates)
+
+        # Every id skipped here is either matched, visited, or the album itself, so this loop stops after at most
+        # len(scores) + len(visited) + 1 + num_recommendations iterations.
+        num_unmatched = 0
+        for album_id in self._ids_by_prior:
+            key = (-priors[album_id], album_id)
+            if len(top_matches) == num_recommendations and key > top_matches[-1]:
+                break
+            current_album = albums[album_id]
+            if album_id not in scores and current_album.name != album.name and current_album.name not in visited:
+                insort(top_matches, key)
+                del top_matches[num_recommendations:]
+                num_unmatched += 1
+                if num_unmatched == num_recommendations:
+                    break
+
+        return [albums[album_id] for _, album_id in top_matches]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['heapq', 'bisect', 'albums_data', 'recommender', 'scoring'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
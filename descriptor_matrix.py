@@ -0,0 +1,210 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Descriptor Matrix)
+
+Description
+===============================
+
+This Python module contains the DescriptorMatrix class, a scoring backend for the album recommendation algorithm that
+stores the catalog as a sparse album x descriptor matrix of descriptor weights. The descriptor scores of one album
+against every album in the catalog are computed with a single sparse matrix-vector product, and the scores of many
+albums with one sparse matrix-matrix product for every fixed-size batch of them. The precomputed priors are only added
+to the albums that share a descriptor with the selected album and to the unmatched albums of highest prior, which are
+the only ones that can be recommended. The rankings are the same as those of DescriptorIndex.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+from typing import Optional
+
+import numpy as np
+from scipy import sparse
+
+from albums_data import Album
+from recommender import Recommender
+from scoring import AlbumScorer
+
+# The number of albums scored together by one sparse matrix-matrix product in recommend_many.
+RECOMMEND_BATCH_SIZE = 8
+
+
+class DescriptorMatrix(Recommender):
+    """A sparse album x descriptor matrix used to score album recommendations.
+
+    Only the first (most popular) album with a given name has a non-empty row and can be recommended, as in
+    DescriptorIndex.
+
+    Instance Attributes:
+        - albums: The albums in the matrix, sorted from most to least popular. The id of an album is its row
+        - scorer: The descriptor weights and priors used to score the albums
+        - descriptor_ids: A mapping from each descriptor to its column in self.matrix
+        - matrix: A CSR matrix where matrix[i, j] is the weight of the descriptor in column j if album i has that
+            descriptor, and 0 otherwise
+
+    Representation Invariants:
+        - self.scorer.albums is self.albums
+        - self.matrix.shape == (len(self.albums), len(self.descriptor_ids))
+    """
+    albums: list[Album]
+    scorer: AlbumScorer
+    descriptor_ids: dict[str, int]
+    matrix: sparse.csr_matrix
+
+    # Private Instance Attributes:
+    #   - _ids_by_name: A mapping from each album name to the id of the first album with that name
+    #   - _priors: An array with the prior of each album
+    #   - _tie_breaks: An array whose value at each id is larger for more popular albums, used to break ties in score
+    #   - _recommendable: An array whose value at each id is True if and only if the album has a non-empty row
+    #   - _ids_by_prior: An array with the ids of the albums with a non-empty row, sorted from highest to lowest prior,
+    #       with ties broken by popularity
+    _ids_by_name: dict[str, int]
+    _priors: np.ndarray
+    _tie_breaks: np.ndarray
+    _recommendable: np.ndarray
+    _ids_by_prior: np.ndarray
+
+    def __init__(self, albums: list[Album], scorer: Optional[AlbumScorer] = None) -> None:
+        """Initialize a new descriptor matrix over the given albums, scored by scorer. If scorer is None, a scorer with
+        the default weights is built over the albums.
+
+        Preconditions:
+            - scorer is None or scorer.albums is albums
+        """
+        self.albums = albums
+        self.scorer = scorer or AlbumScorer(albums)
+        self.descriptor_ids = {}
+        self._ids_by_name = {}
+
+        row_ids, column_ids, weights = [], [], []
+        for album_id, album in enumerate(albums):
+            if album.name in self._ids_by_name:
+                continue
+            self._ids_by_name[album.name] = album_id
+            for descriptor in set(album.descriptors):
+                row_ids.append(album_id)
+                column_ids.append(self.descriptor_ids.setdefault(descriptor, len(self.descriptor_ids)))
+                weights.append(self.scorer.descriptor_weights[descriptor])
+
+        self.matrix = sparse.csr_matrix((np.array(weights, dtype=np.int64), (row_ids, column_ids)),
+                                        shape=(len(albums), len(self.descriptor_ids)))
+        self._priors = np.array(self.scorer.priors, dtype=np.int64)
+        self._tie_breaks = np.arange(len(albums) - 1, -1, -1, dtype=np.int64)
+        self._recommendable = np.zeros(len(albums), dtype=bool)
+        self._recommendable[list(self._ids_by_name.values())] = True
+        recommendable_ids = np.flatnonzero(self._recommendable)
+        self._ids_by_prior = recommendable_ids[np.lexsort((recommendable_ids, -self._priors[recommendable_ids]))]
+
+    def query_vector(self, album: Album) -> np.ndarray:
+        """Return the descriptor vector of album, ignoring any descriptors that no album in the matrix has.
+        """
+        vector = np.zeros(len(self.descriptor_ids), dtype=np.int64)
+        for descriptor in album.descriptors:
+            if descriptor in self.descriptor_ids:
+                vector[self.descriptor_ids[descriptor]] = 1
+        return vector
+
+    def score_albums(self, album: Album) -> np.ndarray:
+        """Return an array with the score of each album in the matrix as a recommendation for album.
+        """
+        return self.matrix @ self.query_vector(album) + self._priors
+
+    def recommend(self, album: Album, num_recommendations: int, visited: set[str]) -> list[Album]:
+        """Return at most num_recommendations albums sorted from highest to lowest score as recommendations for album,
+        with ties broken by popularity. The returned albums never have the same name as album or a name in visited.
+        The recommendations are always the same as those of a DescriptorIndex over the same albums.
+
+        In this catalog every album has the same prior, so albums with the same descriptors are tied, like B and F:
+
+        >>> from albums_data import parse_album_row
+        >>> from descriptor_index import DescriptorIndex
+        >>> rows = [('A', 'dark, loud'), ('B', 'dark'), ('C', 'loud'), ('D', 'dark, loud'), ('B', 'dark, loud'),
+        ...         ('E', 'calm'), ('F', 'dark')]
+        >>> albums = [parse_album_row([str(i + 1), str(i + 1), name, 'Artist', '2000', 'album', 'Rock', 'NA',
+        ...                            descriptors, '4.00', '100', '10'], i)
+        ...           for i, (name, descriptors) in enumerate(rows)]
+        >>> matrix, index = DescriptorMatrix(albums), DescriptorIndex(albums)
+        >>> [recommended.name for recommended in matrix.recommend(albums[0], 4, set())]
+        ['D', 'C', 'B', 'F']
+        >>> all(matrix.recommend(album, k, visited) == index.recommend(album, k, visited)
+        ...     for album in albums for k in range(len(albums) + 1) for visited in [set(), {'B'}, {'A', 'D'}])
+        True
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        descriptor_scores = self.matrix @ self.query_vector(album)
+        matched = np.flatnonzero(descriptor_scores)
+        return self._top_albums(matched, descriptor_scores[matched], album, num_recommendations,
+                                self._excluded(visited), len(visited))
+
+    def recommend_many(self, albums: list[Album], num_recommendations: int,
+                       visited: set[str]) -> list[list[Album]]:
+        """Return the recommendations for each album in albums, in the same order. The albums are scored
+        RECOMMEND_BATCH_SIZE at a time, with one product of the sparse matrix and their descriptor vectors, so that the
+        scores held at once do not grow with len(albums).
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        excluded = self._excluded(visited)
+        recommendations = []
+        for start in range(0, len(albums), RECOMMEND_BATCH_SIZE):
+            batch = albums[start:start + RECOMMEND_BATCH_SIZE]
+            queries = np.array([self.query_vector(album) for album in batch]).T
+            all_scores = np.ascontiguousarray((self.matrix @ queries).T)
+            for album, descriptor_scores in zip(batch, all_scores):
+                matched = np.flatnonzero(descriptor_scores)
+                recommendations.append(self._top_albums(matched, descriptor_scores[matched], album,
+                                                        num_recommendations, excluded, len(visited)))
+        return recommendations
+
+    def _excluded(self, visited: set[str]) -> np.ndarray:
+        """Return an array whose value at each id is True if and only if the album cannot be recommended given the
+        visited album names.
+        """
+        excluded = ~self._recommendable
+        for name in visited:
+            if name in self._ids_by_name:
+                excluded[self._ids_by_name[name]] = True
+        return excluded
+
+    def _top_albums(self, matched: np.ndarray, matched_scores: np.ndarray, album: Album, num_recommendations: int,
+                    excluded: np.ndarray, num_visited: int) -> list[Album]:
+        """Return the at most num_recommendations albums with the highest scores that are not excluded and do not have
+        the same name as album, where matched are the ids of the albums with a descriptor score and matched_scores
+        their descriptor scores. Ties are broken by popularity.
+
+        At most num_visited recommendable albums are excluded, so the best unmatched albums are among the first
+        num_recommendations + len(matched) + num_visited + 1 albums in order of prior.
+        """
+        unmatched = self._ids_by_prior[:num_recommendations + len(matched) + num_visited + 1]
+        # The matched albums are already ranked by their descriptor scores, so they are left out of the unmatched ones.
+        is_matched = np.zeros(len(self.albums), dtype=bool)
+        is_matched[matched] = True
+        unmatched = unmatched[~is_matched[unmatched]]
+        candidates = np.concatenate((matched, unmatched))
+        scores = np.concatenate((matched_scores, np.zeros(len(unmatched), dtype=np.int64))) + self._priors[candidates]
+
+        # Combining the score and popularity into one key gives every album a distinct key, so the order does not
+        # depend on how argpartition and argsort break ties.
+        keys = scores * len(self.albums) + self._tie_breaks[candidates]
+        keys[excluded[candidates]] = -1
+        if album.name in self._ids_by_name:
+            keys[candidates == self._ids_by_name[album.name]] = -1
+
+        num_recommendations = min(num_recommendations, len(keys))
+        if num_recommendations == 0:
+            return []
+        top = np.argpartition(-keys, num_recommendations - 1)[:num_recommendations]
+        top = top[np.argsort(-keys[top])]
+        return [self.albums[candidates[i]] for i in top if keys[i] >= 0]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'scipy', 'albums_data', 'recommender', 'scoring'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
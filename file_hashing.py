@@ -0,0 +1,34 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (File Hashing)
+
+Description
+===============================
+
+This Python module contains the function used to hash the dataset files, so that the files built from them ahead of
+time, like the catalog snapshot and the neighbour table, can tell when the datasets have changed since they were built.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import hashlib
+
+
+def hash_file(path: str) -> bytes:
+    """Return the SHA-256 hash of the contents of the file at path.
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.digest()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['hashlib'],  # the names (strs) of imported modules
+        'allowed-io': ['hash_file'],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
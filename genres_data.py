@@ -11,8 +11,12 @@ This file is Copyright (c) 2023 David Wu and Kevin Hu.
 
 
 import csv
+import os
+import sys
 from typing import Optional
 
+GENRES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets', 'genres_dataset.csv')
+
 
 # @check_contracts
 class Genre:
@@ -25,23 +29,27 @@ class Genre:
 
     Representation Invariants:
         - self.name != ''
+        - self.genre_id >= -1
     """
+    __slots__ = ('name', 'parent_genre', 'genre_id')
     name: str
     parent_genre: Optional[str]
+    genre_id: int
 
-    def __init__(self, name: str, parent_genre: Optional[str]) -> None:
-        """Initialize a new genre with the given name and parent genre.
+    def __init__(self, name: str, parent_genre: Optional[str], genre_id: int = -1) -> None:
+        """Initialize a new genre with the given name, parent genre, and id.
         """
-        self.name = name
-        self.parent_genre = parent_genre
+        self.name = sys.intern(name)
+        self.parent_genre = None if parent_genre is None else sys.intern(parent_genre)
+        self.genre_id = genre_id
 
 
 def create_genres() -> list[Genre]:
     """This function creates a full list of genres using the data from genres_dataset.csv. Each element in the output
-    list is a Genre instance.
+    list is a Genre instance, whose genre_id is its position in the output list.
     """
     genres = []
-    with open('datasets/genres_dataset.csv', 'r', encoding="utf8") as f:
+    with open(GENRES_FILE, 'r', encoding="utf8") as f:
         reader = csv.reader(f)
         next(reader)
         for row in reader:
@@ -50,11 +58,109 @@ def create_genres() -> list[Genre]:
                 parent_genre = None
             else:
                 parent_genre = row[1]
-            genre = Genre(name, parent_genre)
+            genre = Genre(name, parent_genre, len(genres))
             genres.append(genre)
     return genres
 
 
+class GenreHierarchy:
+    """The hierarchy of genres in genres_dataset.csv, built once so that a genre's subgenres and parent genres can be
+    found without scanning every genre.
+
+    A genre may be listed more than once in genres_dataset.csv with different parent genres, so each genre name can
+    have several parent genres. The ancestors of a genre are found by following the first parent genre listed for each
+    genre.
+
+    Instance Attributes:
+        - genres: The genres the hierarchy was built from, in the order they were listed
+
+    Representation Invariants:
+        - all(genre in self.get_children(genre.parent_genre) for genre in self.genres if genre.parent_genre is not None)
+    """
+    genres: list[Genre]
+
+    # Private Instance Attributes:
+    #   - _children: A mapping from each genre name to its subgenres, in the order they were listed. The subgenres of
+    #       None are the main genres, which have no parent genre
+    #   - _parents: A mapping from each genre name to the names of its parent genres, in the order they were listed
+    #   - _depths: A mapping from each genre name to the number of its ancestors
+    #   - _subtree_sizes: A mapping from each genre name to the number of nodes in its subtree, where a genre with
+    #       several parent genres is counted once under each of them
+    _children: dict[Optional[str], list[Genre]]
+    _parents: dict[str, list[str]]
+    _depths: dict[str, int]
+    _subtree_sizes: dict[str, int]
+
+    def __init__(self, genres: list[Genre]) -> None:
+        """Initialize the hierarchy of the given genres.
+        """
+        self.genres = genres
+        self._children = {}
+        self._parents = {}
+        for genre in genres:
+            self._children.setdefault(genre.parent_genre, []).append(genre)
+            parents = self._parents.setdefault(genre.name, [])
+            if genre.parent_genre is not None:
+                parents.append(genre.parent_genre)
+
+        self._depths = {}
+        for name in self._parents:
+            self._depths[name] = len(self.get_ancestors(name))
+
+        # The subtree sizes are computed bottom-up with an explicit stack, so that every subtree is only counted once.
+        self._subtree_sizes = {}
+        for name in self._parents:
+            stack = [(name, False)]
+            in_progress = set()
+            while stack:
+                current, children_done = stack.pop()
+                if current in self._subtree_sizes:
+                    continue
+                elif children_done:
+                    self._subtree_sizes[current] = 1 + sum(self._subtree_sizes.get(child.name, 1)
+                                                           for child in self._children.get(current, []))
+                elif current not in in_progress:
+                    in_progress.add(current)
+                    stack.append((current, True))
+                    stack.extend((child.name, False) for child in self._children.get(current, []))
+
+    def get_roots(self) -> list[Genre]:
+        """Return the main genres, which have no parent genre.
+        """
+        return self._children.get(None, [])
+
+    def get_children(self, name: str) -> list[Genre]:
+        """Return the subgenres of the genre with the given name.
+        """
+        return self._children.get(name, [])
+
+    def get_parents(self, name: str) -> list[str]:
+        """Return the names of the parent genres of the genre with the given name.
+        """
+        return self._parents.get(name, [])
+
+    def get_ancestors(self, name: str) -> list[str]:
+        """Return the names of the ancestors of the genre with the given name, starting with its first parent genre and
+        ending with a main genre (or a genre not listed in genres_dataset.csv).
+        """
+        ancestors = []
+        parents = self._parents.get(name, [])
+        while parents and parents[0] not in ancestors and parents[0] != name:
+            ancestors.append(parents[0])
+            parents = self._parents.get(parents[0], [])
+        return ancestors
+
+    def get_depth(self, name: str) -> int:
+        """Return the number of ancestors of the genre with the given name. Main genres have depth 0.
+        """
+        return self._depths.get(name, 0)
+
+    def get_subtree_size(self, name: str) -> int:
+        """Return the number of nodes in the subtree of the genre with the given name, including the genre itself.
+        """
+        return self._subtree_sizes.get(name, 1)
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod(verbose=True)
@@ -62,7 +168,7 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['csv'],  # the names (strs) of imported modules
+        'extra-imports': ['csv', 'os', 'sys'],  # the names (strs) of imported modules
         'allowed-io': ['create_genres'],  # the names (strs) of functions that call print/open/input
         'max-line-length': 120
     })
@@ -0,0 +1,45 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Gunicorn Configuration)
+
+Description
+===============================
+
+This Python module contains the gunicorn settings used to run our app in production, with:
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+The app is loaded in the master process before the workers are forked, so the catalog is only loaded once. The number
+of worker processes, threads per worker and port can be changed with the WEB_CONCURRENCY, GUNICORN_THREADS and PORT
+environment variables.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import gc
+import multiprocessing
+import os
+from typing import Any
+
+bind = '0.0.0.0:' + os.getenv('PORT', '8050')
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+preload_app = True
+timeout = 60
+
+
+def when_ready(server: Any) -> None:
+    """Move every object created while loading the app out of the garbage collector's generations before the workers
+    are forked. Otherwise the first garbage collection in each worker writes to every object of the catalog, which
+    copies the memory pages holding them into the worker.
+    """
+    gc.freeze()
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['gc', 'multiprocessing', 'os'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'disable': ['invalid-name', 'unused-argument'],
+        'max-line-length': 120
+    })
@@ -11,28 +11,57 @@ This file is Copyright (c) 2023 David Wu and Kevin Hu.
 """
 import os
 from dotenv import load_dotenv
-from dash import Dash, html, dcc, Output, Input, ctx
+from functools import lru_cache
+from typing import Any, Optional
+
+from dash import Dash, Patch, html, dcc, Output, Input, State, ctx, no_update
 import plotly.graph_objects as go
 import spotipy
 from spotipy import SpotifyOAuth
 
-from plot_genre_tree import plot_genre_tree, plot_default_genre_tree
-from plot_recommendation_tree import plot_album_recommendation_tree, plot_genre_recommendation_tree, \
-    get_albums_by_genre_and_popularity
-from albums_data import Album, create_albums
-from genres_data import Genre, create_genres
-
-
-def main() -> None:
+from plot_genre_tree import get_genre_tree_figure, warm_genre_tree_cache
+from plot_recommendation_tree import ALBUM_TREE_DEPTH, ALBUM_TREE_FAN_OUT, ALBUM_TREE_MAX_DEPTH, \
+    ALBUM_TREE_MAX_FAN_OUT, expand_album_recommendation_tree, plot_album_recommendation_tree, \
+    plot_genre_recommendation_tree
+from albums_data import Album
+from catalog import get_catalog
+from genres_data import Genre
+from spotify_resolver import SpotifyResolver
+from tree_store import TreeStore
+
+SPOTIFY_POLL_INTERVAL = 500
+SPOTIFY_POLL_LIMIT = 30
+SEARCH_DEBOUNCE = 250
+ALBUM_TREE_STORE_SIZE = 256
+
+# A clientside callback that passes on the search value of a dropdown once it has not changed for SEARCH_DEBOUNCE
+# milliseconds, so that only the last of a quick run of keystrokes is searched for on the server. Each dropdown keeps
+# its latest search value under its own key.
+DEBOUNCE_SEARCH = '''
+function(search_value) {
+    const key = '%s';
+    window.latestSearchValues = window.latestSearchValues || {};
+    window.latestSearchValues[key] = search_value;
+    return new Promise(resolve => setTimeout(() => resolve(
+        window.latestSearchValues[key] === search_value ? search_value : window.dash_clientside.no_update), %d));
+}
+'''
+
+
+def create_app() -> Dash:
     """
-    This function is the main block of code that runs our app
+    This function creates our app, with its layout and callbacks. The shared catalog is loaded and the genre tree
+    figures are built before the app is returned, so a server that creates the app before forking its worker processes
+    shares them between every worker. The app's WSGI server is app.server, which compresses its responses with
+    flask-compress for browsers that accept it.
     """
-    app = Dash(__name__, suppress_callback_exceptions=True)
+    app = Dash(__name__, suppress_callback_exceptions=True, compress=True)
 
-    root_genre_stack, visited = [], set()
-    albums, genres = create_data()
+    create_data()
+    warm_genre_tree_cache()
 
-    sp = spotify_auth()
+    resolver = SpotifyResolver(spotify_auth())
+    trees = TreeStore(ALBUM_TREE_STORE_SIZE)
 
     app.layout = html.Div([
         html.H1(children='Music Recommendation System',
@@ -43,53 +72,78 @@ def main() -> None:
         html.Button('Explore Genre Tree', id='genre_tree_button', style={'textAlign': 'center', 'height': '38px'}),
         html.Div(id='rec_output'),
         dcc.Graph(id='tree_plot', figure=blank_fig()),
-        dcc.Graph(id='placeholder', figure=blank_fig())
+        dcc.Graph(id='placeholder', figure=blank_fig()),
+        # The exploration state of each browser session is kept in the browser, so that any server thread or process
+        # can answer its callbacks: the names of the albums already shown in the recommendation trees, the fan-out the
+        # displayed album recommendation tree was plotted with, the ids of the albums whose recommendations are shown
+        # in it and the id of its nodes (None if a genre recommendation tree is displayed), and the ids of the genres
+        # whose trees were opened, from first to last. The nodes themselves are only needed to expand the tree, so
+        # they are kept on the server that drew it, in a TreeStore (see tree_store.py).
+        dcc.Store(id='visited_store', data=[]),
+        dcc.Store(id='expanded_store', data=None),
+        dcc.Store(id='genre_stack_store', data=[]),
     ], style={'backgroundColor': '#383838'})
 
     @app.callback(
         Output('rec_output', 'children'),
         Output('tree_plot', 'figure', allow_duplicate=True),
+        Output('visited_store', 'data', allow_duplicate=True),
+        Output('genre_stack_store', 'data', allow_duplicate=True),
         Input('rec_button', 'n_clicks'),
         Input('genre_tree_button', 'n_clicks'),
         prevent_initial_call='initial_duplicate',
         suppress_callback_exceptions=True
     )
-    def update_page(rec_button: html.Button, genre_tree_button: html.Button) -> tuple[html.Div, go.Figure]:
+    def update_page(rec_button: html.Button, genre_tree_button: html.Button) -> tuple[html.Div, dict, list, list]:
         """
         This function updates the page based on the button pressed.
-        If the recommendation button is pressed, the page will be changed to display a combobox with every album.
+        If the recommendation button is pressed, the page will be changed to display searchable album and genre
+        dropdowns, whose options are filled in by search_album_options and search_genre_options as the user types.
         If the genre tree button is pressed, the page will be changed to display the genre tree from plot_genre_tree.
+        The session's exploration state for the displayed page is reset.
         """
         if "rec_button" == ctx.triggered_id:
-            main.visited = set()
             return (html.Div([
                 html.H3('Choose either an album you like or a genre you like from one of the dropdowns below and press'
                         ' the respective submit button:',
                         style={'textAlign': 'center', 'backgroundColor': '#383838', 'color': 'hotpink'}),
                 html.H4('Clicking on an album node will give you a new set of recommendations based on the new album'
-                        ' you clicked!',
+                        ' you clicked! Choose whether they are added below the album or shown in a new tree:',
                         style={'textAlign': 'center', 'backgroundColor': '#383838', 'color': 'hotpink'}),
+                dcc.RadioItems(
+                    id='click_mode',
+                    options=[{'label': 'Expand the clicked album', 'value': 'expand'},
+                             {'label': 'New tree from the clicked album', 'value': 'replot'}],
+                    value='expand',
+                    inline=True,
+                    style={'textAlign': 'center', 'color': 'hotpink'}
+                ),
+                html.Div('Recommendations per album:', style={'textAlign': 'center', 'color': 'hotpink'}),
+                dcc.Slider(id='fan_out_slider', min=1, max=ALBUM_TREE_MAX_FAN_OUT, step=1, value=ALBUM_TREE_FAN_OUT),
+                html.Div('Tree depth:', style={'textAlign': 'center', 'color': 'hotpink'}),
+                dcc.Slider(id='depth_slider', min=1, max=ALBUM_TREE_MAX_DEPTH, step=1, value=ALBUM_TREE_DEPTH),
                 dcc.Dropdown(
                     id='album_dropdown',
-                    options=[album.name + ' - ' + album.artist for album in albums],
+                    options=[],
                     style={'backgroundColor': 'white', 'color': 'black'},
-                    placeholder='Select an album...'
+                    placeholder='Search for an album or artist...'
                 ),
                 dcc.Dropdown(
                     id='genre_dropdown',
-                    options=[genre.name for genre in genres],
+                    options=[],
                     style={'backgroundColor': 'white', 'color': 'black'},
-                    placeholder='Select a genre...'
+                    placeholder='Search for a genre...'
                 ),
+                dcc.Store(id='album_search_store', data=''),
+                dcc.Store(id='genre_search_store', data=''),
                 html.Div(id='album_output'),
                 html.Button('Submit Album', id='album_submit', style={'textAlign': 'center', 'height': '38px'}),
                 html.Button('Submit Genre', id='genre_submit', style={'textAlign': 'center', 'height': '38px'}),
                 html.Div(id='spotify_output', style={'textAlign': 'center'}),
                 dcc.Graph(id='rec_tree_plot', figure=blank_fig()),
-            ]), blank_fig())
+            ]), blank_fig(), [], no_update)
 
         elif "genre_tree_button" == ctx.triggered_id:
-            main.root_genre_stack = []
             return (html.Div([
                 html.H2('Genre Tree Free Exploration',
                         style={'textAlign': 'center', 'backgroundColor': '#383838', 'color': 'hotpink'}),
@@ -99,97 +153,163 @@ def main() -> None:
                 html.H3("You can freely explore the tree and view a genre's subgenres by clicking on it's node",
                         style={'textAlign': 'center', 'backgroundColor': '#383838', 'color': 'hotpink'}),
                 html.Button('Go Back', id='back_button', style={'textAlign': 'center', 'height': '38px'}),
-            ]), plot_default_genre_tree())
+            ]), get_genre_tree_figure(None), no_update, [])
 
         else:
             return (html.Div([
                 html.H3('Please press a button to get started',
                         style={'textAlign': 'center', 'backgroundColor': '#383838', 'color': 'hotpink'}),
-            ]), blank_fig())
+            ]), blank_fig(), no_update, no_update)
+
+    app.clientside_callback(
+        DEBOUNCE_SEARCH % ('album', SEARCH_DEBOUNCE),
+        Output('album_search_store', 'data'),
+        Input('album_dropdown', 'search_value'),
+        prevent_initial_call=True
+    )
+
+    app.clientside_callback(
+        DEBOUNCE_SEARCH % ('genre', SEARCH_DEBOUNCE),
+        Output('genre_search_store', 'data'),
+        Input('genre_dropdown', 'search_value'),
+        prevent_initial_call=True
+    )
+
+    @app.callback(
+        Output('album_dropdown', 'options'),
+        Input('album_search_store', 'data'),
+        State('album_dropdown', 'value')
+    )
+    def search_album_options(search_value: Optional[str], value: Optional[int]) -> list[dict]:
+        """
+        This function returns the options of the album dropdown for the search value typed in it: the albums whose name
+        and artist best match it, or the most popular albums if nothing has been typed. The selected album is always
+        kept in the options, so that it stays selected. The search value is the search text of every option, so that
+        the dropdown does not hide the matches with typos or accents.
+        """
+        catalog = get_catalog()
+        albums = catalog.search_albums(search_value or '')
+        selected = None if value is None else catalog.get_album(value)
+        if selected is not None and selected not in albums:
+            albums.append(selected)
+        return [{'label': album.name + ' - ' + album.artist, 'value': album.album_id, 'search': search_value or ''}
+                for album in albums]
+
+    @app.callback(
+        Output('genre_dropdown', 'options'),
+        Input('genre_search_store', 'data'),
+        State('genre_dropdown', 'value')
+    )
+    def search_genre_options(search_value: Optional[str], value: Optional[int]) -> list[dict]:
+        """
+        This function returns the options of the genre dropdown for the search value typed in it: the genres whose name
+        best matches it, or the first genres if nothing has been typed. The selected genre is always kept in the
+        options, so that it stays selected. The search value is the search text of every option, as for the album
+        dropdown.
+        """
+        catalog = get_catalog()
+        genres = catalog.search_genres(search_value or '')
+        selected = None if value is None else catalog.get_genre(value)
+        if selected is not None and selected not in genres:
+            genres.append(selected)
+        return [{'label': genre.name, 'value': genre.genre_id, 'search': search_value or ''} for genre in genres]
 
     @app.callback(
         Output('tree_plot', 'figure', allow_duplicate=True),
+        Output('genre_stack_store', 'data', allow_duplicate=True),
         Input('tree_plot', 'clickData'),
+        State('genre_stack_store', 'data'),
         prevent_initial_call=True
     )
-    def plot_new_tree(clickData: dict) -> go.Figure or None:
+    def plot_new_tree(clickData: dict, genre_stack: list[int]) -> tuple[dict, list[int]]:
         """
-        This function plots a new genre tree based on the node clicked on the old genre tree.
+        This function plots a new genre tree based on the node clicked on the old genre tree, and adds the clicked genre
+        to the session's stack of opened genres.
         """
         if clickData is not None:
-            if clickData['points'][0]['text'] == 'Genres':
-                return plot_default_genre_tree()
+            genre_id = clickData['points'][0].get('customdata')
+            if genre_id is None:
+                return get_genre_tree_figure(None), no_update
             else:
-                genre_name = clickData['points'][0]['text']
-                new_root = Genre(genre_name, None)
-                root_genre_stack.append(new_root)
-                new_fig = plot_genre_tree(new_root)
-                return new_fig
+                new_root = get_catalog().get_genre(genre_id)
+                return get_genre_tree_figure(new_root), genre_stack + [genre_id]
         else:
-            return None
+            return no_update, no_update
 
     @app.callback(
         Output('tree_plot', 'figure', allow_duplicate=True),
+        Output('genre_stack_store', 'data', allow_duplicate=True),
         Input('back_button', 'n_clicks'),
+        State('genre_stack_store', 'data'),
         prevent_initial_call=True,
     )
-    def plot_previous_tree(back_button: html.Button) -> go.Figure:
+    def plot_previous_tree(back_button: html.Button, genre_stack: list[int]) -> tuple[dict, list[int]]:
         """
         This function plots the previous genre tree, does nothing if it is currently the default tree.
         """
-        if "back_button" == ctx.triggered_id and len(root_genre_stack) > 0:
-            return plot_genre_tree(root_genre_stack.pop())
+        if "back_button" == ctx.triggered_id and len(genre_stack) > 0:
+            genre_stack = genre_stack[:-1]
+        if len(genre_stack) > 0:
+            return get_genre_tree_figure(get_catalog().get_genre(genre_stack[-1])), genre_stack
         else:
-            return plot_default_genre_tree()
+            return get_genre_tree_figure(None), genre_stack
 
     @app.callback(
         Output('rec_tree_plot', 'figure', allow_duplicate=True),
         Output('spotify_output', 'children', allow_duplicate=True),
+        Output('visited_store', 'data', allow_duplicate=True),
+        Output('expanded_store', 'data', allow_duplicate=True),
         Input('album_dropdown', 'value'),
         Input('album_submit', 'n_clicks'),
+        State('fan_out_slider', 'value'),
+        State('depth_slider', 'value'),
         prevent_initial_call=True,
     )
-    def get_album_dropdown_value(value: str, album_submit: html.Button) -> tuple[go.Figure, html.Iframe]:
+    def get_album_dropdown_value(value: int, album_submit: html.Button, fan_out: int,
+                                 depth: int) -> tuple[dict, html.Iframe, list[str], Optional[dict]]:
         """
         This function returns the value of the album dropdown when the recommend button is pressed and plots the
-        recommendation tree.
+        recommendation tree, with the fan-out and depth chosen with the sliders. The value of the album dropdown is the
+        id of the selected album. The session's visited albums are reset to the albums in the new tree.
 
         Preconditions:
-            - value != ''
+            - value is None or get_catalog().get_album(value) is not None
 
         """
-        main.visited = set()
-        if "album_submit" == ctx.triggered_id:
-            album_name = value.split(' - ')[0]
-            album_artist = value.split(' - ')[1]
-            album = [alb for alb in albums if alb.name == album_name and alb.artist == album_artist][0]
-            return (plot_album_recommendation_tree(album, visited), html.Iframe(src='', id='spotify_embed',
-                                                                                style={'display': 'none'}))
+        visited = set()
+        if "album_submit" == ctx.triggered_id and value is not None:
+            album = get_catalog().get_album(value)
+            expanded = []
+            nodes = {}
+            return (plot_album_recommendation_tree(album, visited, fan_out, depth, expanded, nodes),
+                    html.Iframe(src='', id='spotify_embed', style={'display': 'none'}),
+                    sorted(visited), {'fan_out': fan_out, 'expanded': expanded, 'tree_id': trees.add(nodes)})
         else:
-            return (blank_fig(), html.Iframe(src='', id='spotify_embed', style={'display': 'none'}))
+            return (blank_fig(), html.Iframe(src='', id='spotify_embed', style={'display': 'none'}), [], None)
 
     @app.callback(
         Output('rec_tree_plot', 'figure', allow_duplicate=True),
         Output('spotify_output', 'children', allow_duplicate=True),
+        Output('expanded_store', 'data', allow_duplicate=True),
         Input('genre_dropdown', 'value'),
         Input('genre_submit', 'n_clicks'),
         prevent_initial_call=True,
     )
-    def get_genre_dropdown_value(value: str, genre_submit: html.Button) -> tuple[go.Figure, html.Iframe]:
+    def get_genre_dropdown_value(value: int, genre_submit: html.Button) -> tuple[dict, html.Iframe, None]:
         """
         This function returns the value of the genre dropdown when the recommend button is pressed and plots the
-        recommendation tree.
+        recommendation tree. The value of the genre dropdown is the id of the selected genre.
 
         Preconditions:
-            - value != ''
+            - value is None or get_catalog().get_genre(value) is not None
 
         """
-        if "genre_submit" == ctx.triggered_id:
-            genre = [gen for gen in genres if gen.name == value][0]
+        if "genre_submit" == ctx.triggered_id and value is not None:
+            genre = get_catalog().get_genre(value)
             return (plot_genre_recommendation_tree(genre), html.Iframe(src='', id='spotify_embed',
-                                                                       style={'display': 'none'}))
+                                                                       style={'display': 'none'}), None)
         else:
-            return (blank_fig(), html.Iframe(src='', id='spotify_embed', style={'display': 'none'}))
+            return (blank_fig(), html.Iframe(src='', id='spotify_embed', style={'display': 'none'}), None)
 
     @app.callback(
         Output('spotify_output', 'children', allow_duplicate=True),
@@ -198,57 +318,124 @@ def main() -> None:
     )
     def SpotifyEmbed(clickData: dict) -> html.Div:
         """
-        Embeds a spotify player of the album clicked on the recommendation tree.
+        Embeds a spotify player of the album clicked on the recommendation tree. Nothing happens if the clicked node is
+        not an album. The album's Spotify id is taken from the catalog snapshot if spotify_prefetch found it ahead of
+        time, or from the resolver's cache. Otherwise, the album is searched for on a background thread, and a polling
+        interval is returned that shows the player with poll_spotify_embed once the search is done.
         """
-        album_name = clickData['points'][0]['text'].split(' - ')[0]
-        album_artist = clickData['points'][0]['text'].split(' - ')[1]
-        results = sp.search(q='album:' + album_name + ' artist:' + album_artist, type='album')
-
-        if not results['albums']['items']:
-            results = sp.search(q='album:' + album_name, type='album')
-        if not results['albums']['items']:
-            results = sp.search(q='album:' + album_name.split(' (')[0] + ' artist:' + album_artist, type='album')
-        if not results['albums']['items']:
-            results = sp.search(q='album:' + album_name.split('(')[1].split(')')[0] + ' artist:' + album_artist,
-                                type='album')
-        if not results['albums']['items']:
-            return html.Div('No Spotify results found', style={'textAlign': 'center', 'color': 'hotpink'})
-
-        album_id = results['albums']['items'][0]['id']
+        album = get_clicked_album(clickData)
+        if album is None:
+            return no_update
+        if album.spotify_id is not None:
+            return spotify_player(album.spotify_id)
+        found, album_id = resolver.lookup(album.name, album.artist)
+        if found:
+            return spotify_player(album_id)
+
+        resolver.resolve_in_background(album.name, album.artist)
         return html.Div([
-            html.Iframe(src='https://open.spotify.com/embed/album/' + album_id, width='700', height='380'),
+            html.Div('Loading Spotify player...', style={'textAlign': 'center', 'color': 'hotpink'}),
+            dcc.Interval(id='spotify_poll', interval=SPOTIFY_POLL_INTERVAL, max_intervals=SPOTIFY_POLL_LIMIT),
+            dcc.Store(id='spotify_pending', data=album.album_id),
         ])
 
+    @app.callback(
+        Output('spotify_output', 'children', allow_duplicate=True),
+        Input('spotify_poll', 'n_intervals'),
+        State('spotify_pending', 'data'),
+        prevent_initial_call=True
+    )
+    def poll_spotify_embed(n_intervals: int, album_id: int) -> html.Div:
+        """
+        Embeds the spotify player of the album being searched for by SpotifyEmbed once its search is done. The search
+        is given up on after SPOTIFY_POLL_LIMIT polls.
+        """
+        album = get_catalog().get_album(album_id)
+        found, spotify_id = resolver.lookup(album.name, album.artist)
+        if found:
+            return spotify_player(spotify_id)
+        elif n_intervals >= SPOTIFY_POLL_LIMIT:
+            return html.Div('Spotify is not responding, please try again later',
+                            style={'textAlign': 'center', 'color': 'hotpink'})
+        else:
+            return no_update
+
     @app.callback(
         Output('rec_tree_plot', 'figure', allow_duplicate=True),
+        Output('visited_store', 'data', allow_duplicate=True),
+        Output('expanded_store', 'data', allow_duplicate=True),
         Input('rec_tree_plot', 'clickData'),
+        State('visited_store', 'data'),
+        State('expanded_store', 'data'),
+        State('click_mode', 'value'),
+        State('fan_out_slider', 'value'),
+        State('depth_slider', 'value'),
         prevent_initial_call=True
     )
-    def plot_new_recommendation_tree(clickData: dict) -> go.Figure or None:
+    def plot_new_recommendation_tree(clickData: dict, visited_names: list[str], tree: Optional[dict],
+                                     click_mode: str, fan_out: int,
+                                     depth: int) -> tuple[dict or Patch, list[str], dict]:
         """
-        This function plots a new recommendation tree based on the node clicked on the old recommendation tree.
+        This function plots a new recommendation tree based on the node clicked on the old recommendation tree, with
+        the fan-out and depth chosen with the sliders.
         When a leaf node is clicked on the genre recommendation tree, it will plot the album recommendation tree.
+        In the 'expand' click mode, a node clicked on an album recommendation tree is expanded instead: only the
+        recommendations for the clicked album are added below it, with the fan-out the tree was plotted with, and the
+        figure is updated with a partial update, unless the tree has to be laid out again to make room for them. The
+        nodes of the tree are kept on the server in the tree store, so that the added nodes are placed around the nodes
+        already shown; if they are no longer there, a new tree is plotted for the clicked album instead. Nodes whose
+        recommendations are already shown do nothing. Albums already shown to the session are not recommended again.
         """
-        if clickData is not None:
-            album_name = clickData['points'][0]['text'].split(' - ')[0]
-            album_artist = clickData['points'][0]['text'].split(' - ')[1]
-            album = [alb for alb in albums if alb.name == album_name and alb.artist == album_artist][0]
-            visited.add(album_name)
-            return plot_album_recommendation_tree(album, visited)
-        else:
-            return None
+        album = get_clicked_album(clickData)
+        if album is None:
+            return no_update, no_update, no_update
+
+        visited = set(visited_names or [])
+        nodes = None if tree is None else trees.get(tree['tree_id'])
+        if click_mode == 'expand' and nodes is not None:
+            if album.album_id in tree['expanded']:
+                return no_update, no_update, no_update
+            update = expand_album_recommendation_tree(clickData['points'][0]['pointNumber'], visited, nodes,
+                                                      tree['fan_out'])
+            return update, sorted(visited), dict(tree, expanded=tree['expanded'] + [album.album_id])
+
+        visited.add(album.name)
+        expanded = []
+        nodes = {}
+        return (plot_album_recommendation_tree(album, visited, fan_out, depth, expanded, nodes), sorted(visited),
+                {'fan_out': fan_out, 'expanded': expanded, 'tree_id': trees.add(nodes)})
 
-    app.run_server(debug=False)
+    return app
+
+
+def main() -> None:
+    """
+    This function is the main block of code that runs our app on the development server. See wsgi.py for running it
+    on a production server.
+    """
+    create_app().run_server(debug=False)
 
 
 def create_data() -> tuple[list[Album], list[Genre]]:
     """
-    This function creates the data needed for our app.
+    This function returns the data needed for our app from the shared catalog, loading the catalog if it has not been
+    loaded yet. Genres without any albums are left out.
+    """
+    catalog = get_catalog()
+    return catalog.albums, catalog.genres_with_albums
+
+
+def get_clicked_album(clickData: Optional[dict]) -> Optional[Album]:
+    """
+    This function returns the album of the node clicked on a recommendation tree, using the album id stored in the
+    node's custom data. None is returned if nothing was clicked or the clicked node is not an album.
     """
-    albums = create_albums()
-    genres = create_genres()
-    genres = [genre for genre in genres if get_albums_by_genre_and_popularity(genre.name, albums) != []]
-    return albums, genres
+    if clickData is None:
+        return None
+    album_id = clickData['points'][0].get('customdata')
+    if album_id is None:
+        return None
+    return get_catalog().get_album(album_id)
 
 
 def spotify_auth() -> spotipy.Spotify:
@@ -267,16 +454,31 @@ def spotify_auth() -> spotipy.Spotify:
     return sp
 
 
-def blank_fig() -> go.Figure:
+def spotify_player(spotify_id: Optional[str]) -> html.Div:
+    """
+    This function creates the embedded spotify player of the album with the given Spotify id, or a message saying the
+    album is not on Spotify if spotify_id is None or empty.
+    """
+    if not spotify_id:
+        return html.Div('No Spotify results found', style={'textAlign': 'center', 'color': 'hotpink'})
+
+    return html.Div([
+        html.Iframe(src='https://open.spotify.com/embed/album/' + spotify_id, width='700', height='380'),
+    ])
+
+
+@lru_cache(maxsize=1)
+def blank_fig() -> dict[str, Any]:
     """
-    This function creates a blank figure.
+    This function creates a blank figure. The figure is only created the first time this function is called, and the
+    same figure is returned every time after that, so it must not be modified.
     """
     fig = go.Figure(go.Scatter(x=[], y=[]))
     fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
     fig.update_layout(template=None)
     fig.update_xaxes(showgrid=False, showticklabels=False, zeroline=False)
     fig.update_yaxes(showgrid=False, showticklabels=False, zeroline=False)
-    return fig
+    return fig.to_dict()
 
 
 if __name__ == '__main__':
@@ -284,9 +486,10 @@ if __name__ == '__main__':
 
     python_ta.check_all(config={
         'max-line-length': 120,
-        'extra-imports': ['os', 'spotipy', ' plotly.graph_objects', 'dotenv', 'plot_genre_tree',
+        'extra-imports': ['os', 'spotipy', ' plotly.graph_objects', 'dotenv', 'functools', 'plot_genre_tree',
                           'plot_recommendation_tree',
-                          'dash', 'albums_data', 'genres_data'],
+                          'dash', 'albums_data', 'catalog', 'genres_data', 'spotify_resolver',
+                          'tree_store'],
         'allowed-io': ['main'],
         'disable': ['unused-argument', 'invalid-name']
     })
@@ -0,0 +1,217 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (MinHash Index)
+
+Description
+===============================
+
+This Python module contains the MinHashIndex class, an approximate scoring backend for the album recommendation
+algorithm, meant for catalogs far larger than rym_clean1.csv. Instead of scoring every album that shares a descriptor
+with the selected album, which for common descriptors like 'melancholic' is a large share of the catalog, it only
+scores the albums whose descriptor sets are likely to be similar to the selected album's.
+
+Every album's descriptor set is summarized by a MinHash signature of bands * rows hash values, where two albums agree on
+each value with probability equal to the Jaccard similarity of their descriptor sets. The signature is cut into bands
+of rows values, and the albums that agree on every value of at least one band with the selected album are the
+candidates, which are then scored exactly as by DescriptorMatrix. More bands find more of the true recommendations at
+the cost of more candidates to score, and more rows per band find fewer candidates that are not similar. Run
+benchmarks/recall.py to measure the recall and speed of different settings.
+
+When there are fewer candidates than recommendations asked for, the result is filled with the other albums in order of
+prior, which is how they would be scored if they shared no descriptors with the selected album.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import hashlib
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from albums_data import Album
+from descriptor_matrix import DescriptorMatrix
+from scoring import AlbumScorer
+
+MINHASH_BANDS = 32
+MINHASH_ROWS = 2
+
+# The hash functions of the signatures are h(x) = (a * x + b) mod _PRIME, where x is a 31-bit hash of a descriptor, so
+# that a * x + b never overflows an unsigned 64-bit integer.
+_PRIME = (1 << 31) - 1
+
+
+class MinHashIndex(DescriptorMatrix):
+    """An approximate scoring backend that only scores the albums found by locality-sensitive hashing of MinHash
+    signatures.
+
+    Instance Attributes:
+        - bands: The number of bands of each signature
+        - rows: The number of hash values in each band
+        - seed: The seed of the random hash functions
+
+    Representation Invariants:
+        - self.bands > 0
+        - self.rows > 0
+    """
+    bands: int
+    rows: int
+    seed: int
+
+    # Private Instance Attributes:
+    #   - _hash_a: The multipliers of the bands * rows hash functions
+    #   - _hash_b: The increments of the bands * rows hash functions
+    #   - _band_mixers: The odd multipliers used to combine the rows of a band into one 64-bit band key
+    #   - _band_keys: An array of shape (bands, number of indexed albums with descriptors), where each row holds the
+    #       band keys of those albums for one band, in increasing order
+    #   - _band_ids: An array of the same shape, holding the album id of each key in self._band_keys
+    #   - _ids_by_prior: The ids of the indexed albums, sorted from highest to lowest prior, with ties broken by
+    #       popularity
+    _hash_a: np.ndarray
+    _hash_b: np.ndarray
+    _band_mixers: np.ndarray
+    _band_keys: np.ndarray
+    _band_ids: np.ndarray
+    _ids_by_prior: np.ndarray
+
+    def __init__(self, albums: list[Album], scorer: Optional[AlbumScorer] = None, bands: int = MINHASH_BANDS,
+                 rows: int = MINHASH_ROWS, seed: int = 111) -> None:
+        """Initialize a new MinHash index over the given albums, with signatures of bands bands of rows hash values
+        each, scored by scorer. If scorer is None, a scorer with the default weights is built over the albums.
+
+        Preconditions:
+            - scorer is None or scorer.albums is albums
+            - bands > 0
+            - rows > 0
+        """
+        super().__init__(albums, scorer)
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self._hash_a = rng.integers(1, _PRIME, bands * rows, dtype=np.uint64)
+        self._hash_b = rng.integers(0, _PRIME, bands * rows, dtype=np.uint64)
+        self._band_mixers = rng.integers(0, 1 << 63, rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+        # Only the albums with at least one descriptor have a signature, made from the columns of their row.
+        indexed_ids = np.array(sorted(self._ids_by_name.values()), dtype=np.int32)
+        hashed_ids = indexed_ids[np.diff(self.matrix.indptr)[indexed_ids] > 0]
+        descriptor_hashes = np.array(
+            [_hash_descriptor(descriptor) for descriptor in self.descriptor_ids], dtype=np.uint64)
+        column_hashes = self._hash_values(descriptor_hashes)
+        matrix = self.matrix[hashed_ids]
+        signatures = np.empty((len(hashed_ids), bands * rows), dtype=np.uint64)
+        # One hash function at a time, so only one value per stored descriptor is held in memory at once.
+        for i in range(bands * rows):
+            signatures[:, i] = np.minimum.reduceat(column_hashes[matrix.indices, i], matrix.indptr[:-1])
+
+        band_keys = self._band_keys_of(signatures)
+        order = np.argsort(band_keys, axis=1, kind='stable')
+        self._band_keys = np.take_along_axis(band_keys, order, axis=1)
+        self._band_ids = hashed_ids[order]
+        self._ids_by_prior = indexed_ids[np.lexsort((indexed_ids, -self._priors[indexed_ids]))]
+
+    def candidates(self, album: Album) -> np.ndarray:
+        """Return the ids of the indexed albums that agree with album on every hash value of at least one band, in
+        increasing order.
+        """
+        descriptor_hashes = np.array([_hash_descriptor(descriptor) for descriptor in set(album.descriptors)],
+                                     dtype=np.uint64)
+        if len(descriptor_hashes) == 0:
+            return np.zeros(0, dtype=np.int32)
+        signature = self._hash_values(descriptor_hashes).min(axis=0)
+        query_keys = self._band_keys_of(signature[np.newaxis, :])[:, 0]
+
+        matches = []
+        for band in range(self.bands):
+            keys = self._band_keys[band]
+            start, end = np.searchsorted(keys, query_keys[band]), np.searchsorted(keys, query_keys[band], 'right')
+            matches.append(self._band_ids[band, start:end])
+        return np.unique(np.concatenate(matches))
+
+    def recommend(self, album: Album, num_recommendations: int, visited: set[str]) -> list[Album]:
+        """Return at most num_recommendations albums sorted from highest to lowest score as recommendations for album,
+        with ties broken by popularity, only scoring the candidates of album. The returned albums never have the same
+        name as album or a name in visited.
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        if num_recommendations == 0:
+            return []
+
+        candidate_ids = self.candidates(album)
+        scores = self.matrix[candidate_ids] @ self.query_vector(album) + self._priors[candidate_ids]
+        keys = scores * len(self.albums) + self._tie_breaks[candidate_ids]
+        recommendations = []
+        for album_id in candidate_ids[np.argsort(-keys)]:
+            current_album = self.albums[album_id]
+            if current_album.name != album.name and current_album.name not in visited:
+                recommendations.append(current_album)
+                if len(recommendations) == num_recommendations:
+                    return recommendations
+
+        # Every id skipped here is either a candidate, visited, or the album itself, so this loop stops after at most
+        # len(candidate_ids) + len(visited) + 1 + num_recommendations iterations.
+        is_candidate = set(candidate_ids.tolist())
+        for album_id in self._ids_by_prior.tolist():
+            current_album = self.albums[album_id]
+            if album_id not in is_candidate and current_album.name != album.name and current_album.name not in visited:
+                recommendations.append(current_album)
+                if len(recommendations) == num_recommendations:
+                    break
+        return recommendations
+
+    def recommend_many(self, albums: list[Album], num_recommendations: int,
+                       visited: set[str]) -> list[list[Album]]:
+        """Return the recommendations for each album in albums, in the same order. Each album only scores its own
+        candidates, so unlike DescriptorMatrix the albums are not scored together.
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        return [self.recommend(album, num_recommendations, visited) for album in albums]
+
+    def fingerprint(self) -> bytes:
+        """Return a hash of the backend, its number of bands, rows per band and seed, and the settings of its scorer,
+        which changes whenever its recommendations for the same albums could change.
+        """
+        settings = repr((type(self).__name__, self.bands, self.rows, self.seed)).encode('utf8')
+        return hashlib.sha256(settings + self.scorer.fingerprint()).digest()
+
+    def _hash_values(self, descriptor_hashes: np.ndarray) -> np.ndarray:
+        """Return an array of shape (len(descriptor_hashes), bands * rows) with the value of every hash function of the
+        signatures for every descriptor hash.
+        """
+        return (descriptor_hashes[:, np.newaxis] * self._hash_a + self._hash_b) % np.uint64(_PRIME)
+
+    def _band_keys_of(self, signatures: np.ndarray) -> np.ndarray:
+        """Return an array of shape (bands, len(signatures)) with the key of every band of every signature. Signatures
+        that agree on every value of a band have the same key for that band.
+        """
+        banded = signatures.reshape(len(signatures), self.bands, self.rows)
+        keys = (banded * self._band_mixers).sum(axis=2, dtype=np.uint64)
+        return keys.T.copy()
+
+
+def _hash_descriptor(descriptor: str) -> int:
+    """Return a 31-bit hash of descriptor that is the same in every process.
+
+    >>> _hash_descriptor('melancholic') == _hash_descriptor('melancholic')
+    True
+    >>> 0 <= _hash_descriptor('melancholic') < 2 ** 31
+    True
+    """
+    return zlib.crc32(descriptor.encode('utf8')) % _PRIME
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['hashlib', 'zlib', 'numpy', 'albums_data', 'descriptor_matrix', 'scoring'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'disable': ['too-many-arguments'],
+        'max-line-length': 120
+    })
@@ -0,0 +1,159 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Neighbour Table)
+
+Description
+===============================
+
+This Python module contains the NeighbourTable class, a scoring backend for the album recommendation algorithm that
+reads each album's top recommendations from a table computed ahead of time. The table is built offline by running this
+file, which stores the top NEIGHBOUR_TABLE_K recommendations of every album in the catalog in NEIGHBOUR_TABLE_FILE.
+
+Recommendations depend only on the catalog, so an album's recommendations given a visited set are its precomputed
+recommendations with the visited albums skipped. When too many of them have been visited, the table falls back to
+scoring the album against the whole catalog. A table built from a different version of rym_clean1.csv, with different
+scoring weights, or by a different backend than the one it falls back to, is not used at all, so that a table ranked by
+the approximate MinHashIndex is never served as the exact results of a DescriptorIndex or DescriptorMatrix.
+
+The table is stored as a fixed-size header followed by one row of 32-bit album ids per album, padded with -1.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import os
+import struct
+from array import array
+from typing import Optional
+
+from albums_data import ALBUMS_FILE, DATASETS_DIR, Album
+from file_hashing import hash_file
+from recommender import Recommender
+from scoring import AlbumScorer
+
+NEIGHBOUR_TABLE_FILE = os.path.join(DATASETS_DIR, 'neighbour_table.bin')
+NEIGHBOUR_TABLE_K = 50
+
+# The header holds a magic string, the format version, the number of albums, the number of neighbours per album, the
+# SHA-256 hash of the albums CSV the table was built from, and the fingerprint of the recommender that ranked the
+# neighbours, which covers both its backend and its scorer.
+_HEADER = struct.Struct('<4sIII32s32s')
+_MAGIC = b'NBRT'
+_FORMAT_VERSION = 3
+
+
+class NeighbourTable(Recommender):
+    """A table of each album's top recommendations, computed ahead of time.
+
+    Instance Attributes:
+        - albums: The albums in the table, sorted from most to least popular. The id of an album is its index in this
+            list
+        - k: The number of recommendations stored for each album
+        - neighbours: The recommended album ids of every album, k per album, where the recommendations of the album
+            with id i are neighbours[i * k: (i + 1) * k]. Albums with fewer than k recommendations are padded with -1
+        - fallback: The recommender used when the table does not hold enough recommendations for a query
+        - scorer: The descriptor weights and priors the table was ranked with, which are those of self.fallback
+
+    Representation Invariants:
+        - all(self.albums[i].album_id == i for i in range(len(self.albums)))
+        - self.k > 0
+        - len(self.neighbours) == len(self.albums) * self.k
+        - self.fallback.albums is self.albums
+    """
+    albums: list[Album]
+    k: int
+    neighbours: array
+    fallback: Recommender
+    scorer: AlbumScorer
+
+    def __init__(self, albums: list[Album], k: int, neighbours: array, fallback: Recommender) -> None:
+        """Initialize a new neighbour table.
+        """
+        self.albums = albums
+        self.k = k
+        self.neighbours = neighbours
+        self.fallback = fallback
+        self.scorer = fallback.scorer
+
+    def recommend(self, album: Album, num_recommendations: int, visited: set[str]) -> list[Album]:
+        """Return at most num_recommendations albums recommended for album, none of which have a name in visited. The
+        result is the same as self.fallback.recommend(album, num_recommendations, visited).
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        album_id = album.album_id
+        if not 0 <= album_id < len(self.albums) or self.albums[album_id] is not album \
+                or num_recommendations > self.k:
+            return self.fallback.recommend(album, num_recommendations, visited)
+
+        recommendations = []
+        row = self.neighbours[album_id * self.k: (album_id + 1) * self.k]
+        for neighbour_id in row:
+            if neighbour_id == -1:
+                # The row is not full, so there are no more albums left to recommend.
+                return recommendations
+            neighbour = self.albums[neighbour_id]
+            if neighbour.name not in visited:
+                recommendations.append(neighbour)
+                if len(recommendations) == num_recommendations:
+                    return recommendations
+
+        return self.fallback.recommend(album, num_recommendations, visited)
+
+
+def build_neighbour_table(recommender: Recommender, k: int = NEIGHBOUR_TABLE_K, albums_path: str = ALBUMS_FILE,
+                          table_path: str = NEIGHBOUR_TABLE_FILE) -> None:
+    """Compute the top k recommendations of every album in recommender.albums, and save them to table_path along with
+    the hash of albums_path, the CSV file the albums were loaded from, and the fingerprint of recommender.
+
+    Preconditions:
+        - k > 0
+        - all(recommender.albums[i].album_id == i for i in range(len(recommender.albums)))
+    """
+    albums = recommender.albums
+    neighbours = array('i')
+    for album in albums:
+        row = [neighbour.album_id for neighbour in recommender.recommend(album, k, set())]
+        neighbours.extend(row + [-1] * (k - len(row)))
+
+    with open(table_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(albums), k, hash_file(albums_path),
+                             recommender.fingerprint()))
+        neighbours.tofile(f)
+
+
+def load_neighbour_table(fallback: Recommender, albums_path: str = ALBUMS_FILE,
+                         table_path: str = NEIGHBOUR_TABLE_FILE) -> Optional[NeighbourTable]:
+    """Return the neighbour table saved at table_path for the albums in fallback.albums, using fallback for the queries
+    the table cannot answer. Return None if there is no table at table_path, or if the table is stale: it was built
+    from a different version of albums_path, for a different number of albums, or by a different backend or with
+    different settings than fallback, as given by fallback.fingerprint().
+    """
+    try:
+        with open(table_path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size:
+                return None
+            magic, version, num_albums, k, source_hash, fingerprint = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _FORMAT_VERSION or num_albums != len(fallback.albums) \
+                    or source_hash != hash_file(albums_path) or fingerprint != fallback.fingerprint():
+                return None
+            neighbours = array('i')
+            neighbours.fromfile(f, num_albums * k)
+    except (FileNotFoundError, EOFError):
+        return None
+
+    return NeighbourTable(fallback.albums, k, neighbours, fallback)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['struct', 'array', 'albums_data', 'catalog', 'file_hashing', 'recommender', 'scoring'],
+        'allowed-io': ['build_neighbour_table', 'load_neighbour_table'],
+        'max-line-length': 120
+    })
+
+    from catalog import get_catalog
+    build_neighbour_table(get_catalog().live_recommender)
@@ -3,143 +3,70 @@
 Description
 ===============================
 
-This Python module contains the functions used to generate a visualization of the genre tree using ploty and igraph. The
-genres are taken from functions in genres_data.py
+This Python module contains the functions used to generate a visualization of the genre tree, drawn with the shared
+renderer in tree_renderer.py. The genres are taken from the shared catalog in catalog.py. The genre tree views are
+cached with get_genre_tree_figure, so a view that has already been displayed is not rebuilt.
 
 This file is Copyright (c) 2023 David Wu and Kevin Hu.
 """
-import plotly.graph_objects as go
-from igraph import Graph, EdgeSeq
-from genres_data import create_genres, Genre
+from typing import Any, Optional
 
+from catalog import get_catalog
+from figure_cache import FigureCache
+from genres_data import Genre
+from tree_renderer import tree_figure
 
-def plot_default_genre_tree() -> go.Figure:
+GENRE_TREE_CACHE_SIZE = 512
+
+_genre_tree_cache = FigureCache(GENRE_TREE_CACHE_SIZE)
+
+
+def plot_default_genre_tree() -> dict[str, Any]:
     """Obtained and altered from the plotly library for tree-plots, this function plots the genre tree with the root
     being 'Genres', each subgenre is has a parent genre of None. In other words, this function plots the root node of
-    the entire genre tree, as well as its direct subtrees.
+    the entire genre tree, as well as its direct subtrees. The custom data of each genre node is the genre's id, and the
+    custom data of the root node is None.
     """
-    genres = create_genres()
-    G = Graph(directed=True)
-    G.add_vertex('Genres')
-    for genre in genres:
-        if genre.parent_genre is None:
-            G.add_vertex(genre.name)
-            G.add_edge('Genres', genre.name)
-    lay = G.layout('rt')
-    v_label = G.vs['name']
-    position = {k: lay[k] for k in range(len(lay))}
-    Y = [lay[k][1] for k in range(len(lay))]
-    M = max(Y)
-    es = EdgeSeq(G)
-    E = [e.tuple for e in G.es]
-
-    L = len(position)
-    Xn = [position[k][0] for k in range(L)]
-    Yn = [2 * M - position[k][1] for k in range(L)]
-    Xe = []
-    Ye = []
-    for edge in E:
-        Xe += [position[edge[0]][0], position[edge[1]][0], None]
-        Ye += [2 * M - position[edge[0]][1], 2 * M - position[edge[1]][1], None]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=Xe,
-                             y=Ye,
-                             mode='lines',
-                             line=dict(color='rgb(210,210,210)', width=1),
-                             hoverinfo='none'
-                             ))
-    fig.add_trace(go.Scatter(x=Xn,
-                             y=Yn,
-                             text=v_label,
-                             mode='markers+text',
-                             name='Genre',
-                             marker=dict(symbol='circle-dot',
-                                         size=30,
-                                         color='hotpink',
-                                         line=dict(color='rgb(50,50,50)', width=1),
-                                         ),
-                             hoverinfo='text',
-                             opacity=0.8
-                             ))
-
-    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-    fig.for_each_trace(lambda t: t.update(textfont_color='white', opacity=1))
-    fig.update_traces(textposition=improve_text_position(Xn))
-    fig.update_layout(showlegend=False)
-    fig.update_xaxes(visible=False)
-    fig.update_yaxes(visible=False)
-
-    return fig
-
-
-def plot_genre_tree(root_genre: Genre) -> go.Figure:
+    roots = get_catalog().genre_hierarchy.get_roots()
+    return tree_figure([-1] + [0] * len(roots), ['Genres'] + [genre.name for genre in roots],
+                       [None] + [genre.genre_id for genre in roots], 'Genre')
+
+
+def plot_genre_tree(root_genre: Genre) -> dict[str, Any]:
     """Obtained and altered from the plotly library for tree-plots, this function plots the genre tree of the given root
     genre. The root genre is a valid genre in genres_dataset.csv, with its subtrees being subgenres of the root genre.
+    The custom data of each node is the genre's id.
+
+    Preconditions:
+            - root_genre.name in [genre.name for genre in get_catalog().genres]
+    """
+    children = get_catalog().genre_hierarchy.get_children(root_genre.name)
+    return tree_figure([-1] + [0] * len(children), [root_genre.name] + [genre.name for genre in children],
+                       [root_genre.genre_id] + [genre.genre_id for genre in children], 'Genre')
+
+
+def get_genre_tree_figure(root_genre: Optional[Genre]) -> dict[str, Any]:
+    """Return the figure of the genre tree of root_genre, as plotted by plot_genre_tree, or of the default
+    genre tree if root_genre is None. The figure is only plotted the first time it is requested for the current
+    version of the catalog; later requests return the cached figure, which must not be modified.
 
     Preconditions:
-            - root_genre.name in [genre.name for genre in create_genres()]
+        - root_genre is None or root_genre is get_catalog().get_genre(root_genre.genre_id)
     """
-    genres = create_genres()
-    G = Graph(directed=True)
-    G.add_vertex(root_genre.name)
-    for genre in genres:
-        if genre.parent_genre == root_genre.name:
-            G.add_vertex(genre.name)
-            G.add_edge(root_genre.name, genre.name)
-    lay = G.layout('rt')
-    v_label = G.vs['name']
-    position = {k: lay[k] for k in range(len(lay))}
-    Y = [lay[k][1] for k in range(len(lay))]
-    M = max(Y)
-    es = EdgeSeq(G)
-    E = [e.tuple for e in G.es]
-    L = len(position)
-    Xn = [position[k][0] for k in range(L)]
-    Yn = [2 * M - position[k][1] for k in range(L)]
-    Xe = []
-    Ye = []
-    for edge in E:
-        Xe += [position[edge[0]][0], position[edge[1]][0], None]
-        Ye += [2 * M - position[edge[0]][1], 2 * M - position[edge[1]][1], None]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=Xe,
-                             y=Ye,
-                             mode='lines',
-                             line=dict(color='rgb(210,210,210)', width=1),
-                             hoverinfo='none'
-                             ))
-    fig.add_trace(go.Scatter(x=Xn,
-                             y=Yn,
-                             text=v_label,
-                             mode='markers+text',
-                             name='Genre',
-                             marker=dict(symbol='circle-dot',
-                                         size=30,
-                                         color='hotpink',
-                                         line=dict(color='rgb(50,50,50)', width=1),
-                                         ),
-                             hoverinfo='text',
-                             opacity=0.8
-                             ))
-
-    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-    fig.for_each_trace(lambda t: t.update(textfont_color='white', opacity=1))
-    fig.update_traces(textposition=improve_text_position(Xn))
-    fig.update_layout(showlegend=False)
-    fig.update_xaxes(visible=False)
-    fig.update_yaxes(visible=False)
-
-    return fig
-
-
-def improve_text_position(Xn: list) -> list[str]:
-    """This function fixes text overlap issues by alternating between top and bottom text positions (Note: still overlap
-    for some cases).
+    version = get_catalog().version
+    if root_genre is None:
+        return _genre_tree_cache.get_or_create(None, version, plot_default_genre_tree)
+    else:
+        return _genre_tree_cache.get_or_create(root_genre.genre_id, version, lambda: plot_genre_tree(root_genre))
+
+
+def warm_genre_tree_cache() -> None:
+    """Plot and cache the default genre tree and the genre tree of every main genre, so that the first views of the
+    genre explorer are already cached.
     """
-    positions = ['top center', 'bottom center']
-    return ['middle center' if Xn[i] == 0 else positions[i % 2] for i in range(len(Xn))]
+    get_genre_tree_figure(None)
+    for genre in get_catalog().genre_hierarchy.get_roots():
+        get_genre_tree_figure(genre)
 
 
 if __name__ == '__main__':
@@ -149,8 +76,7 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['plotly.graph_objects', 'igraph', 'genres_data'],  # the names (strs) of imported modules
+        'extra-imports': ['catalog', 'figure_cache', 'genres_data', 'tree_renderer'],
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
-        'disable': ['too-many-locals', 'unnecessary-indexing', 'invalid-name'],
         'max-line-length': 120
     })
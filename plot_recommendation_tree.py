@@ -3,25 +3,42 @@
 Description
 ===============================
 
-This Python module contains the functions used to generate a visualization of the genre and album recommendations trees
-using ploty and igraph. The albums are taken from functions in albums_data.py. For the genre recommendation tree, this
-file contains a filtering helper function(filters by genre name). For the album recommendation tree, this file contains
-the helper functions to recursively generate the tree structure and the recommendation algorithm to decide which
-subtrees are added to the tree.
+This Python module contains the functions used to generate a visualization of the genre and album recommendations trees,
+drawn with the shared renderer in tree_renderer.py. The albums are taken from the shared catalog in catalog.py. For the
+genre recommendation tree, this file contains a filtering helper function(filters by genre name). For the album
+recommendation tree, this file contains the helper functions to generate the tree structure level by level and the
+recommendation algorithm to decide which subtrees are added to the tree, and the function used to expand a single node
+of a displayed album recommendation tree without rebuilding the rest of it.
 
 This file is Copyright (c) 2023 David Wu and Kevin Hu.
 """
-import plotly.graph_objects as go
-from igraph import EdgeSeq, Graph
+import time
+from typing import Any, Optional, Union
 
-from albums_data import Album, create_albums
-from genres_data import Genre, create_genres
+from dash import Patch
+
+from albums_data import Album
+from catalog import get_catalog
+from descriptor_index import DescriptorIndex
+from genres_data import Genre
+from recommender import Recommender
 from tree_classes import AlbumTree
+from tree_renderer import tree_figure
+
+ALBUM_TREE_FAN_OUT = 3
+ALBUM_TREE_DEPTH = 2
+ALBUM_TREE_MAX_FAN_OUT = 6
+ALBUM_TREE_MAX_DEPTH = 4
+ALBUM_TREE_NODE_BUDGET = 250
+ALBUM_TREE_TIME_BUDGET = 1.0
+ALBUM_TREE_MIN_SPACING = 0.1
 
 
 def get_albums_by_genre_and_popularity(genre: str, albums_list: list[Album]) -> list[Album]:
     """Given a list of albums sorted from most popular to leat popular and a genre, return a list containing albums with
-    the specified genre(Note that albums from albums data are already sorted by popularity)
+    the specified genre(Note that albums from albums data are already sorted by popularity). This takes time
+    proportional to the length of albums_list; for the albums in the catalog, use get_catalog().get_albums_by_genre
+    instead, which does not scan the albums.
 
     Preconditions:
         - genre != ''
@@ -35,212 +52,205 @@ def get_albums_by_genre_and_popularity(genre: str, albums_list: list[Album]) ->
     return filtered_ablums_list
 
 
-def improve_text_position(Xn: list) -> list[str]:
-    """Fixes text overlap issues by alternating between top and bottom text positions (Note: still overlap for some
-    cases).
-    """
-    positions = ['top center', 'bottom center']
-    return ['middle center' if Xn[i] == 0 else positions[i % 2] for i in range(len(Xn))]
-
-
-def plot_genre_recommendation_tree(selected_genre: Genre) -> go.Figure:
+def plot_genre_recommendation_tree(selected_genre: Genre) -> dict[str, Any]:
     """Obtained and altered from the plotly library for tree-plots, this function plots the genre recommendation tree
-    with the root being the selected genre, and each subtree containg albums of the genre, obtained from
-    get_albums_by_genre_and_popularity
+    with the root being the selected genre, and each subtree containg one of the 10 most popular albums of the genre,
+    obtained from the catalog's genre index. The custom data of each album node is the album's id, and the custom data
+    of the root node is None.
 
     Preconditions:
-        - selected_genre.name in [genre.name for genre in create_genres()]
+        - selected_genre.name in [genre.name for genre in get_catalog().genres]
     """
-    albums = create_albums()
-    G = Graph(directed=True)
-    G.add_vertex(selected_genre.name)
-    top_albums_by_genre = get_albums_by_genre_and_popularity(selected_genre.name, albums)
-    if len(top_albums_by_genre) > 10:
-        for i in range(0, 10):
-            album_name_and_artist = top_albums_by_genre[i].name + ' - ' + top_albums_by_genre[i].artist
-            G.add_vertex(album_name_and_artist)
-            G.add_edge(selected_genre.name, album_name_and_artist)
-    else:
-        for album in top_albums_by_genre:
-            album_name_and_artist = album.name + ' - ' + album.artist
-            G.add_vertex(album_name_and_artist)
-            G.add_edge(selected_genre.name, album_name_and_artist)
-    lay = G.layout('rt')
-    v_label = G.vs['name']
-    position = {k: lay[k] for k in range(len(lay))}
-    Y = [lay[k][1] for k in range(len(lay))]
-    M = max(Y)
-    es = EdgeSeq(G)
-    E = [e.tuple for e in G.es]
-
-    L = len(position)
-    Xn = [position[k][0] for k in range(L)]
-    Yn = [2 * M - position[k][1] for k in range(L)]
-    Xe = []
-    Ye = []
-    for edge in E:
-        Xe += [position[edge[0]][0], position[edge[1]][0], None]
-        Ye += [2 * M - position[edge[0]][1], 2 * M - position[edge[1]][1], None]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=Xe,
-                             y=Ye,
-                             mode='lines',
-                             line=dict(color='rgb(210,210,210)', width=1),
-                             hoverinfo='none'
-                             ))
-    fig.add_trace(go.Scatter(x=Xn,
-                             y=Yn,
-                             text=v_label,
-                             mode='markers+text',
-                             name='bla',
-                             marker=dict(symbol='circle-dot',
-                                         size=30,
-                                         color='hotpink',
-                                         line=dict(color='rgb(50,50,50)', width=1)
-                                         ),
-                             hoverinfo='text',
-                             opacity=0.8
-                             ))
-    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-    fig.for_each_trace(lambda t: t.update(textfont_color='white', opacity=1))
-    fig.update_traces(textposition=improve_text_position(Xn))
-    fig.update_layout(showlegend=False)
-    fig.update_xaxes(visible=False)
-    fig.update_yaxes(visible=False)
-
-    return fig
-
-
-def plot_album_recommendation_tree(selected_album: Album, visited: set[str]) -> go.Figure:
+    top_albums_by_genre = get_catalog().get_albums_by_genre(selected_genre.name, 10)
+    return tree_figure([-1] + [0] * len(top_albums_by_genre),
+                       [selected_genre.name] + [album.name + ' - ' + album.artist for album in top_albums_by_genre],
+                       [None] + [album.album_id for album in top_albums_by_genre], 'bla')
+
+
+def plot_album_recommendation_tree(selected_album: Album, visited: set[str],
+                                   num_recommendations: int = ALBUM_TREE_FAN_OUT, depth: int = ALBUM_TREE_DEPTH,
+                                   expanded: Optional[list[int]] = None,
+                                   nodes: Optional[dict[str, list]] = None) -> dict[str, Any]:
     """Obtained and altered from the plotly library for tree-plots, this function plots the album recommendation tree
     with the root being the selected album, and each subtree containg albums with matching descriptors to the selected
-    album(Note: in some cases there are no matching descriptors). Vertices and edges are obtained after generating the
-    tree structure using generate_album_recommendation_tree, and helper functions get_all_vertices and get_all_branches.
+    album(Note: in some cases there are no matching descriptors). Every album has at most num_recommendations
+    subtrees, and the tree is at most depth levels deep, within the node and time budgets of
+    generate_album_recommendation_tree. If expanded is not None, the ids of the albums whose recommendations are part of
+    the tree are added to it, and if nodes is not None, it is filled in with the nodes of the tree, as
+    expand_album_recommendation_tree expects. The nodes are obtained after generating the tree structure using
+    generate_album_recommendation_tree, and the helper function get_tree_nodes, in the same order as get_all_vertices.
+    The custom data of each node is the album's id. The root is drawn at y = 0, and the albums at depth d below it at
+    y = -d, which expand_album_recommendation_tree relies on.
 
     Preconditions:
-        - selected_album.name in [album.name for album in create_albums()]
+        - selected_album.name in [album.name for album in get_catalog().albums]
+        - num_recommendations >= 0
+        - depth >= 0
     """
-    albums = create_albums()
-    G = Graph(directed=True)
-    # G.add_vertex(selected_album.name)
-    album_tree = generate_album_recommendation_tree(selected_album, albums, 3, 2, visited)
-    edges = get_all_branches(album_tree)
-    vertices = get_all_vertices(album_tree)
-    for vertex in vertices:
-        G.add_vertex(vertex)
-    for edge in edges:
-        G.add_edge(edge[0], edge[1])
-    lay = G.layout('rt')
-    v_label = G.vs['name']
-    position = {k: lay[k] for k in range(len(lay))}
-    Y = [lay[k][1] for k in range(len(lay))]
-    M = max(Y)
-    es = EdgeSeq(G)
-    E = [e.tuple for e in G.es]
-    L = len(position)
-    Xn = [position[k][0] for k in range(L)]
-    Yn = [2 * M - position[k][1] for k in range(L)]
-    Xe = []
-    Ye = []
-    for edge in E:
-        Xe += [position[edge[0]][0], position[edge[1]][0], None]
-        Ye += [2 * M - position[edge[0]][1], 2 * M - position[edge[1]][1], None]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=Xe,
-                             y=Ye,
-                             mode='lines',
-                             line=dict(color='rgb(210,210,210)', width=1),
-                             hoverinfo='none'
-                             ))
-    fig.add_trace(go.Scatter(x=Xn,
-                             y=Yn,
-                             text=v_label,
-                             mode='markers+text',
-                             name='bla',
-                             marker=dict(symbol='circle-dot',
-                                         size=30,
-                                         color='hotpink',
-                                         line=dict(color='rgb(50,50,50)', width=1)
-                                         ),
-                             hoverinfo='text',
-                             opacity=0.8
-                             ))
-    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-    fig.for_each_trace(lambda t: t.update(textfont_color='white', opacity=1))
-    fig.update_traces(textposition=improve_text_position(Xn))
-    fig.update_layout(showlegend=False)
-    fig.update_xaxes(visible=False)
-    fig.update_yaxes(visible=False)
-
-    return fig
-
-
-def get_albums_by_matches(album: Album, albums_list: list[Album], num_recommendations: int,
-                          visited: set[str]) -> list[Album]:
-    """This function performs the main recommendation algorithm. Given an album and a list of albums, return a list
-    sorted based on the number of matching descriptors between ablum and each ablum in albums_list. The returned list is
-    sorted from most to least number of matches. The returned list has length of at most num_recommnedtations, and
-    should not contain any album names matching the valuses in visited.
+    catalog = get_catalog()
+    album_tree = generate_album_recommendation_tree(selected_album, catalog.albums, num_recommendations, depth,
+                                                    visited, catalog.recommender, ALBUM_TREE_NODE_BUDGET,
+                                                    ALBUM_TREE_TIME_BUDGET)
+    if expanded is not None:
+        expanded.extend(get_expanded_album_ids(album_tree))
+    parents, albums = get_tree_nodes(album_tree)
+    figure = tree_figure(parents, [album.name + ' - ' + album.artist for album in albums],
+                         [album.album_id for album in albums], 'bla')
+    if nodes is not None:
+        nodes.update(parents=list(parents), album_ids=[album.album_id for album in albums],
+                     x=list(figure['data'][1]['x']), y=list(figure['data'][1]['y']))
+    return figure
+
+
+def expand_album_recommendation_tree(node: int, visited: set[str], nodes: dict[str, list],
+                                     num_recommendations: int = ALBUM_TREE_FAN_OUT) -> Union[dict[str, Any], Patch]:
+    """Add the recommendations for the album of the given leaf node of a figure returned by
+    plot_album_recommendation_tree as its children, and return the update of the figure. nodes holds the nodes of the
+    figure, in the order they are drawn, as filled in by plot_album_recommendation_tree: the parent index, album id
+    and x and y coordinates of every node, under 'parents', 'album_ids', 'x' and 'y'. Only the album of node is scored.
+    The added nodes are added to nodes, and the names of their albums to visited.
+
+    The figure is drawn with the Reingold-Tilford layout, which leaves at least 1 between neighbouring nodes, but trees
+    cut short by the node budget have leaves at every depth, next to the deeper subtrees of their neighbours. So the
+    children are spread evenly, num_recommendations to a width, over less than half the distance from node to the
+    nearest other node on its level or on the level below, and over less than 1 if there is no such node. The new
+    nodes stay on this node's side of the midpoints to those nodes, so they never overlap the nodes already in the
+    figure, and children added later to a neighbouring node stay on the other side. The new nodes are then returned as
+    a partial update of the figure, which does not move the nodes already in it.
+
+    If that leaves the children less than ALBUM_TREE_MIN_SPACING apart, as under a leaf whose neighbour's subtree
+    reaches below it, the whole tree is laid out again with the children added, and the new figure is returned
+    instead.
 
     Preconditions:
+        - 0 <= node < len(nodes['parents'])
+        - node not in nodes['parents']
+        - get_catalog().get_album(nodes['album_ids'][node]).name in visited
         - num_recommendations > 0
-        - album.name in [album.name for album in create_albums()]
     """
+    catalog = get_catalog()
+    album = catalog.get_album(nodes['album_ids'][node])
+    recommended_albums = get_albums_by_matches(album, catalog.albums, num_recommendations, visited,
+                                               catalog.recommender)
+    visited.update(child.name for child in recommended_albums)
+    x, y = nodes['x'][node], nodes['y'][node]
+    half_width = 0.5
+    for i in range(len(nodes['parents'])):
+        if i != node and nodes['y'][i] in (y, y - 1):
+            half_width = min(half_width, abs(nodes['x'][i] - x) / 2)
+    spacing = 2 * half_width / num_recommendations
+
+    nodes['parents'].extend([node] * len(recommended_albums))
+    nodes['album_ids'].extend(child.album_id for child in recommended_albums)
+    if recommended_albums and spacing < ALBUM_TREE_MIN_SPACING:
+        albums = [catalog.get_album(album_id) for album_id in nodes['album_ids']]
+        figure = tree_figure(nodes['parents'], [album.name + ' - ' + album.artist for album in albums],
+                             nodes['album_ids'], 'bla')
+        nodes.update(x=list(figure['data'][1]['x']), y=list(figure['data'][1]['y']))
+        return figure
+
+    Xn = [x + (i - (len(recommended_albums) - 1) / 2) * spacing for i in range(len(recommended_albums))]
+    Xe = [None] * (3 * len(Xn))
+    Ye = [None] * (3 * len(Xn))
+    Xe[0::3] = [x] * len(Xn)
+    Xe[1::3] = Xn
+    Ye[0::3] = [y] * len(Xn)
+    Ye[1::3] = [y - 1] * len(Xn)
+    nodes['x'].extend(Xn)
+    nodes['y'].extend([y - 1] * len(Xn))
+    positions = ['top center', 'bottom center']
 
-    sorted_matches_list = []
-    album_to_matches = {}
-    max_matches = 0
-
-    for current_album in albums_list:
-        if current_album.name != album.name and current_album.name not in visited:
-            matching_descriptors = set(album.descriptors).intersection(current_album.descriptors)
-            num_matches = len(matching_descriptors)
+    patch = Patch()
+    patch['data'][0]['x'].extend(Xe)
+    patch['data'][0]['y'].extend(Ye)
+    patch['data'][1]['x'].extend(Xn)
+    patch['data'][1]['y'].extend([y - 1] * len(Xn))
+    patch['data'][1]['text'].extend([child.name + ' - ' + child.artist for child in recommended_albums])
+    patch['data'][1]['customdata'].extend([child.album_id for child in recommended_albums])
+    patch['data'][1]['textposition'].extend([positions[i % 2] for i in range(len(Xn))])
 
-            album_to_matches[current_album.name] = (current_album, num_matches)
+    return patch
 
-            if num_matches > max_matches:
-                max_matches = num_matches
 
-    for i in range(max_matches, -1, -1):
-        for album_name in album_to_matches:
-            if album_to_matches[album_name][1] == i:
-                sorted_matches_list.append(album_to_matches[album_name][0])
+def get_albums_by_matches(album: Album, albums_list: list[Album], num_recommendations: int,
+                          visited: set[str], recommender: Optional[Recommender] = None) -> list[Album]:
+    """This function performs the main recommendation algorithm. Given an album and a list of albums, return a list
+    sorted based on the score of each ablum in albums_list as a recommendation for album: the weights of the
+    descriptors it shares with album, plus its rating and popularity prior (see scoring.AlbumScorer). The returned list
+    is sorted from highest to lowest score, with ties broken by popularity. The returned list has length of at most
+    num_recommnedtations, and should not contain any album names matching the valuses in visited.
 
-            if len(sorted_matches_list) == num_recommendations:
-                return sorted_matches_list
+    The scores are computed by recommender, a scoring backend built over albums_list (e.g. a DescriptorIndex, which
+    only adds up the weights of the albums sharing at least one descriptor with album, or a DescriptorMatrix). If
+    recommender is None, a new DescriptorIndex is built from albums_list, which takes time proportional to the size of
+    albums_list; callers making many recommendations should pass in a prebuilt one (e.g. get_catalog().recommender).
 
-    return sorted_matches_list
+    Preconditions:
+        - num_recommendations > 0
+        - album.name in [album.name for album in get_catalog().albums]
+        - recommender is None or recommender.albums is albums_list
+    """
+    if recommender is None:
+        recommender = DescriptorIndex(albums_list)
+    return recommender.recommend(album, num_recommendations, visited)
 
 
 def generate_album_recommendation_tree(root_album: Album, albums_list: list[Album], num_recommendations: int,
-                                       depth: int, visited: set) -> AlbumTree:
-    """This function recursively generates the album recommendation tree. Given a root album and a list of albums,
+                                       depth: int, visited: set, recommender: Optional[Recommender] = None,
+                                       node_budget: Optional[int] = None,
+                                       time_budget: Optional[float] = None) -> AlbumTree:
+    """This function generates the album recommendation tree level by level. Given a root album and a list of albums,
     create a tree starting at root_album with each subtree having at most num_recommendations number of subtrees.
-    Subtrees are determined using the function get_albums_by_matches. The returned tree should be up to the depth
-    specified.
+    Subtrees are determined using the function get_albums_by_matches, with recommender as the scoring backend over
+    albums_list. The returned tree should be up to the depth specified.
+
+    The albums of each level are scored together with recommender.recommend_many. Each album is still given the best
+    recommendations that were not given to an album before it in the same level, by asking for twice as many
+    recommendations as needed and scoring an album again on its own in the rare case that too many of them were taken.
+
+    The tree has at most node_budget albums, and no level after the first is started once time_budget seconds have
+    passed, so large trees are cut short instead of taking too long. Either budget is ignored if it is None.
 
     Preconditions:
         - depth >= 0
         - num_recommendations >= 0
-        - root_album.name in [album.name for album in create_albums()]
+        - root_album.name in [album.name for album in get_catalog().albums]
+        - recommender is None or recommender.albums is albums_list
+        - node_budget is None or node_budget >= 1
     """
+    if recommender is None:
+        recommender = DescriptorIndex(albums_list)
     album_tree = AlbumTree(root_album, [])
-
     if depth == 0:
         return album_tree
-    else:
-        visited.add(root_album.name)
-        recommeneded_albums = get_albums_by_matches(root_album, albums_list, num_recommendations, visited)
-        for album in recommeneded_albums:
-            visited.add(album.name)
 
-        for album in recommeneded_albums:
-            album_tree.add_subtree(generate_album_recommendation_tree(album, albums_list, num_recommendations,
-                                                                      depth - 1, visited))
-
-        return album_tree
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    remaining = None if node_budget is None else node_budget - 1
+    visited.add(root_album.name)
+    level = [album_tree]
+    for level_depth in range(depth):
+        if not level or remaining == 0 or (level_depth > 0 and deadline is not None and time.perf_counter() > deadline):
+            break
+
+        candidates = recommender.recommend_many([tree.root() for tree in level], 2 * num_recommendations, visited)
+        next_level = []
+        for tree, albums in zip(level, candidates):
+            recommended_albums = [album for album in albums if album.name not in visited][:num_recommendations]
+            if len(recommended_albums) < num_recommendations and len(albums) == 2 * num_recommendations:
+                recommended_albums = get_albums_by_matches(tree.root(), albums_list, num_recommendations, visited,
+                                                           recommender)
+            if remaining is not None:
+                recommended_albums = recommended_albums[:remaining]
+                remaining -= len(recommended_albums)
+
+            for album in recommended_albums:
+                visited.add(album.name)
+                subtree = AlbumTree(album, [])
+                tree.add_subtree(subtree)
+                next_level.append(subtree)
+        level = next_level
+
+    return album_tree
 
 
 def get_all_branches(album_tree: AlbumTree) -> list[tuple[str, str]]:
@@ -281,6 +291,36 @@ def get_all_vertices(album_tree: AlbumTree) -> list[str]:
         return vertices
 
 
+def get_tree_nodes(album_tree: AlbumTree) -> tuple[list[int], list[Album]]:
+    """Given a non-empty album tree, return the albums in the tree in the same order as the vertices returned by
+    get_all_vertices, and the index of the parent of each album in that list, where the root has a parent index of -1
+    """
+    parents = []
+    albums = []
+    stack = [(album_tree, -1)]
+    while stack:
+        tree, parent = stack.pop()
+        parents.append(parent)
+        albums.append(tree.root())
+        node = len(albums) - 1
+        stack.extend((subtree, node) for subtree in reversed(tree.get_subtrees()))
+
+    return parents, albums
+
+
+def get_expanded_album_ids(album_tree: AlbumTree) -> list[int]:
+    """Given an album tree, return a list of the ids of the albums in the tree that have at least one subtree
+    """
+    if album_tree.is_empty() or not album_tree.get_subtrees():
+        return []
+    else:
+        album_ids = [album_tree.root().album_id]
+        for subtree in album_tree.get_subtrees():
+            album_ids.extend(get_expanded_album_ids(subtree))
+
+        return album_ids
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod(verbose=True)
@@ -288,7 +328,8 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['plotly.graph_objects', 'igraph', 'albums_data', 'genres_data', 'tree_classes'],
+        'extra-imports': ['dash', 'albums_data', 'catalog', 'descriptor_index',
+                          'genres_data', 'recommender', 'tree_classes', 'tree_renderer'],
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'disable': ['too-many-locals', 'unnecessary-indexing', 'invalid-name', 'unused-import'],
         'max-line-length': 120
@@ -0,0 +1,73 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Recommender)
+
+Description
+===============================
+
+This Python module contains the Recommender class, the interface shared by every scoring backend of the album
+recommendation algorithm. A backend is built once over the catalog's list of albums and then answers recommendation
+queries for any album.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import hashlib
+
+from albums_data import Album
+from scoring import AlbumScorer
+
+
+class Recommender:
+    """An abstract class for the scoring backends of the album recommendation algorithm.
+
+    Every backend must rank albums the same way: from highest to lowest score given by self.scorer, with ties broken
+    by popularity, never returning two albums with the same name, the selected album's name, or a name that has already
+    been visited.
+
+    Instance Attributes:
+        - albums: The albums this recommender was built over, sorted from most to least popular. The id of an album is
+            its index in this list
+        - scorer: The descriptor weights and priors used to score the albums
+
+    Representation Invariants:
+        - self.scorer.albums is self.albums
+    """
+    albums: list[Album]
+    scorer: AlbumScorer
+
+    def recommend(self, album: Album, num_recommendations: int, visited: set[str]) -> list[Album]:
+        """Return at most num_recommendations albums recommended for album, none of which have a name in visited.
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        raise NotImplementedError
+
+    def recommend_many(self, albums: list[Album], num_recommendations: int,
+                       visited: set[str]) -> list[list[Album]]:
+        """Return the recommendations for each album in albums, in the same order. This is equivalent to calling
+        self.recommend on each album with the same visited set, but backends may override it to score every album at
+        once.
+
+        Preconditions:
+            - num_recommendations >= 0
+        """
+        return [self.recommend(album, num_recommendations, visited) for album in albums]
+
+    def fingerprint(self) -> bytes:
+        """Return a hash of the backend and the settings this recommender was built with, which changes whenever its
+        recommendations for the same albums could change. Backends with settings of their own, like the number of bands
+        of an approximate index, add them to the hash.
+        """
+        return hashlib.sha256(type(self).__name__.encode('utf8') + self.scorer.fingerprint()).digest()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['hashlib', 'albums_data', 'scoring'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
@@ -0,0 +1,248 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Scoring)
+
+Description
+===============================
+
+This Python module contains the AlbumScorer class, which defines how relevant each album of the catalog is as a
+recommendation for a selected album. The score of a candidate album is the sum of the weights of the descriptors it
+shares with the selected album, plus a prior for the candidate album that blends its rating and popularity:
+
+    - a descriptor's weight is its inverse document frequency, so sharing a rare descriptor counts for more than
+      sharing one that most albums have
+    - the rating prior is the album's average rating, shrunk towards the catalog's mean rating when the album has few
+      ratings, and scaled to between 0 and 1 over the catalog
+    - the popularity and review priors are the logarithms of the album's rating and review counts, scaled to between
+      0 and 1 over the catalog
+
+Each part is multiplied by its weight in a ScoringWeights. The weights and priors are computed once when the scorer is
+built, from catalog-wide counts that a ScoreStatistics collects while the albums are being loaded, and stored as
+integers in units of 1 / SCORE_SCALE, so that every scoring backend adds up exactly the same scores and ranks albums the
+same way.
+
+The weights used by the catalog are read from the RECOMMENDER_WEIGHTS environment variable, in the form
+'descriptor=1,rating=1,popularity=0.5,reviews=0.25'. Weights that are left out keep their default values.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import hashlib
+import math
+import os
+from array import array
+from collections import Counter
+from typing import Iterable, Optional
+
+from albums_data import Album
+
+SCORE_SCALE = 1000
+RATING_SMOOTHING = 1000
+
+
+class ScoringWeights:
+    """The weights of the parts of an album's score.
+
+    Instance Attributes:
+        - descriptor: The weight of the shared descriptors
+        - rating: The weight of the rating prior
+        - popularity: The weight of the popularity prior, based on the number of ratings
+        - reviews: The weight of the review prior, based on the number of reviews
+
+    Representation Invariants:
+        - self.descriptor >= 0
+        - self.rating >= 0
+        - self.popularity >= 0
+        - self.reviews >= 0
+    """
+    descriptor: float
+    rating: float
+    popularity: float
+    reviews: float
+
+    def __init__(self, descriptor: float = 1.0, rating: float = 1.0, popularity: float = 0.5,
+                 reviews: float = 0.25) -> None:
+        """Initialize new scoring weights with the given values.
+        """
+        self.descriptor = descriptor
+        self.rating = rating
+        self.popularity = popularity
+        self.reviews = reviews
+
+    def as_tuple(self) -> tuple[float, float, float, float]:
+        """Return the descriptor, rating, popularity and review weights.
+
+        >>> ScoringWeights(2.0, 0.0).as_tuple()
+        (2.0, 0.0, 0.5, 0.25)
+        """
+        return self.descriptor, self.rating, self.popularity, self.reviews
+
+
+def parse_weights(text: str) -> ScoringWeights:
+    """Return the scoring weights described by text, a comma-separated list of name=value pairs. Weights that are not
+    in text keep their default values. Raise ValueError if text names an unknown weight or has an invalid value.
+
+    >>> parse_weights('rating=0, reviews=2').as_tuple()
+    (1.0, 0.0, 0.5, 2.0)
+    >>> parse_weights('').as_tuple()
+    (1.0, 1.0, 0.5, 0.25)
+    """
+    weights = ScoringWeights()
+    for pair in text.split(','):
+        if pair.strip() == '':
+            continue
+        name, _, value = pair.partition('=')
+        name = name.strip()
+        if name not in ('descriptor', 'rating', 'popularity', 'reviews'):
+            raise ValueError(f'Unknown scoring weight: {name}')
+        if float(value) < 0:
+            raise ValueError(f'Scoring weights must not be negative: {pair}')
+        setattr(weights, name, float(value))
+    return weights
+
+
+def weights_from_env() -> ScoringWeights:
+    """Return the scoring weights set by the RECOMMENDER_WEIGHTS environment variable, or the default weights if it is
+    not set.
+    """
+    return parse_weights(os.getenv('RECOMMENDER_WEIGHTS', ''))
+
+
+class ScoreStatistics:
+    """The catalog-wide counts the scores are computed from, collected one album at a time.
+
+    Instance Attributes:
+        - num_albums: The number of albums added
+        - document_frequencies: A mapping from each descriptor to the number of albums added with that descriptor
+        - total_ratings: The total number of ratings of the albums added
+        - total_rating_points: The sum of the average rating times the number of ratings of the albums added
+        - most_ratings: The largest number of ratings of an album added
+        - most_reviews: The largest number of reviews of an album added
+
+    Representation Invariants:
+        - self.num_albums >= 0
+        - all(0 < frequency <= self.num_albums for frequency in self.document_frequencies.values())
+    """
+    num_albums: int
+    document_frequencies: Counter[str]
+    total_ratings: int
+    total_rating_points: float
+    most_ratings: int
+    most_reviews: int
+
+    def __init__(self, albums: Iterable[Album] = ()) -> None:
+        """Initialize new statistics of the given albums.
+        """
+        self.num_albums = 0
+        self.document_frequencies = Counter()
+        self.total_ratings = 0
+        self.total_rating_points = 0.0
+        self.most_ratings = 0
+        self.most_reviews = 0
+        for album in albums:
+            self.add_album(album)
+
+    def add_album(self, album: Album) -> None:
+        """Add the counts of album to these statistics.
+        """
+        self.num_albums += 1
+        self.document_frequencies.update(set(album.descriptors))
+        self.total_ratings += album.rating_count
+        self.total_rating_points += album.avg_rating * album.rating_count
+        self.most_ratings = max(self.most_ratings, album.rating_count)
+        self.most_reviews = max(self.most_reviews, album.review_count)
+
+    def mean_rating(self) -> Optional[float]:
+        """Return the mean rating of all the ratings of the albums added, or None if they have no ratings.
+        """
+        return self.total_rating_points / self.total_ratings if self.total_ratings > 0 else None
+
+
+class AlbumScorer:
+    """The precomputed descriptor weights and priors used to score recommendations from a list of albums.
+
+    Instance Attributes:
+        - albums: The albums the scorer was built over. The id of an album is its index in this list
+        - weights: The weights of the parts of the score
+        - descriptor_weights: A mapping from each descriptor of the albums to its weighted inverse document frequency,
+            in units of 1 / SCORE_SCALE
+        - priors: The weighted prior of every album, in units of 1 / SCORE_SCALE, where the prior of the album with id
+            i is priors[i]
+
+    Representation Invariants:
+        - len(self.priors) == len(self.albums)
+        - all(weight >= 0 for weight in self.descriptor_weights.values())
+        - all(prior >= 0 for prior in self.priors)
+    """
+    albums: list[Album]
+    weights: ScoringWeights
+    descriptor_weights: dict[str, int]
+    priors: array
+
+    def __init__(self, albums: list[Album], weights: Optional[ScoringWeights] = None,
+                 statistics: Optional[ScoreStatistics] = None) -> None:
+        """Initialize a new scorer over the given albums with the given weights, or the default weights if weights is
+        None. If statistics is None, the statistics of the albums are collected first.
+
+        Preconditions:
+            - statistics is None or statistics holds the statistics of exactly the albums in albums
+        """
+        weights = weights or ScoringWeights()
+        statistics = statistics or ScoreStatistics(albums)
+        self.albums = albums
+        self.weights = weights
+
+        self.descriptor_weights = {
+            descriptor: round(SCORE_SCALE * weights.descriptor
+                              * (math.log((1 + statistics.num_albums) / (1 + frequency)) + 1))
+            for descriptor, frequency in statistics.document_frequencies.items()}
+
+        ratings = _bayesian_ratings(albums, statistics.mean_rating())
+        lowest_rating, highest_rating = min(ratings, default=0.0), max(ratings, default=0.0)
+        rating_range = highest_rating - lowest_rating or 1.0
+        most_ratings = math.log1p(statistics.most_ratings) or 1.0
+        most_reviews = math.log1p(statistics.most_reviews) or 1.0
+
+        self.priors = array('q', [
+            round(SCORE_SCALE * (weights.rating * (rating - lowest_rating) / rating_range
+                                 + weights.popularity * math.log1p(album.rating_count) / most_ratings
+                                 + weights.reviews * math.log1p(album.review_count) / most_reviews))
+            for album, rating in zip(albums, ratings)])
+
+    def score(self, album: Album, candidate: Album) -> int:
+        """Return the score of candidate as a recommendation for album, in units of 1 / SCORE_SCALE. This is the
+        reference definition of the score; the scoring backends compute the same scores for many candidates at once.
+
+        Preconditions:
+            - self.albums[candidate.album_id] is candidate
+        """
+        shared = set(album.descriptors) & set(candidate.descriptors)
+        descriptor_score = sum(self.descriptor_weights.get(descriptor, 0) for descriptor in shared)
+        return descriptor_score + self.priors[candidate.album_id]
+
+    def fingerprint(self) -> bytes:
+        """Return a hash of the settings this scorer was built with, which changes whenever the scores of the same
+        albums would change.
+        """
+        return hashlib.sha256(repr((SCORE_SCALE, RATING_SMOOTHING, self.weights.as_tuple())).encode('utf8')).digest()
+
+
+def _bayesian_ratings(albums: list[Album], mean_rating: Optional[float]) -> list[float]:
+    """Return the average rating of each album in albums, shrunk towards mean_rating, the mean rating of all the
+    albums, as if each album had RATING_SMOOTHING more ratings equal to the mean. If mean_rating is None, the albums
+    have no ratings and their average ratings are returned as they are.
+    """
+    if mean_rating is None:
+        return [album.avg_rating for album in albums]
+    return [(RATING_SMOOTHING * mean_rating + album.rating_count * album.avg_rating)
+            / (RATING_SMOOTHING + album.rating_count) for album in albums]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['hashlib', 'math', 'os', 'array', 'collections', 'albums_data'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
@@ -0,0 +1,354 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Search Index)
+
+Description
+===============================
+
+This Python module contains the SearchIndex class, a fuzzy search index over names, used by the album and genre
+dropdowns to find the entries matching what the user has typed so far, so that only the best matches are sent to the
+browser instead of every album and genre of the catalog. It also contains the similarity function used to check that
+an album found on Spotify is the album that was searched for.
+
+Names are normalized before they are indexed or searched for: they are lowercased, accents are removed, and they are
+split into words, so 'Beyonce' finds 'Beyoncé' and 'sigur ros' finds 'Sigur Rós'. A word of a query matches a word of
+a name if the name's word contains at least SEARCH_MIN_MATCH of the query word's trigrams, its overlapping
+three-letter pieces, so words with a typo or that have only been partly typed still match. A name matches a query if
+every word of the query matches one of its words. Matches are ranked by the total number of trigrams of the query's
+words found in the words they match. Ties are broken in favour of names equal to the query, then names starting with
+it, so 'rock' finds the genre Rock before Art Rock, and last by their position in the indexed names, which for albums
+is their popularity, so a typo of an artist's name finds their most popular albums first.
+
+The trigrams index the distinct words of the names, which are far fewer than the names, and each word lists the names
+it is in. A query word is first matched against the words, then the query word matching the fewest names gives the
+candidates, which are checked against the other query words. At most SEARCH_CANDIDATES names, taken from the front
+of the index, are looked at for a query, so that a query of very common words stays fast in a catalog of 500,000
+albums. Run benchmarks/search.py to measure the latency of the search.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Iterable
+
+import numpy as np
+
+SEARCH_LIMIT = 20
+SEARCH_MIN_MATCH = 0.5
+SEARCH_EXPANSIONS = 32
+SEARCH_CANDIDATES = 2000
+
+_WORD = re.compile(r'[^\W_]+')
+# Letters that are not split into a plain letter and an accent by Unicode decomposition.
+_PLAIN_LETTERS = str.maketrans({'æ': 'ae', 'œ': 'oe', 'ø': 'o', 'ð': 'd', 'đ': 'd', 'þ': 'th', 'ł': 'l', 'ı': 'i'})
+
+
+class SearchIndex:
+    """A fuzzy word index over a list of names, where each name is identified by its position in the list.
+
+    Instance Attributes:
+        - size: The number of indexed names
+        - min_match: The smallest share of the trigrams of a word of a query that a word of a name must contain to
+            match it
+        - max_expansions: The largest number of words of the indexed names a word of a query is matched with
+        - max_candidates: The largest number of names looked at for one query
+
+    Representation Invariants:
+        - self.size >= 0
+        - 0 < self.min_match <= 1
+        - self.max_expansions > 0
+        - self.max_candidates > 0
+    """
+    size: int
+    min_match: float
+    max_expansions: int
+    max_candidates: int
+
+    # Private Instance Attributes:
+    #   - _word_ids: A mapping from every normalized word of the indexed names to its id
+    #   - _sorted_words: The normalized words of the indexed names, in sorted order
+    #   - _word_ranks: The position in self._sorted_words of the word with each id
+    #   - _word_names: The positions of the names containing each word, as a CSR array: the positions of the names
+    #       containing word i are self._word_names[1][self._word_names[0][i]:self._word_names[0][i + 1]], in
+    #       increasing order
+    #   - _name_words: The ids of the words of each name, in the order they are in the name, as a CSR array in the
+    #       same form as self._word_names
+    #   - _name_lengths: The length of each normalized name, with its words separated by single spaces
+    #   - _trigram_ids: A mapping from every trigram of the words in self._word_ids to its id
+    #   - _trigram_words: The ids of the words containing each trigram, as a CSR array in the same form as
+    #       self._word_names
+    _word_ids: dict[str, int]
+    _sorted_words: list[str]
+    _word_ranks: np.ndarray
+    _word_names: tuple[np.ndarray, np.ndarray]
+    _name_words: tuple[np.ndarray, np.ndarray]
+    _name_lengths: np.ndarray
+    _trigram_ids: dict[str, int]
+    _trigram_words: tuple[np.ndarray, np.ndarray]
+
+    def __init__(self, names: Iterable[str], min_match: float = SEARCH_MIN_MATCH,
+                 max_expansions: int = SEARCH_EXPANSIONS, max_candidates: int = SEARCH_CANDIDATES) -> None:
+        """Initialize a new search index over the given names.
+
+        Preconditions:
+            - 0 < min_match <= 1
+            - max_expansions > 0
+            - max_candidates > 0
+        """
+        self.min_match = min_match
+        self.max_expansions = max_expansions
+        self.max_candidates = max_candidates
+        self._word_ids = {}
+        positions = array('i')
+        word_ids = array('i')
+        name_positions = array('i')
+        name_word_ids = array('i')
+        name_lengths = array('i')
+        self.size = 0
+        for name in names:
+            words = normalize(name)
+            for word in words:
+                name_positions.append(self.size)
+                name_word_ids.append(self._word_ids.setdefault(word, len(self._word_ids)))
+            for word in set(words):
+                positions.append(self.size)
+                word_ids.append(self._word_ids[word])
+            name_lengths.append(sum(len(word) + 1 for word in words) - 1 if words else 0)
+            self.size += 1
+        self._sorted_words = sorted(self._word_ids)
+        self._word_ranks = np.zeros(len(self._word_ids), dtype=np.int32)
+        self._word_ranks[[self._word_ids[word] for word in self._sorted_words]] = np.arange(len(self._sorted_words))
+        self._word_names = _group(word_ids, positions, len(self._word_ids))
+        self._name_words = _group(name_positions, name_word_ids, self.size)
+        self._name_lengths = np.frombuffer(name_lengths, dtype=np.int32)
+
+        self._trigram_ids = {}
+        words = array('i')
+        trigram_ids = array('i')
+        for word, word_id in self._word_ids.items():
+            for trigram in _word_trigrams(word):
+                words.append(word_id)
+                trigram_ids.append(self._trigram_ids.setdefault(trigram, len(self._trigram_ids)))
+        self._trigram_words = _group(trigram_ids, words, len(self._trigram_ids))
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> list[int]:
+        """Return the positions of at most limit names matching query, from best to worst match. If query has no
+        words, the first limit names are returned.
+
+        A name matches query if every word of query matches a word of the name, and is ranked by the total number of
+        trigrams of the words of query found in those words. Ties are broken by whether the normalized name is equal
+        to the normalized query, then by whether it starts with it, and last by position.
+
+        >>> index = SearchIndex(['Abbey Road The Beatles', 'Road to Ruin Ramones', 'Ágætis byrjun Sigur Rós'])
+        >>> index.search('road')
+        [1, 0]
+        >>> SearchIndex(['Industrial Hip Hop', 'Art Rock', 'Hip Hop', 'Rock', 'Rock Opera']).search('hip hop')
+        [2, 0]
+        >>> SearchIndex(['Industrial Hip Hop', 'Art Rock', 'Hip Hop', 'Rock', 'Rock Opera']).search('rock')
+        [3, 4, 1]
+        >>> SearchIndex(['OK Computer Radiohead', 'Kid A Radiohead', 'Amnesiac Radiohead']).search('radiohed')
+        [0, 1, 2]
+        >>> index.search('beatles abey')
+        [0]
+        >>> index.search('sigur ros')
+        [2]
+        >>> index.search('')
+        [0, 1, 2]
+
+        Preconditions:
+            - limit >= 0
+        """
+        normalized_query = normalize(query)
+        query_words = list(dict.fromkeys(normalized_query))
+        if not query_words:
+            return list(range(min(limit, self.size)))
+
+        expansions = []
+        for word in query_words:
+            word_ids, shared = self._expand(word)
+            if len(word_ids) == 0:
+                return []
+            expansions.append((word_ids, shared))
+        # The query word whose matching words are in the fewest names gives the candidates, which are then checked
+        # against the other query words.
+        offsets = self._word_names[0]
+        expansions.sort(key=lambda expansion: (offsets[expansion[0] + 1] - offsets[expansion[0]]).sum())
+
+        candidates, scores = self._candidates(*expansions[0])
+        word_offsets, word_ids = self._name_words
+        for matching_ids, shared in expansions[1:]:
+            # The words of every candidate, and the index of the candidate each word belongs to.
+            lengths = word_offsets[candidates + 1] - word_offsets[candidates]
+            candidate_words = word_ids[np.repeat(word_offsets[candidates] - np.cumsum(lengths) + lengths, lengths)
+                                       + np.arange(lengths.sum())]
+            shared_by_word = np.zeros(len(self._word_ids), dtype=np.int16)
+            shared_by_word[matching_ids] = shared
+            # Every candidate contains a word, so none of the segments reduced over is empty.
+            word_scores = np.maximum.reduceat(shared_by_word[candidate_words], np.cumsum(lengths) - lengths)
+            is_match = word_scores > 0
+            candidates, scores = candidates[is_match], scores[is_match] + word_scores[is_match]
+
+        query_length = sum(len(word) + 1 for word in normalized_query) - 1
+        name_lengths = self._name_lengths[candidates]
+        is_prefix = self._starts_with(candidates, normalized_query)
+        is_exact = is_prefix & (name_lengths == query_length)
+        order = np.lexsort((candidates, ~is_prefix, ~is_exact, -scores))
+        return candidates[order[:limit]].tolist()
+
+    def _starts_with(self, candidates: np.ndarray, query_words: list[str]) -> np.ndarray:
+        """Return whether each of the names at the positions in candidates starts with query_words: whether the words
+        of the name start with every word of query_words but the last, in order, followed by a word starting with the
+        last one.
+
+        Preconditions:
+            - query_words != []
+        """
+        offsets, word_ids = self._name_words
+        starts = offsets[candidates]
+        is_prefix = offsets[candidates + 1] - starts >= len(query_words)
+        for i, word in enumerate(query_words):
+            if not is_prefix.any():
+                break
+            # The names too short to start with query_words are already ruled out, so their words are not used.
+            name_words = word_ids[np.minimum(starts + i, len(word_ids) - 1)]
+            if i < len(query_words) - 1:
+                is_prefix &= name_words == self._word_ids.get(word, -1)
+            else:
+                # The words starting with word are the words sorted from word up to, and not including, the first
+                # word after every word starting with it.
+                first = bisect_left(self._sorted_words, word)
+                end = bisect_left(self._sorted_words, word[:-1] + chr(ord(word[-1]) + 1))
+                ranks = self._word_ranks[name_words]
+                is_prefix &= (first <= ranks) & (ranks < end)
+        return is_prefix
+
+    def _expand(self, word: str) -> tuple[np.ndarray, np.ndarray]:
+        """Return the ids of the words of the indexed names that match word, in increasing order, and the number of
+        trigrams of word that each of them contains. If no word contains self.min_match of the trigrams of word, the
+        words containing half as many are returned instead, so that short words with a typo are still found.
+        """
+        query_trigrams = _word_trigrams(word)
+        offsets, postings = self._trigram_words
+        trigram_ids = [self._trigram_ids[trigram] for trigram in query_trigrams if trigram in self._trigram_ids]
+        trigram_words = sorted((postings[offsets[trigram_id]:offsets[trigram_id + 1]] for trigram_id in trigram_ids),
+                               key=len)
+        for min_match in (self.min_match, self.min_match / 2):
+            min_shared = math.ceil(min_match * len(query_trigrams))
+            # A word containing none of the len(trigram_words) - min_shared + 1 rarest trigrams of word contains fewer
+            # than min_shared of them.
+            num_rarest = len(trigram_words) - min_shared + 1
+            if num_rarest <= 0:
+                continue
+            word_ids = np.sort(np.concatenate(trigram_words[:num_rarest]))
+            word_ids = word_ids[np.concatenate(([True], word_ids[1:] != word_ids[:-1]))]
+
+            shared = np.zeros(len(word_ids), dtype=np.int64)
+            for posting in trigram_words:
+                found = np.searchsorted(posting, word_ids)
+                shared += posting[np.minimum(found, len(posting) - 1)] == word_ids
+            is_match = shared >= min_shared
+            if is_match.any():
+                return word_ids[is_match], shared[is_match]
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+
+    def _candidates(self, word_ids: np.ndarray, shared: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Return the positions of at most self.max_candidates names containing one of the words with the given ids, in
+        increasing order, and the largest number in shared of any of those words each name contains. Only the
+        self.max_expansions words with the most shared trigrams are used, with ties broken by the number of names they
+        are in.
+        """
+        offsets, postings = self._word_names
+        order = np.lexsort((offsets[word_ids] - offsets[word_ids + 1], -shared))[:self.max_expansions]
+        word_ids, shared = word_ids[order], shared[order]
+        starts, ends = offsets[word_ids], offsets[word_ids + 1]
+        # If a word is in at least self.max_candidates names, the first self.max_candidates candidates are all at or
+        # before its self.max_candidates-th name, so the names after it are left out.
+        is_long = ends - starts >= self.max_candidates
+        if is_long.any():
+            last = postings[starts[is_long] + self.max_candidates - 1].min()
+            ends = np.array([start + np.searchsorted(postings[start:end], last, 'right')
+                             for start, end in zip(starts.tolist(), ends.tolist())], dtype=np.int64)
+        positions = np.concatenate([postings[start:end] for start, end in zip(starts.tolist(), ends.tolist())])
+        scores = np.repeat(shared, ends - starts)
+        # The words are sorted from most to least shared trigrams, so a stable sort puts the largest score of each name
+        # first.
+        order = np.argsort(positions, kind='stable')
+        positions, scores = positions[order], scores[order]
+        is_first = np.concatenate(([True], positions[1:] != positions[:-1]))
+        return positions[is_first][:self.max_candidates], scores[is_first][:self.max_candidates]
+
+
+def _group(keys: array, values: array, num_keys: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the values grouped by key, as a CSR array (offsets, grouped) where the values of key i are
+    grouped[offsets[i]:offsets[i + 1]], in the order they are in values.
+    """
+    keys = np.frombuffer(keys, dtype=np.int32)
+    # A stable sort keeps the values of each key in the same order.
+    grouped = np.frombuffer(values, dtype=np.int32)[np.argsort(keys, kind='stable')]
+    offsets = np.zeros(num_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=num_keys), out=offsets[1:])
+    return offsets, grouped
+
+
+def normalize(text: str) -> list[str]:
+    """Return the words of text, lowercased and without accents.
+
+    >>> normalize("Sgt. Pepper's Lonely Hearts Club Band")
+    ['sgt', 'pepper', 's', 'lonely', 'hearts', 'club', 'band']
+    >>> normalize('Ágætis byrjun - Sigur Rós')
+    ['agaetis', 'byrjun', 'sigur', 'ros']
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold().translate(_PLAIN_LETTERS))
+    return _WORD.findall(''.join(char for char in decomposed if not unicodedata.combining(char)))
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the trigrams of the normalized words of text.
+
+    >>> sorted(trigrams('Kid A'))
+    ['  a', '  k', ' a ', ' ki', 'id ', 'kid']
+    """
+    return {trigram for word in normalize(text) for trigram in _word_trigrams(word)}
+
+
+def _word_trigrams(word: str) -> set[str]:
+    """Return the trigrams of word. The word is padded with two spaces in front and one space after it, so that its
+    first letter and its first two letters are trigrams of their own.
+
+    >>> sorted(_word_trigrams('kid'))
+    ['  k', ' ki', 'id ', 'kid']
+    """
+    padded = '  ' + word + ' '
+    return {padded[i:i + 3] for i in range(len(word) + 1)}
+
+
+def similarity(text1: str, text2: str) -> float:
+    """Return the similarity of text1 and text2, from 0 to 1: the number of trigrams they have in common, divided by
+    the number of trigrams in either of them.
+
+    >>> similarity('Björk', 'bjork')
+    1.0
+    >>> similarity('The Beatles', 'Beatles') > 0.5
+    True
+    >>> similarity('Radiohead', '')
+    0.0
+    """
+    trigrams1, trigrams2 = trigrams(text1), trigrams(text2)
+    if not trigrams1 or not trigrams2:
+        return 0.0
+    shared = len(trigrams1 & trigrams2)
+    return shared / (len(trigrams1) + len(trigrams2) - shared)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['math', 're', 'unicodedata', 'array', 'bisect', 'numpy'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
@@ -0,0 +1,183 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Catalog Snapshot)
+
+Description
+===============================
+
+This Python module contains the functions used to compile rym_clean1.csv and genres_dataset.csv into a binary snapshot,
+and to load the albums and genres back from that snapshot. Loading a snapshot is faster than parsing the CSV files,
+which matters when the app is restarted often. The snapshot is built by running this file, or by running
+spotify_prefetch.py, which also stores the Spotify id of every album in the snapshot.
+
+Every string in the datasets is stored once in a string table, and albums and genres refer to their strings by index.
+Loading a snapshot memory-maps it and decodes each distinct string once, so albums share their genre and descriptor
+strings. A snapshot records the hash of the CSV files it was built from, and is ignored if the CSV files have changed.
+
+The snapshot starts with a fixed-size header, followed by these arrays of unsigned 32-bit integers:
+    - the offset of each string in the string data, plus the total length of the string data
+    - the name, artist, rank, release date, Spotify id, average rating in hundredths, rating count and review count of
+      each album, where an album that has not been looked up on Spotify has NO_STRING as its Spotify id
+    - the offset of each album's genres in the album genres array, plus the length of that array
+    - the album genres array
+    - the offset of each album's descriptors in the album descriptors array, plus the length of that array
+    - the album descriptors array
+    - the name and parent genre of each genre, where a genre without a parent genre has NO_STRING as its parent genre
+and ends with the UTF-8 encoded string data.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from typing import Optional
+
+from albums_data import ALBUMS_FILE, DATASETS_DIR, Album, Vocabulary, stream_albums
+from file_hashing import hash_file
+from genres_data import GENRES_FILE, Genre, create_genres
+
+SNAPSHOT_FILE = os.path.join(DATASETS_DIR, 'catalog.snapshot')
+NO_STRING = 0xFFFFFFFF
+
+# The header holds a magic string, the format version, a byte order mark, the hash of the CSV files, and the number of
+# strings, albums and genres in the snapshot. The snapshot stores albums as parsed by albums_data.parse_album_row, so
+# the format version is also bumped whenever the parser changes what it produces from the same rows.
+_HEADER = struct.Struct('<4sII32sIII')
+_MAGIC = b'RYMS'
+_FORMAT_VERSION = 5
+_BYTE_ORDER_MARK = 0x01020304
+
+
+def hash_sources(albums_path: str = ALBUMS_FILE, genres_path: str = GENRES_FILE) -> bytes:
+    """Return a hash of the contents of the albums and genres CSV files.
+    """
+    return hashlib.sha256(hash_file(albums_path) + hash_file(genres_path)).digest()
+
+
+def build_snapshot(snapshot_path: str = SNAPSHOT_FILE,
+                   spotify_ids: Optional[dict[tuple[str, str], Optional[str]]] = None) -> None:
+    """Parse rym_clean1.csv and genres_dataset.csv, and save them as a snapshot at snapshot_path. The albums are
+    streamed from rym_clean1.csv straight into the snapshot's arrays, so they are never all held as Album objects.
+
+    spotify_ids maps the name and artist of albums to their Spotify id, or to None if they are not on Spotify, as
+    returned by spotify_prefetch.prefetch_spotify_ids. Albums missing from spotify_ids are saved as not looked up.
+    """
+    genres = create_genres()
+    table = Vocabulary()
+
+    album_fields = array('I')
+    genre_offsets, album_genres = array('I', [0]), array('I')
+    descriptor_offsets, album_descriptors = array('I', [0]), array('I')
+    spotify_ids = spotify_ids or {}
+    for album in stream_albums(ALBUMS_FILE):
+        key = (album.name, album.artist)
+        spotify_id = NO_STRING if key not in spotify_ids else table.add(spotify_ids[key] or '')
+        album_fields.extend([table.add(album.name), table.add(album.artist), album.rank, table.add(album.release),
+                             spotify_id, round(album.avg_rating * 100), album.rating_count, album.review_count])
+        album_genres.extend(table.add(genre) for genre in album.genres)
+        genre_offsets.append(len(album_genres))
+        album_descriptors.extend(table.add(descriptor) for descriptor in album.descriptors)
+        descriptor_offsets.append(len(album_descriptors))
+
+    genre_fields = array('I')
+    for genre in genres:
+        parent = NO_STRING if genre.parent_genre is None else table.add(genre.parent_genre)
+        genre_fields.extend([table.add(genre.name), parent])
+
+    string_offsets, string_data = array('I', [0]), bytearray()
+    for string in table.words:
+        string_data += string.encode('utf8')
+        string_offsets.append(len(string_data))
+
+    with open(snapshot_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, _BYTE_ORDER_MARK, hash_sources(), len(table.words),
+                             len(genre_offsets) - 1, len(genres)))
+        for section in (string_offsets, album_fields, genre_offsets, album_genres, descriptor_offsets,
+                        album_descriptors, genre_fields):
+            section.tofile(f)
+        f.write(string_data)
+
+
+def load_snapshot(snapshot_path: str = SNAPSHOT_FILE) -> Optional[tuple[list[Album], list[Genre]]]:
+    """Return the albums and genres saved in the snapshot at snapshot_path, in the same form as create_albums and
+    create_genres. Return None if there is no snapshot at snapshot_path, if the snapshot is stale: it was built from
+    different CSV files, or by a different version of this module, or if it is truncated or corrupted, like a snapshot
+    that was only partly written.
+    """
+    try:
+        with open(snapshot_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if len(data) < _HEADER.size:
+                return None
+            magic, version, byte_order_mark, source_hash, num_strings, num_albums, num_genres = \
+                _HEADER.unpack_from(data)
+            if magic != _MAGIC or version != _FORMAT_VERSION or byte_order_mark != _BYTE_ORDER_MARK \
+                    or source_hash != hash_sources():
+                return None
+            return _decode_snapshot(data, num_strings, num_albums, num_genres)
+    except (FileNotFoundError, ValueError, IndexError, struct.error):
+        return None
+
+
+def _decode_snapshot(data: mmap.mmap, num_strings: int, num_albums: int,
+                     num_genres: int) -> tuple[list[Album], list[Genre]]:
+    """Return the albums and genres stored in the body of the snapshot in data. Raise ValueError if the body is
+    shorter than its header and arrays say it is.
+    """
+    num_words = (len(data) - _HEADER.size) // 4
+    position = 0
+
+    def read(length: int) -> list[int]:
+        """Return the next length integers in the snapshot."""
+        nonlocal position
+        if position + length > num_words:
+            raise ValueError('Truncated snapshot')
+        start = _HEADER.size + 4 * position
+        position += length
+        return array('I', data[start: start + 4 * length]).tolist()
+
+    string_offsets = read(num_strings + 1)
+    album_fields = read(8 * num_albums)
+    genre_offsets = read(num_albums + 1)
+    album_genres = read(genre_offsets[-1])
+    descriptor_offsets = read(num_albums + 1)
+    album_descriptors = read(descriptor_offsets[-1])
+    genre_fields = read(2 * num_genres)
+
+    # The string data is copied out of data, so that no view of the memory map is left open if decoding fails.
+    string_data = memoryview(data[_HEADER.size + 4 * position:])
+    if len(string_data) < string_offsets[-1]:
+        raise ValueError('Truncated snapshot')
+    strings = [str(string_data[string_offsets[i]: string_offsets[i + 1]], 'utf8') for i in range(num_strings)]
+
+    album_genres = [strings[j] for j in album_genres]
+    album_descriptors = [strings[j] for j in album_descriptors]
+    albums = []
+    for i in range(num_albums):
+        name, artist, rank, release, spotify_id, rating, rating_count, review_count = album_fields[8 * i: 8 * i + 8]
+        albums.append(Album(strings[name], strings[artist], album_genres[genre_offsets[i]: genre_offsets[i + 1]], rank,
+                            strings[release], album_descriptors[descriptor_offsets[i]: descriptor_offsets[i + 1]], i,
+                            None if spotify_id == NO_STRING else strings[spotify_id], rating / 100, rating_count,
+                            review_count))
+
+    genres = []
+    for i in range(num_genres):
+        name, parent = genre_fields[2 * i: 2 * i + 2]
+        genres.append(Genre(strings[name], None if parent == NO_STRING else strings[parent], i))
+
+    return albums, genres
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['hashlib', 'mmap', 'struct', 'array', 'albums_data', 'file_hashing', 'genres_data'],
+        'allowed-io': ['build_snapshot', 'load_snapshot'],
+        'disable': ['too-many-locals'],
+        'max-line-length': 120
+    })
+
+    build_snapshot()
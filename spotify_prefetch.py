@@ -0,0 +1,279 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Spotify Prefetch)
+
+Description
+===============================
+
+This Python module contains the batch job that finds the Spotify album id of every album in the catalog ahead of time,
+and stores the ids in the catalog snapshot. When the app is started from that snapshot, clicking on an album embeds its
+Spotify player without searching Spotify.
+
+Albums are searched for with the same queries as the app, by a bounded pool of worker threads. All workers share one
+rate limiter, and when Spotify answers with a 429 response every worker waits for the time given in its Retry-After
+header before searching again. Every result is saved in the SQLite cache of a SpotifyResolver as soon as it is found,
+and albums that are already cached are not searched for again, so an interrupted run continues where it stopped.
+
+The job is run with:
+
+    python spotify_prefetch.py
+
+It searches the real Spotify Web API using the SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET environment variables,
+unless the SPOTIFY_API_PREFIX environment variable is set, in which case it searches the server at that prefix instead,
+such as the stub server in spotify_stub.py.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Optional
+
+import requests
+import spotipy
+import urllib3
+from dotenv import load_dotenv
+from spotipy import SpotifyClientCredentials
+
+from albums_data import Album
+from spotify_resolver import SpotifyResolver
+
+SPOTIFY_PREFETCH_WORKERS = 8
+SPOTIFY_REQUESTS_PER_SECOND = 10.0
+SPOTIFY_MAX_RETRIES = 5
+SPOTIFY_BACKOFF = 1.0
+
+
+class RateLimiter:
+    """A token bucket limiting how often requests are sent, shared by every thread sending requests.
+
+    Instance Attributes:
+        - rate: The number of requests allowed per second
+        - burst: The number of requests that can be sent at once after the limiter has been idle
+        - clock: A function returning the current time in seconds
+        - sleep: A function waiting for the given number of seconds
+
+    Representation Invariants:
+        - self.rate > 0
+        - self.burst >= 1
+    """
+    rate: float
+    burst: float
+    clock: Callable[[], float]
+    sleep: Callable[[float], None]
+
+    # Private Instance Attributes:
+    #   - _tokens: The number of requests that can be sent right now
+    #   - _updated: The time self._tokens was last updated
+    #   - _paused_until: The time before which no request can be sent
+    #   - _lock: A lock held while reading or updating the other private attributes
+    _tokens: float
+    _updated: float
+    _paused_until: float
+    _lock: threading.Lock
+
+    def __init__(self, rate: float, burst: float = 1.0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """Initialize a new rate limiter allowing rate requests per second, in bursts of at most burst requests.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = burst
+        self._updated = clock()
+        self._paused_until = self._updated
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait until a request can be sent, and count it as sent.
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            self.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Stop any request from being sent for the next seconds seconds.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+            self._tokens = 0
+
+
+class RateLimitedClient:
+    """A Spotify client that sends its searches through a rate limiter, and retries searches that are answered with a
+    429 response after waiting for the time given in the response's Retry-After header.
+
+    Instance Attributes:
+        - client: The Spotify client sending the searches, like a spotipy.Spotify
+        - limiter: The rate limiter shared by every search
+        - max_retries: The number of times a search is retried before its 429 response is raised
+        - backoff: The number of seconds waited before the first retry when a 429 response has no Retry-After header,
+            doubled on every later retry
+
+    Representation Invariants:
+        - self.max_retries >= 0
+        - self.backoff >= 0
+    """
+    client: Any
+    limiter: RateLimiter
+    max_retries: int
+    backoff: float
+
+    def __init__(self, client: Any, limiter: RateLimiter, max_retries: int = SPOTIFY_MAX_RETRIES,
+                 backoff: float = SPOTIFY_BACKOFF) -> None:
+        """Initialize a new rate limited client sending its searches with client.
+        """
+        self.client = client
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def search(self, q: str, type: str = 'album') -> dict:
+        """Return the results of searching Spotify for q, in the same format as spotipy.Spotify.search.
+        """
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            try:
+                return self.client.search(q=q, type=type)
+            except spotipy.SpotifyException as error:
+                if error.http_status != 429 or attempt == self.max_retries:
+                    raise
+                self.limiter.pause(self._retry_delay(error, attempt))
+                attempt += 1
+
+    def _retry_delay(self, error: spotipy.SpotifyException, attempt: int) -> float:
+        """Return the number of seconds to wait before retrying a search that was answered with the 429 response in
+        error, on the given attempt.
+        """
+        retry_after = (error.headers or {}).get('Retry-After')
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return self.backoff * 2 ** attempt
+
+
+def prefetch_spotify_ids(albums: list[Album], resolver: SpotifyResolver, max_workers: int = SPOTIFY_PREFETCH_WORKERS,
+                         progress_every: int = 1000) -> dict[tuple[str, str], Optional[str]]:
+    """Return a mapping from the name and artist of every album in albums to its Spotify id, or None if it is not on
+    Spotify, searching for albums that are not cached by resolver with max_workers worker threads. Progress is printed
+    every progress_every albums.
+
+    Albums whose search keeps failing are left out of the mapping, and are searched for again on the next run.
+
+    Preconditions:
+        - max_workers > 0
+        - progress_every > 0
+    """
+    spotify_ids = {}
+    pending = []
+    for key in dict.fromkeys((album.name, album.artist) for album in albums):
+        found, spotify_id = resolver.lookup(*key)
+        if found:
+            spotify_ids[key] = spotify_id
+        else:
+            pending.append(key)
+    print(f'{len(spotify_ids)} albums already cached, {len(pending)} albums to search for')
+
+    total = len(spotify_ids) + len(pending)
+    failed = 0
+    running: dict[Future, tuple[str, str]] = {}
+    queue = iter(pending)
+    with ThreadPoolExecutor(max_workers) as executor:
+        while True:
+            # Only a few searches are queued at a time, so a large catalog does not create a future for every album.
+            for key in islice(queue, 4 * max_workers - len(running)):
+                running[executor.submit(resolver.resolve, *key)] = key
+            if not running:
+                break
+            previous = len(spotify_ids) + failed
+            failed += _collect(running, spotify_ids)
+            if (len(spotify_ids) + failed) // progress_every != previous // progress_every:
+                print(f'{len(spotify_ids) + failed} of {total} albums resolved')
+
+    print(f'{len(spotify_ids)} albums resolved, {sum(i is None for i in spotify_ids.values())} not on Spotify, '
+          f'{failed} failed')
+    return spotify_ids
+
+
+def _collect(running: dict[Future, tuple[str, str]], spotify_ids: dict[tuple[str, str], Optional[str]]) -> int:
+    """Wait for at least one of the searches in running to finish, remove the finished searches from running, and add
+    their results to spotify_ids. Return the number of finished searches that failed.
+    """
+    done, _ = wait(running, return_when=FIRST_COMPLETED)
+    failed = 0
+    for future in done:
+        key = running.pop(future)
+        try:
+            spotify_ids[key] = future.result()
+        except Exception:
+            failed += 1
+    return failed
+
+
+def create_spotify_session() -> requests.Session:
+    """Return the requests session used by the prefetch client. Server errors are retried with a short backoff, but 429
+    responses are not retried and their Retry-After header is ignored, so that they are raised with their headers and
+    reach the shared rate limiter, which makes every worker wait instead of only the one that was answered with a 429.
+    """
+    retry = urllib3.Retry(total=SPOTIFY_MAX_RETRIES, connect=None, read=False, allowed_methods=frozenset(['GET']),
+                          status=SPOTIFY_MAX_RETRIES, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+                          respect_retry_after_header=False)
+    adapter = requests.adapters.HTTPAdapter(max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def create_spotify_client(prefix: Optional[str] = None) -> spotipy.Spotify:
+    """Return a Spotify client using create_spotify_session, that searches the server at prefix if it is not None, or
+    else the Spotify Web API, authenticated with the client credentials in the environment.
+    """
+    if prefix is not None:
+        client = spotipy.Spotify(auth='stub', requests_session=create_spotify_session())
+        client.prefix = prefix
+        return client
+    return spotipy.Spotify(auth_manager=SpotifyClientCredentials(), requests_session=create_spotify_session())
+
+
+def create_prefetch_client() -> RateLimitedClient:
+    """Return a rate limited client searching the server at the SPOTIFY_API_PREFIX environment variable if it is set,
+    or else the Spotify Web API, authenticated with the client credentials in the environment.
+    """
+    load_dotenv()
+    return RateLimitedClient(create_spotify_client(os.getenv('SPOTIFY_API_PREFIX') or None),
+                             RateLimiter(SPOTIFY_REQUESTS_PER_SECOND))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['os', 'threading', 'time', 'concurrent.futures', 'itertools', 'requests', 'spotipy',
+                          'urllib3', 'dotenv', 'albums_data', 'spotify_resolver', 'catalog', 'snapshot'],
+        'allowed-io': ['prefetch_spotify_ids'],
+        'disable': ['redefined-builtin', 'broad-exception-caught'],
+        'max-line-length': 120
+    })
+
+    from catalog import get_catalog
+    from snapshot import build_snapshot
+
+    prefetch_resolver = SpotifyResolver(create_prefetch_client())
+    build_snapshot(spotify_ids=prefetch_spotify_ids(get_catalog().albums, prefetch_resolver))
+    prefetch_resolver.close()
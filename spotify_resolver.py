@@ -0,0 +1,273 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Spotify Resolver)
+
+Description
+===============================
+
+This Python module contains the SpotifyResolver class, which finds the Spotify album id of an album in the catalog so
+that a Spotify player can be embedded for it. Resolved ids are cached in memory and in a local SQLite database, so an
+album is only searched for on Spotify once. Albums that cannot be found are cached too, for a shorter time.
+
+Spotify's search also returns albums that only partly match the query, so an album found by a search is only used if
+one of its artists is similar enough to the album's artist, as measured by search_index.similarity. This ignores
+differences in case, accents and punctuation, so 'Bjork' still finds Björk's albums.
+
+Searches can also be run on a small pool of background threads with resolve_in_background, so that the app can
+answer a click right away and show the Spotify player once its id has been found.
+
+The resolver works with any client that has the same search method as spotipy.Spotify, so it can be used with a fake
+client that does not need a network connection.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from albums_data import DATASETS_DIR
+from search_index import similarity
+
+SPOTIFY_CACHE_FILE = os.path.join(DATASETS_DIR, 'spotify_cache.sqlite3')
+SPOTIFY_CACHE_SIZE = 4096
+SPOTIFY_CACHE_TTL = 30 * 24 * 60 * 60
+SPOTIFY_MISS_TTL = 24 * 60 * 60
+SPOTIFY_BACKGROUND_WORKERS = 4
+SPOTIFY_MIN_SIMILARITY = 0.5
+
+
+def spotify_queries(album_name: str, album_artist: str) -> list[str]:
+    """Return the Spotify search queries used to find the album with the given name and artist, in the order they should
+    be tried. Duplicate queries are left out.
+
+    >>> spotify_queries('Kid A', 'Radiohead')
+    ['album:Kid A artist:Radiohead', 'album:Kid A']
+    >>> spotify_queries('Enter the Wu-Tang (36 Chambers)', 'Wu-Tang Clan')[2:]
+    ['album:Enter the Wu-Tang artist:Wu-Tang Clan', 'album:36 Chambers artist:Wu-Tang Clan']
+    """
+    queries = ['album:' + album_name + ' artist:' + album_artist,
+               'album:' + album_name,
+               'album:' + album_name.split(' (')[0] + ' artist:' + album_artist]
+    if '(' in album_name:
+        queries.append('album:' + album_name.split('(')[1].split(')')[0] + ' artist:' + album_artist)
+
+    return list(dict.fromkeys(queries))
+
+
+def search_album_id(client: Any, album_name: str, album_artist: str) -> Optional[str]:
+    """Return the Spotify id of the first album by album_artist found by trying each of the queries from
+    spotify_queries with client, or None if none of the queries found one. An album found on Spotify is by album_artist
+    if the similarity of one of its artists to album_artist is at least SPOTIFY_MIN_SIMILARITY.
+    """
+    for query in spotify_queries(album_name, album_artist):
+        results = client.search(q=query, type='album')
+        for item in results['albums']['items']:
+            if any(similarity(artist['name'], album_artist) >= SPOTIFY_MIN_SIMILARITY for artist in item['artists']):
+                return item['id']
+    return None
+
+
+class SpotifyResolver:
+    """A cache of the Spotify album ids of albums, in front of a Spotify client.
+
+    Lookups are answered from an in-memory least-recently-used cache, then from a SQLite database, and only then by
+    searching Spotify. Concurrent lookups of the same album share one search.
+
+    Instance Attributes:
+        - client: The Spotify client used to search for albums, like a spotipy.Spotify
+        - store_path: The path of the SQLite database the cache is saved in, or None if the cache is only kept in memory
+        - max_entries: The maximum number of albums kept in the in-memory cache
+        - ttl: The number of seconds a found album id is cached for
+        - miss_ttl: The number of seconds an album that could not be found is cached for
+        - clock: A function returning the current time in seconds
+        - background_workers: The number of threads searching Spotify for resolve_in_background
+
+    Representation Invariants:
+        - self.max_entries > 0
+        - self.ttl > 0
+        - self.miss_ttl > 0
+        - self.background_workers > 0
+    """
+    client: Any
+    store_path: Optional[str]
+    max_entries: int
+    ttl: float
+    miss_ttl: float
+    clock: Callable[[], float]
+    background_workers: int
+
+    # Private Instance Attributes:
+    #   - _entries: The in-memory cache, mapping the name and artist of each album to its Spotify id (or None if it
+    #       could not be found) and the time the entry expires, from least to most recently used
+    #   - _in_flight: A mapping from the name and artist of each album currently being searched for to the future
+    #       holding the result of the search
+    #   - _db: The connection to the SQLite database, or None if it has not been opened yet. The connection is only
+    #       opened when it is first needed, so a resolver created before a server forks its worker processes does not
+    #       share one connection between the processes
+    #   - _executor: The thread pool running the searches started by resolve_in_background, or None if none have been
+    #       started yet
+    #   - _lock: A lock held while reading or updating the other private attributes
+    _entries: OrderedDict[tuple[str, str], tuple[Optional[str], float]]
+    _in_flight: dict[tuple[str, str], Future]
+    _db: Optional[sqlite3.Connection]
+    _executor: Optional[ThreadPoolExecutor]
+    _lock: threading.Lock
+
+    def __init__(self, client: Any, store_path: Optional[str] = SPOTIFY_CACHE_FILE,
+                 max_entries: int = SPOTIFY_CACHE_SIZE, ttl: float = SPOTIFY_CACHE_TTL,
+                 miss_ttl: float = SPOTIFY_MISS_TTL, clock: Callable[[], float] = time.time,
+                 background_workers: int = SPOTIFY_BACKGROUND_WORKERS) -> None:
+        """Initialize a new resolver using client. The cache is saved in a SQLite database at store_path, or only kept
+        in memory if store_path is None.
+        """
+        self.client = client
+        self.store_path = store_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.clock = clock
+        self.background_workers = background_workers
+        self._executor = None
+        self._db = None
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, album_name: str, album_artist: str) -> Optional[str]:
+        """Return the Spotify id of the album with the given name and artist, or None if it cannot be found on Spotify.
+
+        If another thread is already searching for the same album, wait for its result instead of searching again.
+        """
+        key = (album_name, album_artist)
+        with self._lock:
+            found, spotify_id = self._get_cached(key)
+            if found:
+                return spotify_id
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            spotify_id = search_album_id(self.client, album_name, album_artist)
+            self.store(album_name, album_artist, spotify_id)
+        except Exception as error:
+            # Errors are not cached, so the next lookup of this album searches again.
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(spotify_id)
+            return spotify_id
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def resolve_in_background(self, album_name: str, album_artist: str) -> Future:
+        """Start resolving the Spotify id of the album with the given name and artist on a background thread, and return
+        a future holding the id, or None if the album cannot be found on Spotify.
+
+        Once the future is done, the result can also be read with lookup, from any thread.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.background_workers, thread_name_prefix='spotify-resolver')
+            executor = self._executor
+        return executor.submit(self.resolve, album_name, album_artist)
+
+    def lookup(self, album_name: str, album_artist: str) -> tuple[bool, Optional[str]]:
+        """Return whether the album with the given name and artist is cached, and its cached Spotify id (None if it is
+        not cached, or if it is cached as not found). This never searches Spotify.
+        """
+        with self._lock:
+            return self._get_cached((album_name, album_artist))
+
+    def store(self, album_name: str, album_artist: str, spotify_id: Optional[str]) -> None:
+        """Cache spotify_id as the Spotify id of the album with the given name and artist, or cache the album as not
+        found if spotify_id is None.
+        """
+        key = (album_name, album_artist)
+        expires_at = self.clock() + (self.ttl if spotify_id is not None else self.miss_ttl)
+        with self._lock:
+            self._remember(key, spotify_id, expires_at)
+            db = self._database()
+            if db is not None:
+                db.execute('INSERT OR REPLACE INTO spotify_albums VALUES (?, ?, ?, ?)',
+                           (album_name, album_artist, spotify_id, expires_at))
+                db.commit()
+
+    def close(self) -> None:
+        """Wait for the searches started by resolve_in_background to finish, and close the connection to the SQLite
+        database. The cache is only kept in memory afterwards.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+        with self._lock:
+            self.store_path = None
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _get_cached(self, key: tuple[str, str]) -> tuple[bool, Optional[str]]:
+        """Return whether key is cached and not expired, and its cached Spotify id, looking in the in-memory cache and
+        then in the database. self._lock must be held.
+        """
+        now = self.clock()
+        if key in self._entries:
+            spotify_id, expires_at = self._entries[key]
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return True, spotify_id
+            del self._entries[key]
+
+        db = self._database()
+        if db is not None:
+            row = db.execute('SELECT spotify_id, expires_at FROM spotify_albums WHERE name = ? AND artist = ?',
+                             key).fetchone()
+            if row is not None and row[1] > now:
+                self._remember(key, row[0], row[1])
+                return True, row[0]
+
+        return False, None
+
+    def _database(self) -> Optional[sqlite3.Connection]:
+        """Return the connection to the SQLite database, opening it if it is not open yet, or None if the cache is only
+        kept in memory. self._lock must be held.
+        """
+        if self._db is None and self.store_path is not None:
+            self._db = sqlite3.connect(self.store_path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS spotify_albums (name TEXT NOT NULL, artist TEXT NOT NULL, '
+                             'spotify_id TEXT, expires_at REAL NOT NULL, PRIMARY KEY (name, artist))')
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key: tuple[str, str], spotify_id: Optional[str], expires_at: float) -> None:
+        """Add key to the in-memory cache, removing the least recently used entry if it is full. self._lock must be
+        held.
+        """
+        self._entries[key] = (spotify_id, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['os', 'sqlite3', 'threading', 'time', 'collections', 'concurrent.futures', 'albums_data',
+                          'search_index'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'disable': ['too-many-arguments', 'broad-exception-caught'],
+        'max-line-length': 120
+    })
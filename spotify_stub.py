@@ -0,0 +1,214 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Spotify Stub Server)
+
+Description
+===============================
+
+This Python module contains SpotifyStubServer, a local HTTP server that imitates the album search endpoint of the
+Spotify Web API. It is used to run and test spotify_prefetch without a Spotify account or a network connection.
+
+The stub knows a fixed set of albums, and answers searches of the form 'album:<name> artist:<artist>' or
+'album:<name>' with the matching album, in the same JSON format as Spotify. Every album gets a made-up Spotify id that
+is derived from its name and artist, and about one album in ten is treated as not being on Spotify, so that albums
+that cannot be found are exercised too. The stub can also be limited to a number of requests per second, and answers
+any request over the limit with a 429 response and a Retry-After header, like Spotify does.
+
+Running this file serves the albums of the catalog on port 8765. To pre-resolve the catalog against it, run
+spotify_prefetch.py with the SPOTIFY_API_PREFIX environment variable set to the prefix printed by the stub.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+SPOTIFY_STUB_PORT = 8765
+
+_BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def stub_spotify_id(album_name: str, album_artist: str) -> Optional[str]:
+    """Return the made-up Spotify id the stub gives the album with the given name and artist, or None if the stub
+    treats the album as not being on Spotify.
+
+    >>> stub_spotify_id('Kid A', 'Radiohead') == stub_spotify_id('Kid A', 'Radiohead')
+    True
+    >>> len(stub_spotify_id('Kid A', 'Radiohead'))
+    22
+    """
+    digest = hashlib.sha256((album_name + '\n' + album_artist).encode('utf8')).digest()
+    if digest[0] % 10 == 0:
+        return None
+    number = int.from_bytes(digest[1:], 'big')
+    characters = []
+    for _ in range(22):
+        number, digit = divmod(number, 62)
+        characters.append(_BASE62[digit])
+    return ''.join(characters)
+
+
+class SpotifyStubServer:
+    """A local server imitating the album search endpoint of the Spotify Web API.
+
+    Instance Attributes:
+        - max_requests_per_second: The number of searches answered per second before answering with 429 responses,
+            or None if searches are never rate limited
+        - retry_after: The number of seconds sent in the Retry-After header of 429 responses
+        - requests_served: The number of searches answered with search results
+        - requests_limited: The number of searches answered with a 429 response
+
+    Representation Invariants:
+        - self.max_requests_per_second is None or self.max_requests_per_second > 0
+        - self.retry_after >= 0
+    """
+    max_requests_per_second: Optional[int]
+    retry_after: int
+    requests_served: int
+    requests_limited: int
+
+    # Private Instance Attributes:
+    #   - _albums: A mapping from the lowercase name of each album on Spotify to the artists and Spotify ids of the
+    #       albums with that name
+    #   - _recent: The times of the searches answered in the last second
+    #   - _lock: A lock held while reading or updating the counters and self._recent
+    #   - _server: The underlying HTTP server
+    #   - _thread: The thread running the server, or None if it is not running
+    _albums: dict[str, list[tuple[str, str]]]
+    _recent: deque[float]
+    _lock: threading.Lock
+    _server: ThreadingHTTPServer
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, albums: Iterable[tuple[str, str]], port: int = 0,
+                 max_requests_per_second: Optional[int] = None, retry_after: int = 1) -> None:
+        """Initialize a new stub server that knows the albums with the given names and artists, listening on port of
+        localhost. If port is 0, any free port is used. The server is not started.
+        """
+        self.max_requests_per_second = max_requests_per_second
+        self.retry_after = retry_after
+        self.requests_served = 0
+        self.requests_limited = 0
+        self._albums = {}
+        for name, artist in albums:
+            spotify_id = stub_spotify_id(name, artist)
+            if spotify_id is not None:
+                self._albums.setdefault(name.lower(), []).append((artist.lower(), spotify_id))
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            """The request handler of the stub server."""
+
+            def do_GET(self) -> None:
+                """Answer a search request."""
+                stub.handle_search(self)
+
+            def log_message(self, *args: object) -> None:
+                """Do not log requests."""
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def prefix(self) -> str:
+        """The URL prefix to give a spotipy.Spotify client so that it sends its requests to this server."""
+        return f'http://127.0.0.1:{self._server.server_address[1]}/v1/'
+
+    def start(self) -> None:
+        """Start serving requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving requests and close the server.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def search(self, query: str) -> list[dict]:
+        """Return the album items Spotify would return for query, in the same format as Spotify.
+        """
+        album_query, _, artist_query = query.partition(' artist:')
+        if not album_query.startswith('album:'):
+            return []
+        matches = self._albums.get(album_query[len('album:'):].lower(), [])
+        return [{'id': spotify_id, 'type': 'album', 'artists': [{'name': artist}]}
+                for artist, spotify_id in matches if artist_query == '' or artist == artist_query.lower()]
+
+    def handle_search(self, request: BaseHTTPRequestHandler) -> None:
+        """Answer the search request received by request.
+        """
+        url = urlparse(request.path)
+        if url.path != '/v1/search':
+            self._respond(request, 404, {'error': {'status': 404, 'message': 'Not found'}})
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - 1:
+                self._recent.popleft()
+            limited = self.max_requests_per_second is not None and len(self._recent) >= self.max_requests_per_second
+            if limited:
+                self.requests_limited += 1
+            else:
+                self._recent.append(now)
+                self.requests_served += 1
+
+        if limited:
+            self._respond(request, 429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                          {'Retry-After': str(self.retry_after)})
+            return
+
+        query = parse_qs(url.query).get('q', [''])[0]
+        items = self.search(query)
+        self._respond(request, 200, {'albums': {'items': items, 'total': len(items)}})
+
+    def _respond(self, request: BaseHTTPRequestHandler, status: int, body: dict,
+                 headers: Optional[dict[str, str]] = None) -> None:
+        """Send a JSON response with the given status, body and extra headers to request.
+        """
+        data = json.dumps(body).encode('utf8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(data)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['hashlib', 'json', 'threading', 'time', 'collections', 'http.server', 'urllib.parse',
+                          'catalog'],
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'disable': ['invalid-name'],
+        'max-line-length': 120
+    })
+
+    from catalog import get_catalog
+
+    server = SpotifyStubServer(((album.name, album.artist) for album in get_catalog().albums), SPOTIFY_STUB_PORT)
+    print('Serving the Spotify search stub, set SPOTIFY_API_PREFIX=' + server.prefix)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
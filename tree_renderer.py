@@ -0,0 +1,171 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Tree Renderer)
+
+Description
+===============================
+
+This Python module contains the functions used to draw every tree of the app as a plotly figure: the genre trees, the
+genre recommendation tree and the album recommendation tree. A tree is given as a list of parent indices, where node 0
+is the root and every other node comes after its parent, along with the label and custom data of every node.
+
+Trees are drawn with the Reingold-Tilford layout, with the root at y = 0 and the nodes at depth d at y = -d. The layout
+only depends on the shape of the tree, so it is cached by shape: every genre with k subgenres has the same layout.
+Stars and other trees where every node above the last level has the same number of children, which are most of the
+trees the app draws, are laid out with a formula instead of igraph.
+
+Figures are returned as plain dictionaries, in the same form as go.Figure.to_dict, filled in from a template figure
+that is built and validated once when this module is imported. Dash callbacks can return them directly.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+import plotly.graph_objects as go
+from igraph import Graph
+
+LAYOUT_CACHE_SIZE = 1024
+
+# The parts of plotly's default template that change how a tree is drawn. The rest of it only styles other trace
+# types and visible axes, and would be sent with every figure.
+_TREE_TEMPLATE = go.layout.Template(layout=dict(font=dict(color='#2a3f5f'), hovermode='closest',
+                                                hoverlabel=dict(align='left')))
+
+# The styled traces and layout every tree figure is filled in from. Only the data of the traces differs between trees.
+_TREE_FIGURE = go.Figure(
+    data=[go.Scatter(x=[],
+                     y=[],
+                     mode='lines',
+                     line=dict(color='rgb(210,210,210)', width=1),
+                     hoverinfo='none',
+                     textfont_color='white',
+                     opacity=1
+                     ),
+          go.Scatter(x=[],
+                     y=[],
+                     mode='markers+text',
+                     marker=dict(symbol='circle-dot',
+                                 size=30,
+                                 color='hotpink',
+                                 line=dict(color='rgb(50,50,50)', width=1)
+                                 ),
+                     hoverinfo='text',
+                     textfont_color='white',
+                     opacity=1
+                     )],
+    layout=dict(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', showlegend=False,
+                xaxis=dict(visible=False), yaxis=dict(visible=False), template=_TREE_TEMPLATE)).to_dict()
+
+
+def tree_layout(parents: Sequence[int]) -> tuple[list[float], list[float]]:
+    """Return the x and y coordinates of every node of the tree with the given parent indices, in the
+    Reingold-Tilford layout, with the root at y = 0 and the nodes at depth d at y = -d. The returned lists are shared by
+    every tree of the same shape, so they must not be modified.
+
+    >>> tree_layout([-1, 0, 0, 0])
+    ([0.0, -1.0, 0.0, 1.0], [0.0, -1.0, -1.0, -1.0])
+
+    Preconditions:
+        - parents != [] and parents[0] == -1
+        - all(0 <= parents[i] < i for i in range(1, len(parents)))
+    """
+    return _cached_layout(tuple(parents))
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _cached_layout(parents: tuple[int, ...]) -> tuple[list[float], list[float]]:
+    """Return tree_layout(parents), computing it only the first time a tree of this shape is laid out.
+    """
+    children = [[] for _ in parents]
+    depths = [0] * len(parents)
+    for node in range(1, len(parents)):
+        children[parents[node]].append(node)
+        depths[node] = depths[parents[node]] + 1
+
+    xs = _uniform_layout(children, depths)
+    if xs is None:
+        graph = Graph(n=len(parents), edges=[(parents[node], node) for node in range(1, len(parents))], directed=True)
+        xs = [x for x, _ in graph.layout_reingold_tilford(root=[0])]
+    return xs, [float(-depth) for depth in depths]
+
+
+def _uniform_layout(children: list[list[int]], depths: list[int]) -> Optional[list[float]]:
+    """Return the x coordinates of the nodes of a tree in the Reingold-Tilford layout, where children holds the children
+    of every node and depths the depth of every node, if every leaf is on the same level and every other node has the
+    same number of children. Return None for any other tree.
+
+    In such a tree, the leaves are 1 apart and every other node is centred above its children.
+    """
+    max_depth = max(depths)
+    fan_out = len(children[0])
+    if any(len(children[node]) != (0 if depths[node] == max_depth else fan_out) for node in range(len(children))):
+        return None
+
+    num_leaves = fan_out ** max_depth
+    xs = [0.0] * len(children)
+    next_leaf = 0
+    # The leaves are numbered from left to right with a depth-first pass.
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        if children[node]:
+            stack.extend(reversed(children[node]))
+        else:
+            xs[node] = next_leaf - (num_leaves - 1) / 2
+            next_leaf += 1
+    # Children always come after their parents, so visiting the nodes from last to first places every node's children
+    # before the node itself.
+    for node in range(len(children) - 1, -1, -1):
+        if children[node]:
+            xs[node] = (xs[children[node][0]] + xs[children[node][-1]]) / 2
+    return xs
+
+
+def tree_figure(parents: Sequence[int], labels: list[str], customdata: list[Any], name: str = '') -> dict[str, Any]:
+    """Obtained and altered from the plotly library for tree-plots, this function plots the tree with the given parent
+    indices, where node i is labelled labels[i] and has customdata[i] as its custom data. The nodes are drawn with the
+    given trace name, and the edges are drawn in the order of their child nodes.
+
+    The returned figure shares its layout and styles with every other tree figure, so only the data arrays of its
+    traces may be modified.
+
+    Preconditions:
+        - len(parents) == len(labels) == len(customdata)
+        - parents != [] and parents[0] == -1
+        - all(0 <= parents[i] < i for i in range(1, len(parents)))
+    """
+    Xn, Yn = tree_layout(parents)
+    num_edges = len(parents) - 1
+    Xe = [None] * (3 * num_edges)
+    Ye = [None] * (3 * num_edges)
+    Xe[0::3] = [Xn[parent] for parent in parents[1:]]
+    Xe[1::3] = Xn[1:]
+    Ye[0::3] = [Yn[parent] for parent in parents[1:]]
+    Ye[1::3] = Yn[1:]
+
+    edge_trace, node_trace = _TREE_FIGURE['data']
+    return {'data': [dict(edge_trace, x=Xe, y=Ye),
+                     dict(node_trace, x=list(Xn), y=list(Yn), text=labels, customdata=customdata, name=name,
+                          textposition=improve_text_position(Xn))],
+            'layout': _TREE_FIGURE['layout']}
+
+
+def improve_text_position(Xn: Sequence[float]) -> list[str]:
+    """Fixes text overlap issues by alternating between top and bottom text positions (Note: still overlap for some
+    cases).
+    """
+    positions = ['top center', 'bottom center']
+    return ['middle center' if Xn[i] == 0 else positions[i % 2] for i in range(len(Xn))]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['functools', 'plotly.graph_objects', 'igraph'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'disable': ['invalid-name'],
+        'max-line-length': 120
+    })
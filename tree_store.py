@@ -0,0 +1,97 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (Tree Store)
+
+Description
+===============================
+
+This Python module contains the TreeStore class, a bounded least-recently-used store of the nodes of the album
+recommendation trees displayed by the app. The nodes of a tree are kept on the server under a random tree id, and only
+the id is kept in the browser, so that expanding a node of a large tree does not send every node's position back and
+forth between the browser and the server on every click.
+
+The store is kept in the memory of a single server process. A tree that has been evicted, or that was drawn by another
+worker process, is not found, and the callbacks then draw a new tree instead of expanding it.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+class TreeStore:
+    """A bounded least-recently-used store of the nodes of album recommendation trees, keyed by tree id.
+
+    The nodes of a tree are stored as returned by plot_album_recommendation_tree: the parent index, album id and x and
+    y coordinates of every node, under 'parents', 'album_ids', 'x' and 'y'.
+
+    Instance Attributes:
+        - max_size: The maximum number of trees kept in the store
+
+    Representation Invariants:
+        - self.max_size > 0
+
+    >>> store = TreeStore(1)
+    >>> tree_id = store.add({'parents': [-1], 'album_ids': [0], 'x': [0.0], 'y': [0.0]})
+    >>> store.get(tree_id)['album_ids']
+    [0]
+    >>> store.get(store.add({'parents': [-1], 'album_ids': [1], 'x': [0.0], 'y': [0.0]}))['album_ids']
+    [1]
+    >>> store.get(tree_id) is None
+    True
+    """
+    max_size: int
+
+    # Private Instance Attributes:
+    #   - _trees: The nodes of the stored trees, from least to most recently used
+    #   - _lock: A lock held while reading or updating self._trees
+    _trees: OrderedDict[str, dict[str, list]]
+    _lock: threading.Lock
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize a new empty tree store holding at most max_size trees.
+
+        Preconditions:
+            - max_size > 0
+        """
+        self.max_size = max_size
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, nodes: dict[str, list]) -> str:
+        """Store the nodes of a new tree, and return its tree id. If the store is full, the least recently used tree
+        is removed.
+        """
+        tree_id = uuid.uuid4().hex
+        with self._lock:
+            self._trees[tree_id] = nodes
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+        return tree_id
+
+    def get(self, tree_id: str) -> Optional[dict[str, list]]:
+        """Return the nodes of the tree with the given id, or None if it is not in the store. The nodes are returned
+        as stored, so changes made to them by expand_album_recommendation_tree are kept.
+        """
+        with self._lock:
+            nodes = self._trees.get(tree_id)
+            if nodes is not None:
+                self._trees.move_to_end(tree_id)
+            return nodes
+
+    def __len__(self) -> int:
+        """Return the number of trees in the store."""
+        return len(self._trees)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['threading', 'uuid', 'collections'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
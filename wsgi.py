@@ -0,0 +1,31 @@
+"""CSC111 Project Phase 2: Interactive Music Genre and Album Recommendation Tree (WSGI Entry Point)
+
+Description
+===============================
+
+This Python module is the entry point used to run our app on a production WSGI server, with several worker processes
+instead of the single process of the development server started by main.py. Run it from the root of the project with:
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+The app is created when this module is imported. With the settings in gunicorn.conf.py, gunicorn imports it once in
+its master process before forking the workers, so the catalog, recommender and genre tree figures are built once and
+shared copy-on-write by every worker. Each session keeps its exploration state in the browser, so requests from one
+session can be served by any worker.
+
+This file is Copyright (c) 2023 David Wu and Kevin Hu.
+"""
+from main import create_app
+
+app = create_app()
+server = app.server
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['main'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })